@@ -7,7 +7,19 @@ a = Analysis(
     pathex=[],
     binaries=[],
     datas=[('icons/*', 'icons')],  # ✅ incluye todos los PNGs de tu carpeta icons/
-    hiddenimports=[],
+    # Módulos que la aplicación importa de forma perezosa (ver src/gui/__init__.py)
+    hiddenimports=[
+        'src.gui.dialogs.roddiertest',
+        'src.gui.dialogs.roddiertestresults',
+        'src.core.roddier',
+        'src.core.zernike',
+        'src.core.interferometry',
+        'matplotlib.backends.backend_qt5agg',
+        'astropy.io.fits',
+        'scipy.fft',
+        'scipy.ndimage',
+        'scipy.signal',
+    ],
     hookspath=[],
     hooksconfig={},
     runtime_hooks=[],
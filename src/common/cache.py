@@ -0,0 +1,147 @@
+# Copyright (c) 2025 Adrián Hernández Padrón
+# Licensed under the MIT License. See LICENSE file in the project root for full license information.
+
+"""
+Caché en disco de resultados intermedios, direccionada por contenido.
+
+Cada entrada es un fichero npz comprimido con los arrays de una etapa
+(imágenes alineadas, ΔI/I₀, máscara, coeficientes...). Su clave es el
+SHA-256 de los datos de entrada y de los parámetros que afectan a la etapa
+(ver `cache_key`), de modo que al volver a procesar un archivo con otros
+parámetros sólo se recalculan las etapas cuyas entradas han cambiado.
+
+Cuando el directorio supera `max_bytes` se borran las entradas usadas hace
+más tiempo (la fecha de modificación se actualiza en cada lectura).
+"""
+
+import hashlib
+import os
+import tempfile
+import zipfile
+import numpy as np
+
+# Tamaño máximo por defecto de la caché
+DEFAULT_CACHE_MB = 1024
+
+CACHE_SUFFIX = '.npz'
+
+
+def _feed(digest, value):
+    """Añade un valor (array, escalar, cadena, secuencia o dict) a un hash de forma inequívoca."""
+    if isinstance(value, np.ndarray):
+        value = np.ascontiguousarray(value)
+        digest.update(f"array:{value.dtype.str}:{value.shape}:".encode())
+        digest.update(value.tobytes())
+    elif isinstance(value, dict):
+        digest.update(f"dict:{len(value)}:".encode())
+        for key in sorted(value, key=str):
+            _feed(digest, str(key))
+            _feed(digest, value[key])
+    elif isinstance(value, (list, tuple)):
+        digest.update(f"seq:{len(value)}:".encode())
+        for item in value:
+            _feed(digest, item)
+    elif isinstance(value, (np.number, float, int)) and not isinstance(value, bool):
+        # 23 y 23.0 son el mismo parámetro
+        digest.update(f"number:{float(value)!r};".encode())
+    else:
+        digest.update(f"{type(value).__name__}:{value!r};".encode())
+
+
+def cache_key(*parts):
+    """Clave SHA-256 (hex) de los datos y parámetros de una etapa."""
+    digest = hashlib.sha256()
+    for part in parts:
+        _feed(digest, part)
+    return digest.hexdigest()
+
+
+class ResultCache:
+    """Entradas npz en un directorio, con expulsión de las menos usadas por tamaño."""
+
+    def __init__(self, directory, max_bytes=DEFAULT_CACHE_MB * 1024 * 1024):
+        self.directory = str(directory)
+        self.max_bytes = int(max_bytes)
+        os.makedirs(self.directory, exist_ok=True)
+        self.hits = 0
+        self.misses = 0
+
+    def _path(self, stage, key):
+        return os.path.join(self.directory, f"{stage}-{key}{CACHE_SUFFIX}")
+
+    def get(self, stage, key):
+        """
+        Arrays guardados de una etapa, o None si no están en la caché.
+
+        Una entrada ilegible (p. ej. escrita a medias) se borra y cuenta como fallo.
+        """
+        path = self._path(stage, key)
+        try:
+            with np.load(path, allow_pickle=False) as data:
+                arrays = {name: data[name] for name in data.files}
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        except (OSError, ValueError, EOFError, zipfile.BadZipFile):
+            self._remove(path)
+            self.misses += 1
+            return None
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        self.hits += 1
+        return arrays
+
+    def put(self, stage, key, arrays):
+        """Guarda los arrays (dict nombre -> array o escalar) de una etapa y aplica el límite de tamaño."""
+        path = self._path(stage, key)
+        # Se escribe en un temporal y se renombra: un lector nunca ve un fichero a medias
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                np.savez_compressed(f, **arrays)
+            os.replace(tmp_path, path)
+        except BaseException:
+            self._remove(tmp_path)
+            raise
+        self.evict()
+
+    def _entries(self):
+        entries = []
+        with os.scandir(self.directory) as it:
+            for entry in it:
+                if entry.name.endswith(CACHE_SUFFIX):
+                    try:
+                        stat = entry.stat()
+                    except OSError:
+                        continue
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+        return entries
+
+    @property
+    def size_bytes(self):
+        """Tamaño total de las entradas."""
+        return sum(size for _, size, _ in self._entries())
+
+    def evict(self, max_bytes=None):
+        """Borra las entradas usadas hace más tiempo hasta quedar por debajo de `max_bytes`."""
+        limit = self.max_bytes if max_bytes is None else max_bytes
+        entries = sorted(self._entries())
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if total <= limit:
+                break
+            self._remove(path)
+            total -= size
+
+    def clear(self):
+        """Borra todas las entradas."""
+        self.evict(0)
+
+    @staticmethod
+    def _remove(path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
@@ -0,0 +1,177 @@
+# Copyright (c) 2025 Adrián Hernández Padrón
+# Licensed under the MIT License. See LICENSE file in the project root for full license information.
+
+import threading
+import weakref
+import numpy as np
+from src.common.tracing import traced
+
+# Lado aproximado de la imagen reducida usada en la estimación gruesa
+COARSE_SIZE = 256
+
+# Caché por identidad de imagen: id(imagen) -> (weakref, {(magnitud, umbral): resultado})
+_cache = {}
+_cache_lock = threading.Lock()
+
+
+def _thresholded_com(normalized, threshold, y_offset=0, x_offset=0):
+    """Centro de masa de los píxeles por encima del umbral en una ventana ya normalizada."""
+    mask = normalized > threshold
+    weights = normalized[mask]
+    total_mass = np.sum(weights)
+    if total_mass <= 0:
+        return None
+    y_indices, x_indices = np.nonzero(mask)
+    com_y = np.sum(y_indices * weights) / total_mass + y_offset
+    com_x = np.sum(x_indices * weights) / total_mass + x_offset
+    return com_y, com_x
+
+
+def _coarse_estimate(image, vmin, scale, threshold, factor):
+    """
+    Estimación gruesa sobre la imagen reducida por bloques de factor x factor.
+
+    Un bloque es significativo si contiene algún píxel por encima del umbral
+    (máximo del bloque); se pondera con la media del bloque.
+
+    Retorna:
+    - (cy, cx, radio) en píxeles de la imagen original, o None
+    """
+    h, w = image.shape[0] // factor, image.shape[1] // factor
+    blocks = image[:h * factor, :w * factor].reshape(h, factor, w, factor)
+    block_max = (blocks.max(axis=(1, 3)) - vmin) * scale
+    block_mean = (blocks.mean(axis=(1, 3)) - vmin) * scale
+
+    mask = block_max > threshold
+    weights = block_mean[mask]
+    total = np.sum(weights)
+    if total <= 0:
+        return None
+
+    y_idx, x_idx = np.nonzero(mask)
+    cy = np.sum(y_idx * weights) / total
+    cx = np.sum(x_idx * weights) / total
+    spread = np.sqrt(np.sum(((y_idx - cy) ** 2 + (x_idx - cx) ** 2) * weights) / total)
+
+    # Centros de bloque en coordenadas de la imagen original
+    return (cy + 0.5) * factor - 0.5, (cx + 0.5) * factor - 0.5, spread * factor
+
+
+@traced()
+def compute_center_of_mass(image, threshold=0.1):
+    """
+    Centro de masa (y, x) de los píxeles significativos, de grueso a fino.
+
+    La imagen se normaliza entre su mínimo y su máximo y sólo cuentan los
+    píxeles por encima de `threshold`. En imágenes grandes se estima primero
+    el centro sobre una versión reducida por bloques y después se calcula el
+    centro exacto sólo en una ventana alrededor de esa estimación.
+
+    Retorna:
+    - (com_y, com_x) como enteros; el centro geométrico si no hay píxeles significativos
+    """
+    vmin = np.min(image)
+    vmax = np.max(image)
+    scale = 1.0 / (vmax - vmin) if vmax > vmin else 0.0
+
+    y0, x0 = 0, 0
+    window = image
+    factor = int(np.ceil(max(image.shape) / COARSE_SIZE))
+    if factor >= 2 and scale > 0:
+        estimate = _coarse_estimate(image, vmin, scale, threshold, factor)
+        if estimate is not None:
+            cy, cx, spread = estimate
+            half = int(3 * spread + 2 * factor)
+            y0 = max(0, int(cy) - half)
+            x0 = max(0, int(cx) - half)
+            window = image[y0:int(cy) + half + 1, x0:int(cx) + half + 1]
+
+    com = None
+    if scale > 0:
+        com = _thresholded_com((window - vmin) * scale, threshold, y0, x0)
+    if com is None:
+        # Si no hay píxeles significativos, usar el centro geométrico
+        com_y, com_x = np.array(image.shape) // 2
+        return com_y, com_x
+
+    return int(com[0]), int(com[1])
+
+
+def _memoize(image, key, compute):
+    """Devuelve el valor memorizado `key` de la imagen o lo calcula con `compute()`."""
+    image_id = id(image)
+    with _cache_lock:
+        entry = _cache.get(image_id)
+        if entry is not None and entry[0]() is image and key in entry[1]:
+            return entry[1][key]
+
+    result = compute()
+
+    with _cache_lock:
+        entry = _cache.get(image_id)
+        if entry is None or entry[0]() is not image:
+            try:
+                ref = weakref.ref(image, lambda _ref, image_id=image_id: _forget(image_id, _ref))
+            except TypeError:
+                return result
+            entry = (ref, {})
+            _cache[image_id] = entry
+        entry[1][key] = result
+    return result
+
+
+def cached_center_of_mass(image, threshold=0.1):
+    """
+    Igual que `compute_center_of_mass`, pero memorizado por identidad de la imagen.
+
+    El resultado se reutiliza mientras el mismo objeto array siga vivo, por lo
+    que las llamadas repetidas sobre la misma imagen cuestan O(1). Las imágenes
+    no deben modificarse en el sitio después de calcular su centro (ver
+    `clear_centroid_cache`).
+    """
+    return _memoize(image, ('com', threshold), lambda: compute_center_of_mass(image, threshold))
+
+
+def compute_spot_radius(image, center, threshold=0.1):
+    """
+    Radio exterior aproximado (en píxeles) del patrón alrededor de `center`.
+
+    Se toma el percentil 99 de la distancia al centro de los píxeles
+    significativos (robusto frente a píxeles calientes aislados). En imágenes
+    grandes se trabaja sobre el máximo por bloques de la imagen reducida.
+    """
+    vmin = np.min(image)
+    vmax = np.max(image)
+    if vmax <= vmin:
+        return 0.0
+
+    factor = max(1, int(np.ceil(max(image.shape) / COARSE_SIZE)))
+    h, w = image.shape[0] // factor, image.shape[1] // factor
+    blocks = image[:h * factor, :w * factor].reshape(h, factor, w, factor)
+    block_max = blocks.max(axis=(1, 3))
+
+    y_idx, x_idx = np.nonzero(block_max > vmin + threshold * (vmax - vmin))
+    if y_idx.size == 0:
+        return 0.0
+    cy, cx = center
+    r = np.hypot((y_idx + 0.5) * factor - 0.5 - cy, (x_idx + 0.5) * factor - 0.5 - cx)
+    return float(np.percentile(r, 99) + factor / 2)
+
+
+def cached_spot_radius(image, threshold=0.1):
+    """Radio del patrón alrededor de su centro de masa, memorizado por imagen."""
+    return _memoize(image, ('radius', threshold),
+                    lambda: compute_spot_radius(image, cached_center_of_mass(image, threshold), threshold))
+
+
+def _forget(key, ref):
+    with _cache_lock:
+        entry = _cache.get(key)
+        if entry is not None and entry[0] is ref:
+            del _cache[key]
+
+
+def clear_centroid_cache():
+    """Vacía la caché de centroides (p. ej. tras modificar una imagen en el sitio)."""
+    with _cache_lock:
+        _cache.clear()
@@ -0,0 +1,95 @@
+# Copyright (c) 2025 Adrián Hernández Padrón
+# Licensed under the MIT License. See LICENSE file in the project root for full license information.
+
+"""
+Fuentes de fotogramas para el apilado: vídeos SER y cubos FITS (NAXIS = 3).
+
+Ambos lectores tienen la misma interfaz: `len()`, `frame_shape` y
+`read(start, stop)`, que devuelve un bloque de fotogramas en float64 leído
+del fichero mapeado en memoria, de modo que el apilado nunca carga el vídeo
+completo. `max_value` es el valor de un píxel saturado (None si no se conoce).
+"""
+
+import os
+import numpy as np
+from src.common.ser import SerReader
+
+SER_EXTENSIONS = ('.ser',)
+
+
+class FitsCubeReader:
+    """Fotogramas del HDU primario de un cubo FITS (n, alto, ancho), mapeados en memoria."""
+
+    def __init__(self, path):
+        from astropy.io import fits
+        self.path = path
+        self._hdul = fits.open(path, memmap=True, do_not_scale_image_data=True)
+        hdu = self._hdul[0]
+        data = hdu.data
+        if data is None or data.ndim not in (2, 3):
+            self._hdul.close()
+            raise ValueError(f"{os.path.basename(path)} no contiene una imagen ni un cubo de imágenes")
+        # Una imagen 2D es un vídeo de un único fotograma
+        self._data = data if data.ndim == 3 else data[np.newaxis]
+        self._bscale = hdu.header.get('BSCALE', 1.0)
+        self._bzero = hdu.header.get('BZERO', 0.0)
+        bitpix = hdu.header.get('BITPIX', -64)
+        # Los enteros con signo de FITS se desplazan con BZERO para guardar datos sin signo
+        if bitpix == 8:
+            self.max_value = 255 * self._bscale + self._bzero
+        elif bitpix > 0:
+            self.max_value = (2 ** (bitpix - 1) - 1) * self._bscale + self._bzero
+        else:
+            self.max_value = None  # datos en coma flotante: sin nivel de saturación conocido
+
+    def __len__(self):
+        return self._data.shape[0]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    @property
+    def frame_shape(self):
+        return self._data.shape[1:]
+
+    def read(self, start, stop):
+        """Fotogramas [start, stop) en float64 con BSCALE/BZERO aplicados."""
+        frames = self._data[start:stop].astype(np.float64)
+        if self._bscale != 1.0:
+            frames *= self._bscale
+        if self._bzero != 0.0:
+            frames += self._bzero
+        return frames
+
+    def close(self):
+        self._data = None
+        self._hdul.close()
+
+
+def fits_frame_count(path):
+    """Número de fotogramas de un FITS (NAXIS3 para un cubo, 1 para una imagen), sin leer los datos."""
+    from astropy.io import fits
+    header = fits.getheader(path)
+    if header.get('NAXIS', 0) == 3:
+        return int(header['NAXIS3'])
+    return 1
+
+
+def is_frame_sequence(path):
+    """True si el fichero es un vídeo SER o un cubo FITS con varios fotogramas."""
+    if path.lower().endswith(SER_EXTENSIONS):
+        return True
+    try:
+        return fits_frame_count(path) > 1
+    except (OSError, KeyError, ValueError):
+        return False
+
+
+def open_frames(path):
+    """Abre un vídeo SER o un FITS (cubo o imagen) como fuente de fotogramas."""
+    if path.lower().endswith(SER_EXTENSIONS):
+        return SerReader(path)
+    return FitsCubeReader(path)
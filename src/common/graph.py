@@ -0,0 +1,141 @@
+# Copyright (c) 2025 Adrián Hernández Padrón
+# Licensed under the MIT License. See LICENSE file in the project root for full license information.
+
+"""
+Grafo de etapas con resultados memorizados e invalidación incremental.
+
+Cada etapa declara las etapas de las que depende y los parámetros que lee.
+Al cambiar un parámetro con `StageGraph.set` sólo se descartan las etapas que
+lo leen y las que dependen de ellas; el resto conserva su resultado. Las
+etapas se evalúan bajo demanda con `get`, así que una consulta sólo ejecuta
+lo necesario para responderla.
+
+Con una `ResultCache` las etapas que lo indican (`persist`) se guardan
+también en disco. Su clave se deriva de las claves de sus dependencias y de
+sus parámetros, sin evaluarlas: si una etapa está en la caché no se calcula
+nada de lo que hay antes de ella.
+"""
+
+from dataclasses import dataclass
+import numpy as np
+from src.common.cache import cache_key
+from src.common.tracing import span
+
+
+@dataclass(frozen=True)
+class Stage:
+    """Etapa del grafo: `function(**dependencias, **parámetros)` retorna un dict de salidas."""
+    name: str
+    function: object
+    inputs: tuple = ()  # etapas previas; la función recibe sus salidas con el nombre de la etapa
+    params: tuple = ()  # parámetros del grafo que lee la etapa
+    persist: tuple = ()  # salidas (arrays o escalares) que se guardan en la caché en disco
+
+
+def _same(a, b):
+    """Compara dos valores de parámetro (arrays por contenido)."""
+    if isinstance(a, np.ndarray) or isinstance(b, np.ndarray):
+        if a is b:
+            return True
+        return (isinstance(a, np.ndarray) and isinstance(b, np.ndarray) and a.shape == b.shape
+                and a.dtype == b.dtype and np.array_equal(a, b))
+    try:
+        return type(a) is type(b) and bool(a == b)
+    except (TypeError, ValueError):
+        return False
+
+
+class StageGraph:
+    """Grafo de etapas (en orden topológico) con sus parámetros y resultados memorizados."""
+
+    def __init__(self, stages, cache=None, **params):
+        """
+        Parámetros:
+        - stages: etapas, cada una después de aquellas de las que depende
+        - cache: ResultCache opcional para las etapas con `persist`
+        - params: valores iniciales de los parámetros
+        """
+        self.stages = {}
+        self._dependents = {}
+        for stage in stages:
+            missing = [name for name in stage.inputs if name not in self.stages]
+            if missing:
+                raise ValueError(f"La etapa '{stage.name}' depende de etapas no definidas antes: {missing}")
+            self.stages[stage.name] = stage
+            self._dependents[stage.name] = []
+            for name in stage.inputs:
+                self._dependents[name].append(stage.name)
+        self.cache = cache
+        self.params = {}
+        self.runs = {name: 0 for name in self.stages}  # ejecuciones de cada etapa (sin contar la caché)
+        self._outputs = {}
+        self._keys = {}
+        self._param_keys = {}
+        self.set(**params)
+
+    def set(self, **params):
+        """
+        Cambia parámetros y descarta los resultados que dependen de ellos.
+
+        Retorna:
+        - conjunto con los nombres de las etapas invalidadas
+        """
+        changed = [name for name, value in params.items()
+                   if name not in self.params or not _same(self.params[name], value)]
+        self.params.update(params)
+        for name in changed:
+            self._param_keys.pop(name, None)
+        return self.invalidate(*[stage.name for stage in self.stages.values()
+                                 if any(name in stage.params for name in changed)])
+
+    def invalidate(self, *names):
+        """Descarta el resultado de las etapas indicadas y de todas las que dependen de ellas."""
+        stale = set()
+        pending = list(names)
+        while pending:
+            name = pending.pop()
+            if name in stale:
+                continue
+            stale.add(name)
+            self._outputs.pop(name, None)
+            self._keys.pop(name, None)
+            pending.extend(self._dependents[name])
+        return stale
+
+    def is_valid(self, name):
+        """True si la etapa tiene un resultado memorizado."""
+        return name in self._outputs
+
+    def key(self, name):
+        """Clave de contenido de una etapa: sus dependencias (por clave) y sus parámetros."""
+        if name not in self._keys:
+            stage = self.stages[name]
+            self._keys[name] = cache_key(name, [self.key(dependency) for dependency in stage.inputs],
+                                         [self._param_key(param) for param in stage.params])
+        return self._keys[name]
+
+    def _param_key(self, name):
+        if name not in self._param_keys:
+            self._param_keys[name] = cache_key(name, self.params[name])
+        return self._param_keys[name]
+
+    def get(self, name):
+        """Salidas de una etapa, calculando sólo lo que no está memorizado."""
+        if name in self._outputs:
+            return self._outputs[name]
+        stage = self.stages[name]
+        if stage.persist and self.cache is not None:
+            stored = self.cache.get(name, self.key(name))
+            if stored is not None:
+                self._outputs[name] = stored
+                return stored
+
+        arguments = {dependency: self.get(dependency) for dependency in stage.inputs}
+        arguments.update({param: self.params[param] for param in stage.params})
+        with span(f"stage.{name}", 'pipeline'):
+            outputs = stage.function(**arguments)
+        self.runs[name] += 1
+        if stage.persist and self.cache is not None:
+            self.cache.put(name, self.key(name), {output: outputs[output] for output in stage.persist})
+        self._outputs[name] = outputs
+        return outputs
@@ -0,0 +1,192 @@
+# Copyright (c) 2025 Adrián Hernández Padrón
+# Licensed under the MIT License. See LICENSE file in the project root for full license information.
+
+"""
+Lectura de vídeos SER (formato de FireCapture, SharpCap, Genicap...).
+
+Un SER es una cabecera fija de 178 bytes seguida de los fotogramas sin
+comprimir, uno tras otro, y opcionalmente de una marca de tiempo por
+fotograma. Los fotogramas se leen mapeados en memoria: abrir un vídeo de
+varios GB no lee nada del disco hasta que se accede a los fotogramas.
+"""
+
+from dataclasses import dataclass
+import os
+import numpy as np
+
+SER_HEADER_SIZE = 178
+SER_FILE_ID = b'LUCAM-RECORDER'
+
+# ColorID de la especificación
+SER_MONO = 0
+SER_BAYER_IDS = (8, 9, 10, 11, 16, 17, 18, 19)  # RGGB, GRBG, GBRG, BGGR, CYYM, YCMY, YMCY, MYYC
+SER_RGB = 100
+SER_BGR = 101
+
+_HEADER_DTYPE = np.dtype([
+    ('file_id', 'S14'),
+    ('lu_id', '<i4'),
+    ('color_id', '<i4'),
+    ('little_endian', '<i4'),
+    ('width', '<i4'),
+    ('height', '<i4'),
+    ('pixel_depth', '<i4'),
+    ('frame_count', '<i4'),
+    ('observer', 'S40'),
+    ('instrument', 'S40'),
+    ('telescope', 'S40'),
+    ('date_time', '<i8'),
+    ('date_time_utc', '<i8'),
+])
+
+
+@dataclass
+class SerHeader:
+    """Cabecera de un fichero SER."""
+    color_id: int
+    little_endian: int  # valor tal y como aparece en el fichero (ver `SerReader`)
+    width: int
+    height: int
+    pixel_depth: int  # bits por plano (8 o hasta 16)
+    frame_count: int
+    observer: str = ''
+    instrument: str = ''
+    telescope: str = ''
+
+    @property
+    def planes(self):
+        return 3 if self.color_id in (SER_RGB, SER_BGR) else 1
+
+    @property
+    def bytes_per_pixel(self):
+        return (1 if self.pixel_depth <= 8 else 2) * self.planes
+
+    @property
+    def frame_bytes(self):
+        return self.width * self.height * self.bytes_per_pixel
+
+
+def read_ser_header(path):
+    """Lee y valida la cabecera de un fichero SER."""
+    with open(path, 'rb') as f:
+        raw = f.read(SER_HEADER_SIZE)
+    if len(raw) < SER_HEADER_SIZE or not raw.startswith(SER_FILE_ID):
+        raise ValueError(f"{os.path.basename(path)} no es un fichero SER")
+    fields = np.frombuffer(raw, dtype=_HEADER_DTYPE)[0]
+
+    def text(value):
+        return value.decode('latin-1').rstrip('\x00 ')
+
+    return SerHeader(int(fields['color_id']), int(fields['little_endian']), int(fields['width']),
+                     int(fields['height']), int(fields['pixel_depth']), int(fields['frame_count']),
+                     text(fields['observer']), text(fields['instrument']), text(fields['telescope']))
+
+
+class SerReader:
+    """
+    Fotogramas de un vídeo SER mapeados en memoria.
+
+    Los fotogramas en color (RGB/BGR) se convierten a luminancia promediando
+    los planos; los Bayer se devuelven como el mosaico en bruto, que para un
+    donut desenfocado equivale a una imagen monocroma (o se binea 2x2).
+
+    El campo LittleEndian de la cabecera se escribe al revés de lo que dice
+    la especificación en casi todos los programas de captura: como ellos (y
+    Siril o PIPP), 0 se interpreta como little-endian. `byte_order` ('<' o
+    '>') fuerza el orden si un fichero concreto lo necesita.
+    """
+
+    def __init__(self, path, byte_order=None):
+        self.path = path
+        self.header = read_ser_header(path)
+        header = self.header
+
+        if byte_order is None:
+            byte_order = '<' if header.little_endian == 0 else '>'
+        sample = np.dtype('u1') if header.pixel_depth <= 8 else np.dtype(byte_order + 'u2')
+        shape = (header.height, header.width)
+        if header.planes > 1:
+            shape += (header.planes,)
+
+        # Los fotogramas que no caben en el fichero (captura interrumpida) se ignoran
+        available = (os.path.getsize(path) - SER_HEADER_SIZE) // header.frame_bytes
+        self._count = int(min(header.frame_count, available))
+        self._frames = None
+        if self._count > 0:
+            self._frames = np.memmap(path, dtype=sample, mode='r', offset=SER_HEADER_SIZE,
+                                     shape=(self._count,) + shape)
+
+    def __len__(self):
+        return self._count
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    @property
+    def frame_shape(self):
+        return (self.header.height, self.header.width)
+
+    @property
+    def dtype(self):
+        return np.dtype('u1') if self.header.pixel_depth <= 8 else np.dtype('u2')
+
+    @property
+    def max_value(self):
+        """Valor de un píxel saturado según la profundidad de la cabecera."""
+        return float(2 ** min(self.header.pixel_depth, 16) - 1)
+
+    def read(self, start, stop):
+        """
+        Fotogramas [start, stop) en float64.
+
+        Retorna:
+        - array (n, alto, ancho)
+        """
+        frames = self._frames[start:stop]
+        if self.header.planes > 1:
+            return frames.mean(axis=-1, dtype=np.float64)
+        return frames.astype(np.float64)
+
+    def __getitem__(self, index):
+        """Un fotograma en su tipo original (vista sobre el fichero)."""
+        if not -self._count <= index < self._count:
+            raise IndexError(f"Fotograma {index} fuera de rango ({self._count} fotogramas)")
+        return self._frames[index]
+
+    def close(self):
+        self._frames = None
+
+
+def write_ser(path, frames, color_id=SER_MONO, pixel_depth=None, little_endian=True):
+    """
+    Escribe un vídeo SER (monocromo o Bayer) con los fotogramas dados.
+
+    Parámetros:
+    - frames: array (n, alto, ancho) uint8 o uint16
+    - pixel_depth: bits por píxel; por defecto 8 o 16 según el tipo
+    - little_endian: orden de bytes de los datos de 16 bits; la cabecera se
+      escribe con el convenio habitual de los programas de captura (0)
+    """
+    frames = np.asarray(frames)
+    if frames.dtype not in (np.uint8, np.uint16) or frames.ndim != 3:
+        raise ValueError("Se esperan fotogramas (n, alto, ancho) en uint8 o uint16")
+    if pixel_depth is None:
+        pixel_depth = 8 if frames.dtype == np.uint8 else 16
+    n, height, width = frames.shape
+
+    header = np.zeros(1, dtype=_HEADER_DTYPE)
+    header['file_id'] = SER_FILE_ID
+    header['color_id'] = color_id
+    header['little_endian'] = 0 if little_endian else 1
+    header['width'] = width
+    header['height'] = height
+    header['pixel_depth'] = pixel_depth
+    header['frame_count'] = n
+    if frames.dtype == np.uint16:
+        frames = frames.astype('<u2' if little_endian else '>u2')
+    with open(path, 'wb') as f:
+        f.write(header.tobytes())
+        f.write(np.ascontiguousarray(frames).tobytes())
@@ -0,0 +1,361 @@
+# Copyright (c) 2025 Adrián Hernández Padrón
+# Licensed under the MIT License. See LICENSE file in the project root for full license information.
+
+"""
+Instrumentación ligera del pipeline.
+
+Las funciones decoradas con `traced` (y los bloques `with span(...)`) emiten
+un `Span` a cada hook registrado con `add_hook`. Sin hooks registrados la
+instrumentación se reduce a comprobar una lista vacía.
+
+Opcionalmente (`enable_memory_tracking`) cada span registra también el pico
+de memoria asignada durante la etapa, medido con tracemalloc, y se avisa con
+`MemoryBudgetWarning` cuando una etapa se acerca a su presupuesto.
+"""
+
+from collections import OrderedDict
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+import atexit
+import functools
+import json
+import os
+import threading
+import time
+import tracemalloc
+import warnings
+
+# Variable de entorno con la ruta donde guardar una traza al salir del programa
+TRACE_ENV_VAR = 'PYRODDIER_TRACE'
+
+# Variable de entorno que activa la medida de memoria por etapa
+MEMORY_ENV_VAR = 'PYRODDIER_TRACE_MEMORY'
+
+# Fracción del presupuesto a partir de la cual se avisa
+BUDGET_WARNING_FRACTION = 0.8
+
+_hooks = []
+_hooks_lock = threading.Lock()
+_local = threading.local()
+
+# Estado de la medida de memoria
+_memory = {'enabled': False, 'owns_tracemalloc': False}
+_budgets = {}  # etapa (None = cualquier etapa) -> presupuesto en bytes
+
+
+class MemoryBudgetWarning(UserWarning):
+    """Una etapa ha usado una parte del presupuesto de memoria mayor de la permitida."""
+
+
+@dataclass
+class Span:
+    """Intervalo de ejecución de una etapa."""
+    name: str
+    category: str
+    start: float  # segundos (time.perf_counter)
+    end: float = 0.0
+    thread_id: int = 0
+    depth: int = 0  # nivel de anidamiento dentro del hilo
+    parent: str = None
+    args: dict = field(default_factory=dict)  # formas, tipos y bytes de entradas y salidas
+    peak_memory: int = None  # pico de memoria asignada durante la etapa (bytes), si se mide
+    over_budget: bool = False
+    _memory_base: int = field(default=0, repr=False)
+    _memory_peak: int = field(default=0, repr=False)
+
+    @property
+    def duration(self):
+        return self.end - self.start
+
+
+def add_hook(hook):
+    """Registra una función que recibe cada `Span` al terminar."""
+    with _hooks_lock:
+        if hook not in _hooks:
+            _hooks.append(hook)
+
+
+def remove_hook(hook):
+    """Elimina un hook registrado (no falla si no lo estaba)."""
+    with _hooks_lock:
+        if hook in _hooks:
+            _hooks.remove(hook)
+
+
+def clear_hooks():
+    with _hooks_lock:
+        _hooks.clear()
+
+
+def is_enabled():
+    """Indica si hay algún hook registrado."""
+    return bool(_hooks)
+
+
+def enable_memory_tracking(enabled=True):
+    """
+    Activa o desactiva la medida del pico de memoria por span.
+
+    Inicia tracemalloc si no estaba activo (y lo detiene al desactivar sólo
+    si lo inició esta función). tracemalloc es global: con etapas
+    concurrentes en varios hilos los picos son aproximados.
+    """
+    if enabled and not _memory['enabled']:
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            _memory['owns_tracemalloc'] = True
+        _memory['enabled'] = True
+    elif not enabled and _memory['enabled']:
+        _memory['enabled'] = False
+        if _memory['owns_tracemalloc']:
+            tracemalloc.stop()
+            _memory['owns_tracemalloc'] = False
+
+
+def is_memory_tracking():
+    return _memory['enabled']
+
+
+def set_memory_budget(name, megabytes):
+    """
+    Fija el presupuesto de memoria (MB) de una etapa; `name=None` lo aplica
+    a todas las etapas sin presupuesto propio. `megabytes=None` lo elimina.
+    """
+    if megabytes is None:
+        _budgets.pop(name, None)
+    else:
+        _budgets[name] = megabytes * 2**20
+
+
+def clear_memory_budgets():
+    _budgets.clear()
+
+
+def _memory_enter(stack):
+    current, peak = tracemalloc.get_traced_memory()
+    # El pico hasta ahora pertenece a la etapa que nos contiene
+    if stack:
+        stack[-1]._memory_peak = max(stack[-1]._memory_peak, peak)
+    tracemalloc.reset_peak()
+    return current
+
+
+def _memory_exit(record, stack):
+    _, peak = tracemalloc.get_traced_memory()
+    peak = max(peak, record._memory_peak)
+    record.peak_memory = max(0, peak - record._memory_base)
+    record.args['peak_memory_mb'] = round(record.peak_memory / 2**20, 3)
+    if stack:
+        stack[-1]._memory_peak = max(stack[-1]._memory_peak, peak)
+
+    budget = _budgets.get(record.name, _budgets.get(None))
+    if budget and record.peak_memory >= BUDGET_WARNING_FRACTION * budget:
+        record.over_budget = True
+        record.args['memory_budget_mb'] = budget / 2**20
+        warnings.warn(MemoryBudgetWarning(
+            f"{record.name}: pico de {record.peak_memory / 2**20:.0f} MB "
+            f"({100 * record.peak_memory / budget:.0f} % del presupuesto de {budget / 2**20:.0f} MB)"),
+            stacklevel=2)
+
+
+def describe_array(value):
+    """Descripción compacta ('float64[256, 256]') de un array, o None si no lo es."""
+    shape = getattr(value, 'shape', None)
+    dtype = getattr(value, 'dtype', None)
+    if shape is None or dtype is None:
+        return None
+    return f"{dtype}[{', '.join(str(s) for s in shape)}]"
+
+
+def _array_bytes(value):
+    if isinstance(value, (tuple, list)):
+        return sum(_array_bytes(v) for v in value)
+    return int(getattr(value, 'nbytes', 0) or 0)
+
+
+def _describe_inputs(args, kwargs):
+    inputs = {}
+    for i, value in enumerate(args):
+        description = describe_array(value)
+        if description:
+            inputs[f"arg{i}"] = description
+    for key, value in kwargs.items():
+        description = describe_array(value)
+        if description:
+            inputs[key] = description
+    return inputs
+
+
+def _stack():
+    stack = getattr(_local, 'stack', None)
+    if stack is None:
+        stack = _local.stack = []
+    return stack
+
+
+def _emit(record):
+    for hook in list(_hooks):
+        try:
+            hook(record)
+        except Exception as e:
+            print(f"Error en hook de trazas: {e}")
+
+
+@contextmanager
+def span(name, category='core', **args):
+    """
+    Bloque instrumentado. Los argumentos extra se guardan en `Span.args`.
+
+    Retorna (en el `with`) el Span en curso, o None si la traza está desactivada.
+    """
+    if not _hooks:
+        yield None
+        return
+
+    stack = _stack()
+    record = Span(name, category, time.perf_counter(), thread_id=threading.get_ident(),
+                  depth=len(stack), parent=stack[-1].name if stack else None, args=dict(args))
+    track_memory = _memory['enabled'] and tracemalloc.is_tracing()
+    if track_memory:
+        record._memory_base = _memory_enter(stack)
+    stack.append(record)
+    try:
+        yield record
+    finally:
+        stack.pop()
+        record.end = time.perf_counter()
+        if track_memory:
+            _memory_exit(record, stack)
+        _emit(record)
+
+
+def traced(name=None, category='core'):
+    """
+    Decorador que emite un Span por llamada con las formas de los arrays de
+    entrada y los bytes de la salida.
+    """
+    def decorator(func):
+        span_name = name or func.__name__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _hooks:
+                return func(*args, **kwargs)
+            with span(span_name, category, **_describe_inputs(args, kwargs)) as record:
+                result = func(*args, **kwargs)
+                if record is not None:
+                    record.args['output_bytes'] = _array_bytes(result)
+                return result
+        return wrapper
+    return decorator
+
+
+class ChromeTraceExporter:
+    """
+    Hook que acumula los spans y los guarda en formato Chrome trace
+    (abrir con chrome://tracing o Perfetto).
+    """
+
+    def __init__(self):
+        self.events = []
+        self._origin = time.perf_counter()
+        self._lock = threading.Lock()
+
+    def __call__(self, record):
+        event = {
+            'name': record.name,
+            'cat': record.category,
+            'ph': 'X',
+            'ts': (record.start - self._origin) * 1e6,
+            'dur': record.duration * 1e6,
+            'pid': os.getpid(),
+            'tid': record.thread_id,
+            'args': record.args,
+        }
+        with self._lock:
+            self.events.append(event)
+
+    def save(self, path):
+        with self._lock:
+            events = list(self.events)
+        with open(path, 'w') as f:
+            json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, f, default=str)
+
+
+class StageSummary:
+    """
+    Hook que acumula el tiempo total por etapa para mostrar un resumen.
+
+    Con `max_depth` sólo se cuentan los spans hasta ese nivel de anidamiento
+    (p. ej. una ejecución y sus etapas directas), para no contar varias veces
+    el tiempo de las funciones anidadas.
+    """
+
+    def __init__(self, max_depth=None):
+        self.max_depth = max_depth
+        self.totals = OrderedDict()
+        self.peaks = {}  # etapa -> mayor pico de memoria (bytes), si se mide
+        self.over_budget = []  # etapas que se han acercado a su presupuesto de memoria
+        self._lock = threading.Lock()
+
+    def __call__(self, record):
+        with self._lock:
+            # Los avisos de memoria se recogen a cualquier profundidad
+            if record.over_budget and record.name not in self.over_budget:
+                self.over_budget.append(record.name)
+            if self.max_depth is not None and record.depth > self.max_depth:
+                return
+            total, count = self.totals.get(record.name, (0.0, 0))
+            self.totals[record.name] = (total + record.duration, count + 1)
+            if record.peak_memory is not None:
+                self.peaks[record.name] = max(self.peaks.get(record.name, 0), record.peak_memory)
+
+    def reset(self):
+        with self._lock:
+            self.totals.clear()
+            self.peaks.clear()
+            self.over_budget.clear()
+
+    def text(self, top=5):
+        """Resumen de las etapas más lentas: 'etapa 120 ms / 85 MB · etapa 35 ms'."""
+        with self._lock:
+            items = [(name, total, self.peaks.get(name)) for name, (total, _) in self.totals.items()]
+            over_budget = list(self.over_budget)
+        items.sort(key=lambda item: item[1], reverse=True)
+        parts = []
+        for name, total, peak in items[:top]:
+            part = f"{name} {total * 1000:.0f} ms"
+            if peak is not None:
+                part += f" / {peak / 2**20:.0f} MB"
+            parts.append(part)
+        text = " · ".join(parts)
+        if over_budget:
+            text += f"  ⚠ memoria: {', '.join(over_budget)}"
+        return text
+
+
+@contextmanager
+def collecting(hook):
+    """Registra `hook` sólo durante el bloque."""
+    add_hook(hook)
+    try:
+        yield hook
+    finally:
+        remove_hook(hook)
+
+
+def install_from_environment():
+    """
+    Si la variable PYRODDIER_TRACE contiene una ruta, registra un
+    ChromeTraceExporter y guarda la traza en esa ruta al salir. Con
+    PYRODDIER_TRACE_MEMORY=1 se mide además la memoria de cada etapa.
+    """
+    if os.environ.get(MEMORY_ENV_VAR, '').lower() in ('1', 'true', 'yes'):
+        enable_memory_tracking()
+    path = os.environ.get(TRACE_ENV_VAR)
+    if not path:
+        return None
+    exporter = ChromeTraceExporter()
+    add_hook(exporter)
+    atexit.register(exporter.save, path)
+    return exporter
@@ -1,41 +1,232 @@
 # Copyright (c) 2025 Adrián Hernández Padrón
 # Licensed under the MIT License. See LICENSE file in the project root for full license information.
 
-from astropy.io import fits
+# astropy y scipy se importan dentro de las funciones que los usan: cargarlos
+# al importar este módulo retrasaría el arranque de la interfaz
+import hashlib
 import numpy as np
-from scipy.ndimage import center_of_mass
+import os
+import re
+from src.common.centroid import cached_center_of_mass
+from src.common.tracing import traced
 def find_center(img):
+    from scipy.ndimage import center_of_mass
     cy, cx = center_of_mass(img)
     return cx, cy
 
-def load_fits_image(path):
-    with fits.open(path) as hdul:
-        return hdul[0].data.astype(np.float64)
+# Filas leídas por bloque al binear durante la lectura
+BINNING_CHUNK_ROWS = 512
+
+def parse_binning(value):
+    """
+    Convierte el binning a un factor entero.
+
+    Acepta enteros o cadenas como "2x2", "2X2" o "2". Sólo se admite binning
+    cuadrado (NxN).
+    """
+    if isinstance(value, (int, np.integer)):
+        factor = int(value)
+    else:
+        parts = re.split(r'[xX×]', str(value).strip())
+        if len(parts) > 2 or (len(parts) == 2 and parts[0].strip() != parts[1].strip()):
+            raise ValueError(f"Sólo se admite binning cuadrado (NxN): {value}")
+        factor = int(parts[0])
+    if factor < 1:
+        raise ValueError(f"El binning debe ser un entero positivo: {value}")
+    return factor
+
+def bin_image(image, factor, method='sum', out=None):
+    """
+    Binning por software de bloques factor x factor mediante reshape.
+
+    Las filas y columnas sobrantes del borde (cuando el tamaño no es múltiplo
+    del factor) se descartan, igual que en el binning de las cámaras.
+
+    Parámetros:
+    - image: array 2D
+    - factor: tamaño del bloque (1 devuelve la imagen en float64)
+    - method: 'sum' o 'mean'
+    - out: array float64 opcional donde escribir el resultado
+
+    Retorna:
+    - imagen bineada en float64 de forma (alto // factor, ancho // factor)
+    """
+    if method not in ('sum', 'mean'):
+        raise ValueError(f"Método de binning desconocido: {method}")
+    if factor == 1:
+        result = np.asarray(image, dtype=np.float64)
+        if out is not None:
+            out[...] = result
+            return out
+        return result
+
+    h, w = image.shape[0] // factor, image.shape[1] // factor
+    blocks = image[:h * factor, :w * factor].reshape(h, factor, w, factor)
+    if method == 'sum':
+        return blocks.sum(axis=(1, 3), dtype=np.float64, out=out)
+    return blocks.mean(axis=(1, 3), dtype=np.float64, out=out)
+
+@traced()
+def load_fits_image(path, binning=1, method='sum'):
+    """
+    Carga una imagen FITS en float64, aplicando opcionalmente binning por software.
+
+    Con binning > 1 el archivo se lee mapeado en memoria y se binea por bloques
+    de filas, de modo que nunca se crea la copia en float64 a resolución completa.
+    """
+    from astropy.io import fits
+    if binning == 1:
+        with fits.open(path) as hdul:
+            return hdul[0].data.astype(np.float64)
+
+    with fits.open(path, memmap=True, do_not_scale_image_data=True) as hdul:
+        raw = hdul[0].data
+        bscale = hdul[0].header.get('BSCALE', 1.0)
+        bzero = hdul[0].header.get('BZERO', 0.0)
+        h, w = raw.shape[0] // binning, raw.shape[1] // binning
+        result = np.empty((h, w), dtype=np.float64)
+
+        rows_per_chunk = max(1, BINNING_CHUNK_ROWS // binning)
+        for start in range(0, h, rows_per_chunk):
+            stop = min(h, start + rows_per_chunk)
+            chunk = raw[start * binning:stop * binning, :w * binning].astype(np.float64)
+            if bscale != 1.0:
+                chunk *= bscale
+            if bzero != 0.0:
+                chunk += bzero
+            bin_image(chunk, binning, method, out=result[start:stop])
+        del raw
+    return result
+
+@traced()
+def load_fits_raw(path):
+    """Carga los datos del HDU primario en su tipo original (p. ej. uint16), sin convertir a float."""
+    from astropy.io import fits
+    with fits.open(path, memmap=False) as hdul:
+        data = hdul[0].data
+    # FITS almacena big-endian: pasar a orden nativo para las tablas de consulta
+    if data is not None and not data.dtype.isnative:
+        data = data.astype(data.dtype.newbyteorder('='))
+    return data
+
+# Pares de marcas habituales en los nombres de las capturas intra/extra-focales
+PAIR_TOKENS = [('intra', 'extra'), ('in', 'out')]
+
+FITS_EXTENSIONS = ('.fits', '.fit', '.fts')
+
+def _match_case(template, word):
+    if template.isupper():
+        return word.upper()
+    if template[:1].isupper():
+        return word.capitalize()
+    return word
+
+def _token_pattern(token):
+    # La marca debe ser una palabra: separada por _ - . espacio, dígitos o los extremos
+    return re.compile(r'(?<![A-Za-z])(%s)(?![A-Za-z])' % token, re.IGNORECASE)
+
+def guess_pair_path(path):
+    """
+    Busca en el mismo directorio la imagen pareja (intra <-> extra) según el nombre.
+
+    Se sustituye la marca del nombre (p. ej. 'intra_003.fits' -> 'extra_003.fits',
+    'M42_In.fit' -> 'M42_Out.fit') respetando mayúsculas, y se prueban también
+    las otras extensiones FITS.
+
+    Retorna:
+    - ruta de la pareja si existe, o None
+    """
+    directory, name = os.path.split(path)
+    stem, ext = os.path.splitext(name)
+    extensions = [ext] + [e for e in FITS_EXTENSIONS if e != ext.lower()]
+
+    for first, second in PAIR_TOKENS:
+        for source, target in ((first, second), (second, first)):
+            pattern = _token_pattern(source)
+            if not pattern.search(stem):
+                continue
+            candidate_stem = pattern.sub(lambda m: _match_case(m.group(1), target), stem)
+            for candidate_ext in extensions:
+                candidate = os.path.join(directory, candidate_stem + candidate_ext)
+                if os.path.exists(candidate):
+                    return candidate
+    return None
+
+def pair_key(path):
+    """
+    Identifica a qué par pertenece una imagen según su nombre.
+
+    'intra_003.fits' y 'extra_003.fit' comparten clave; la extensión y las
+    mayúsculas no cuentan.
+
+    Retorna:
+    - (clave, es_intrafocal), o None si el nombre no contiene ninguna marca
+    """
+    directory, name = os.path.split(path)
+    stem = os.path.splitext(name)[0]
+    for first, second in PAIR_TOKENS:
+        for token, is_intrafocal in ((first, True), (second, False)):
+            pattern = _token_pattern(token)
+            if pattern.search(stem):
+                return os.path.join(directory, pattern.sub('*', stem).lower()), is_intrafocal
+    return None
+
+def mask_digest(mask):
+    """Huella (hash) de una máscara binaria, usada como clave de caché de bases y matrices."""
+    mask = np.asarray(mask, dtype=bool)
+    digest = hashlib.sha1(np.packbits(mask).tobytes()).hexdigest()
+    return f"{mask.shape[0]}x{mask.shape[1]}:{digest}"
+
+def border_background(images):
+    """
+    Nivel y ruido del fondo medidos en los píxeles del borde.
+
+    Parámetros:
+    - images: imagen (alto, ancho) o bloque de imágenes (n, alto, ancho)
+
+    Retorna:
+    - (mediana, desviación robusta (MAD)), escalares o arrays (n,) para un bloque
+    """
+    images = np.asarray(images)
+    border = np.concatenate([images[..., 0, :], images[..., -1, :],
+                             images[..., 1:-1, 0], images[..., 1:-1, -1]], axis=-1)
+    median = np.median(border, axis=-1)
+    spread = 1.4826 * np.median(np.abs(border - np.expand_dims(median, -1)), axis=-1)
+    return median, spread
 
 def apply_mask(img, mask):
     return img * mask
 
 def calculate_center_of_mass(image):
-    """Calcula el centro de masa de la imagen."""
-    # Normalizar la imagen para el cálculo
-    normalized = image - np.min(image)
-    if np.max(normalized) > 0:
-        normalized = normalized / np.max(normalized)
-
-    # Crear máscaras para los píxeles significativos
-    threshold = 0.1  # Ajusta este valor según sea necesario
-    mask = normalized > threshold
-
-    # Calcular índices de las coordenadas
-    y_indices, x_indices = np.indices(image.shape)
-
-    # Calcular centro de masa solo de los píxeles significativos
-    total_mass = np.sum(normalized[mask])
-    if total_mass > 0:
-        com_y = np.sum(y_indices[mask] * normalized[mask]) / total_mass
-        com_x = np.sum(x_indices[mask] * normalized[mask]) / total_mass
-    else:
-        # Si no hay píxeles significativos, usar el centro geométrico
-        com_y, com_x = np.array(image.shape) // 2
+    """Calcula el centro de masa de la imagen.
+
+    Usa el servicio de centroides de grueso a fino, memorizado por imagen:
+    repetir el cálculo sobre el mismo array no vuelve a recorrerlo.
+    """
+    return cached_center_of_mass(image, threshold=0.1)
+
+def crop_around_center(image, crop_size):
+    """
+    Recorta la imagen a `crop_size` x `crop_size` centrada en su centro de masa.
+
+    Si el recorte se sale de la imagen, el resultado se rellena con ceros.
+    """
+    if image is None:
+        return None
+
+    com_y, com_x = calculate_center_of_mass(image)
+    half_size = crop_size // 2
+    y_start = max(0, com_y - half_size)
+    y_end = min(image.shape[0], com_y + half_size)
+    x_start = max(0, com_x - half_size)
+    x_end = min(image.shape[1], com_x + half_size)
+    cropped = image[y_start:y_end, x_start:x_end]
+
+    if cropped.shape[0] < crop_size or cropped.shape[1] < crop_size:
+        padded = np.zeros((crop_size, crop_size))
+        y_offset = (crop_size - cropped.shape[0]) // 2
+        x_offset = (crop_size - cropped.shape[1]) // 2
+        padded[y_offset:y_offset + cropped.shape[0], x_offset:x_offset + cropped.shape[1]] = cropped
+        return padded
 
-    return int(com_y), int(com_x)
\ No newline at end of file
+    return cropped
@@ -1,10 +1,26 @@
-from .roddier import calculate_wavefront
-from .zernike import fit_zernike
-from .interferometry import calculate_interferogram
-
-__all__ = [
-    'calculate_wavefront',
-    'fit_zernike',
-    'recalculate_wavefront_zernike',
-    'calculate_interferogram'
-]
+from importlib import import_module
+
+# Las exportaciones se importan la primera vez que se usan: así importar un
+# submódulo ligero (p. ej. src.core.fft_plan) no carga todo el pipeline.
+_EXPORTS = {
+    'calculate_wavefront': '.roddier',
+    'reconstruct_zernike': '.roddier',
+    'fit_zernike': '.zernike',
+    'calculate_interferogram': '.interferometry',
+    'estimate_low_order': '.fast_path',
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(import_module(module, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
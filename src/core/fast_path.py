@@ -0,0 +1,235 @@
+# Copyright (c) 2025 Adrián Hernández Padrón
+# Licensed under the MIT License. See LICENSE file in the project root for full license information.
+
+"""
+Estimación rápida de los modos de bajo orden (tilt, defocus, astigmatismo y
+coma) para la colimación en tiempo real.
+
+En lugar de la cadena completa (alineado por correlación, centro de masa,
+ecuación de Poisson y ajuste de 23 modos), la geometría del donut se obtiene
+de sus momentos y el paso de ΔI/I₀ a coeficientes es una única matriz
+precalculada por geometría: la composición de la ecuación de Poisson con el
+ajuste por mínimos cuadrados de los primeros modos. El resultado coincide con
+el método zonal sobre la misma máscara y cuesta un producto matriz-vector.
+"""
+
+from dataclasses import dataclass
+import numpy as np
+from src.common.utils import border_background
+from src.core.fft_plan import plan_fft
+from src.core.modal import cached_reconstructor, clear_modal_cache, zonal_matrix
+from src.core.optical_preprocessing import estimate_defocus_mm
+from src.core.zernike import zernike_polynomials_packed
+from src.common.tracing import traced
+
+# Piston, tilt X/Y, defocus, astigmatismo 45°/0° y coma Y/X
+FAST_PATH_MODES = 8
+
+# Resolución con que se redondean los radios para reutilizar reconstructores (px)
+RADIUS_STEP = 0.5
+
+@dataclass
+class DonutMoments:
+    """Geometría del donut medida sobre la imagen promedio."""
+    center: tuple  # (cx, cy) centro del borde exterior en píxeles de la imagen
+    R_out: float  # radio exterior
+    R_in: float  # radio de la sombra de la obstrucción
+    hole_offset: tuple  # (dx, dy) desplazamiento del centro del hueco respecto al borde exterior
+
+
+@dataclass
+class FastReconstructor:
+    """Matriz ΔI/I₀ -> coeficientes precalculada para una geometría."""
+    matrix: np.ndarray  # (n_modos, n_píxeles de la pupila), sin el factor de calibración
+    mask: np.ndarray  # máscara anular en la ventana
+    base: object  # PackedBasis de los modos sobre la pupila
+    center: tuple  # (cx, cy) centro de la pupila en la ventana
+    R_out: float
+    R_in: float
+
+    @property
+    def size(self):
+        return self.mask.shape[0]
+
+
+@dataclass
+class FastPathResult:
+    """Resultado de la estimación rápida."""
+    zernike_coeffs: np.ndarray  # (FAST_PATH_MODES,) en las unidades de `fit_zernike`
+    moments: DonutMoments
+    dz_mm: float
+    offset: tuple  # (x0, y0) esquina de la ventana analizada en la imagen
+    reconstructor: FastReconstructor
+
+
+def _centroid(image):
+    """Centroide (cx, cy) de la parte positiva de la imagen a partir de sus proyecciones."""
+    weights = np.clip(image, 0, None)
+    rows = weights.sum(axis=1)
+    cols = weights.sum(axis=0)
+    total = rows.sum()
+    if total <= 0:
+        return (image.shape[1] - 1) / 2, (image.shape[0] - 1) / 2
+    return cols @ np.arange(cols.size) / total, rows @ np.arange(rows.size) / total
+
+
+def donut_moments(average, threshold=0.5):
+    """
+    Mide la geometría del donut a partir de los píxeles iluminados.
+
+    El borde exterior se toma de la caja que encierra los píxeles por encima
+    de `threshold` veces el máximo; el radio y el centro de la sombra de la
+    obstrucción, del área y el centroide de los píxeles oscuros del interior.
+    El desplazamiento del hueco respecto al borde exterior es el indicador
+    clásico de coma al colimar.
+
+    Parámetros:
+    - average: imagen promedio (intra + extra) / 2 sin fondo
+    - threshold: fracción del máximo que separa los píxeles iluminados
+
+    Retorna:
+    - DonutMoments
+    """
+    lit = average > threshold * average.max()
+    # Sólo cuentan los píxeles con un vecino iluminado: se ignoran los de ruido sueltos
+    vertical = np.flatnonzero((lit[1:] & lit[:-1]).any(axis=1))
+    horizontal = np.flatnonzero((lit[:, 1:] & lit[:, :-1]).any(axis=0))
+    if vertical.size == 0 or horizontal.size == 0:
+        raise ValueError("No se encuentra el donut en la imagen")
+    rows = (vertical[0], vertical[-1] + 2)
+    cols = (horizontal[0], horizontal[-1] + 2)
+    cx = 0.5 * (cols[0] + cols[1] - 1)
+    cy = 0.5 * (rows[0] + rows[1] - 1)
+    R_out = 0.25 * (cols[1] - cols[0] + rows[1] - rows[0])
+
+    box = lit[rows[0]:rows[1], cols[0]:cols[1]]
+    y, x = np.ogrid[rows[0]:rows[1], cols[0]:cols[1]]
+    # Píxeles oscuros a menos de 3/4 del radio del centro: la sombra de la obstrucción
+    hole = ~box & ((x - cx)**2 + (y - cy)**2 <= (0.75 * R_out)**2)
+    hole_y, hole_x = np.nonzero(hole)
+    R_in = float(np.sqrt(hole_x.size / np.pi))
+    hole_offset = (0.0, 0.0)
+    if hole_x.size:
+        hole_offset = (hole_x.mean() + cols[0] - cx, hole_y.mean() + rows[0] - cy)
+    return DonutMoments((cx, cy), float(R_out), R_in, hole_offset)
+
+
+def build_fast_reconstructor(size, R_out, R_in, fft_shape, max_order=FAST_PATH_MODES, offset=(0.0, 0.0)):
+    """
+    Construye (o recupera de la caché) la matriz de la estimación rápida.
+
+    Es la matriz del método zonal (`zonal_matrix`) para la pupila ideal de
+    la ventana, sin el factor de calibración, que depende del desenfoque
+    medido en cada par.
+
+    Parámetros:
+    - size: lado de la ventana
+    - R_out, R_in: radios de la pupila en píxeles
+    - fft_shape: tamaño de la transformada (ver `plan_fft`)
+    - max_order: número de modos
+    - offset: (dx, dy), 0 o 0.5: la pupila queda centrada en size // 2 + offset
+
+    Retorna:
+    - FastReconstructor
+    """
+    key = ('fast', int(size), float(R_out), float(R_in), tuple(fft_shape), int(max_order), tuple(offset))
+    return cached_reconstructor(key, lambda: _fast_reconstructor(size, R_out, R_in, fft_shape, max_order,
+                                                                 offset))
+
+
+def _fast_reconstructor(size, R_out, R_in, fft_shape, max_order, offset):
+    cx = size // 2 + offset[0]
+    cy = size // 2 + offset[1]
+    y, x = np.indices((size, size))
+    r = np.hypot(x - cx, y - cy)
+    mask = (r >= R_in) & (r <= R_out)
+    # zernike_polynomials_packed desempaqueta el centro como (cy, cx)
+    base = zernike_polynomials_packed(mask.shape, mask, R_out, (cy, cx), max_order)
+    matrix = zonal_matrix(base, np.linalg.pinv(base.values.T), fft_shape)
+    return FastReconstructor(matrix, mask, base, (cx, cy), float(R_out), float(R_in))
+
+
+def clear_fast_path_cache():
+    """Elimina los reconstructores almacenados (la caché es la del método modal)."""
+    clear_modal_cache()
+
+
+def _window(image, x0, y0, size):
+    """Ventana size x size con esquina en (x0, y0), rellena con ceros fuera de la imagen."""
+    height, width = image.shape
+    if x0 >= 0 and y0 >= 0 and x0 + size <= width and y0 + size <= height:
+        return image[y0:y0 + size, x0:x0 + size]
+    window = np.zeros((size, size), dtype=image.dtype)
+    ys, ye = max(0, y0), min(height, y0 + size)
+    xs, xe = max(0, x0), min(width, x0 + size)
+    if ys < ye and xs < xe:
+        window[ys - y0:ye - y0, xs - x0:xe - x0] = image[ys:ye, xs:xe]
+    return window
+
+
+def _round_half(value):
+    """Redondea a medio píxel: los bordes de la caja dan centros enteros o semienteros."""
+    return round(value * 2) / 2
+
+
+def _round_radius(value):
+    return round(value / RADIUS_STEP) * RADIUS_STEP
+
+
+@traced()
+def estimate_low_order(intra, extra, apertura, focal, pixel_scale, threshold=0.5,
+                       wavelength_nm=555, max_order=FAST_PATH_MODES):
+    """
+    Estima los modos de bajo orden de un par intra/extra-focal.
+
+    La imagen extra-focal se alinea con la intra-focal desplazándola el número
+    entero de píxeles que separa sus centroides (como el alineado por
+    correlación de `preprocess_roddier`). La ventana analizada es el recorte
+    de `plan_fft` alrededor del donut, desplazada a píxeles enteros, de modo
+    que la matriz precalculada sólo cambia si cambia el tamaño del donut (o
+    su centro pasa de entero a semientero).
+
+    Parámetros:
+    - intra, extra: imágenes completas o recortes (el extra ya girado)
+    - apertura, focal: en mm
+    - pixel_scale: tamaño efectivo del píxel en µm (con el binning aplicado)
+    - threshold: fracción del máximo que separa los píxeles iluminados
+    - wavelength_nm: longitud de onda en nanómetros
+    - max_order: número de modos estimados
+
+    Retorna:
+    - FastPathResult
+    """
+    intra = np.asarray(intra, dtype=np.float64)
+    extra = np.asarray(extra, dtype=np.float64)
+    intra = intra - border_background(intra)[0]
+    extra = extra - border_background(extra)[0]
+
+    intra_cx, intra_cy = _centroid(intra)
+    extra_cx, extra_cy = _centroid(extra)
+    shift = (int(round(intra_cy - extra_cy)), int(round(intra_cx - extra_cx)))
+    if shift != (0, 0):
+        extra = np.roll(extra, shift, axis=(0, 1))
+
+    average = 0.5 * (intra + extra)
+    moments = donut_moments(average, threshold)
+    R_out = _round_radius(moments.R_out)
+    R_in = _round_radius(moments.R_in)
+    dz_mm = estimate_defocus_mm(moments.R_out, pixel_scale, focal, apertura)
+
+    cx, cy = (_round_half(c) for c in moments.center)
+    fft_plan = plan_fft(R_out)
+    size = fft_plan.crop_size
+    x0 = int(np.floor(cx)) - size // 2
+    y0 = int(np.floor(cy)) - size // 2
+    reconstructor = build_fast_reconstructor(size, R_out, R_in, fft_plan.fft_shape, max_order,
+                                             offset=(cx % 1, cy % 1))
+    index = reconstructor.base.index
+    intra_pupil = _window(intra, x0, y0, size).reshape(-1)[index]
+    extra_pupil = _window(extra, x0, y0, size).reshape(-1)[index]
+    I0 = 0.5 * (intra_pupil + extra_pupil)
+    delta_I_norm = np.divide(extra_pupil - intra_pupil, I0, out=np.zeros_like(I0), where=I0 > 0)
+
+    factor = (wavelength_nm / 1e6 / (4 * np.pi)) * dz_mm
+    coeffs = factor * (reconstructor.matrix @ delta_I_norm)
+    return FastPathResult(coeffs, moments, dz_mm, (x0, y0), reconstructor)
@@ -0,0 +1,108 @@
+# Copyright (c) 2025 Adrián Hernández Padrón
+# Licensed under the MIT License. See LICENSE file in the project root for full license information.
+
+from dataclasses import dataclass
+import numpy as np
+from scipy.fft import fftfreq, next_fast_len, rfftfreq
+
+
+@dataclass(frozen=True)
+class FFTPlan:
+    """Tamaños de recorte y de transformada elegidos para un donut."""
+    radius: float  # radio estimado del donut en píxeles
+    crop_size: int  # lado del recorte alrededor del donut
+    fft_size: int  # lado de la transformada (recorte + relleno con ceros)
+
+    @property
+    def fft_shape(self):
+        return (self.fft_size, self.fft_size)
+
+    def with_crop(self, crop_size, pad_factor=2.0):
+        """Mismo donut con otro recorte (p. ej. elegido en el diálogo del test) y su transformada."""
+        return FFTPlan(self.radius, int(crop_size), next_fast_len(int(np.ceil(crop_size * pad_factor))))
+
+    def describe(self):
+        """Resumen legible de los tamaños elegidos."""
+        return (f"Radio {self.radius:.0f} px, recorte {self.crop_size} px, "
+                f"FFT {self.fft_size} px")
+
+
+def plan_fft(radius, margin=0.25, pad_factor=2.0, min_crop=64):
+    """
+    Elige el recorte y el tamaño de transformada a partir del radio del donut.
+
+    El recorte cubre el diámetro del donut más un margen relativo y se
+    redondea a un tamaño rápido para la FFT (`scipy.fft.next_fast_len`). La
+    transformada se rellena con ceros hasta `pad_factor` veces el recorte,
+    lo que evita el solapamiento periódico en la ecuación de Poisson y
+    muestrea la PSF por encima de Nyquist.
+
+    Parámetros:
+    - radius: radio exterior estimado en píxeles
+    - margin: margen relativo alrededor del diámetro
+    - pad_factor: relación entre la transformada y el recorte
+    - min_crop: tamaño mínimo del recorte
+
+    Retorna:
+    - FFTPlan
+    """
+    crop = max(min_crop, int(np.ceil(2 * radius * (1 + margin))))
+    crop_size = next_fast_len(crop + crop % 2)
+    # next_fast_len puede devolver impares (p. ej. 75): mantener recortes pares
+    while crop_size % 2:
+        crop_size = next_fast_len(crop_size + 1)
+    fft_size = next_fast_len(int(np.ceil(crop_size * pad_factor)))
+    return FFTPlan(float(radius), crop_size, fft_size)
+
+
+def pad_to_shape(image, shape, centered=False):
+    """
+    Rellena con ceros una imagen hasta `shape`.
+
+    Con centered=True la imagen queda en el centro (necesario cuando después
+    se usan fftshift/ifftshift); si no, en la esquina superior izquierda.
+    """
+    h, w = image.shape[-2:]
+    if (h, w) == tuple(shape):
+        return image
+    if h > shape[0] or w > shape[1]:
+        raise ValueError(f"La imagen {image.shape} no cabe en la transformada {shape}")
+    padded = np.zeros(image.shape[:-2] + tuple(shape), dtype=image.dtype)
+    y0 = (shape[0] - h) // 2 if centered else 0
+    x0 = (shape[1] - w) // 2 if centered else 0
+    padded[..., y0:y0 + h, x0:x0 + w] = image
+    return padded
+
+
+def squared_frequencies(fft_shape, real=False):
+    """
+    Frecuencia espacial al cuadrado (ciclos/píxel) de cada término de la transformada.
+
+    Parámetros:
+    - fft_shape: tamaño de la transformada
+    - real: True para el semiespectro de `rfft2`
+
+    Retorna:
+    - array (alto, ancho) o (alto, ancho // 2 + 1)
+    """
+    freq_y = fftfreq(fft_shape[0])
+    freq_x = rfftfreq(fft_shape[1]) if real else fftfreq(fft_shape[1])
+    return freq_x[np.newaxis, :]**2 + freq_y[:, np.newaxis]**2
+
+
+def inverse_laplacian(fft_shape, real=False):
+    """
+    Filtro 1/f² con que se resuelve la ecuación de Poisson en el espectro.
+
+    Es el que aplican `calculate_wavefront` y todos los reconstructores
+    derivados de él; la frecuencia nula (el pistón) se anula.
+
+    Parámetros:
+    - fft_shape: tamaño de la transformada
+    - real: True para el semiespectro de `rfft2`
+
+    Retorna:
+    - array con la forma de `squared_frequencies`
+    """
+    freq_squared = squared_frequencies(fft_shape, real)
+    return np.divide(1.0, freq_squared, out=np.zeros_like(freq_squared), where=freq_squared > 1e-8)
@@ -1,7 +1,9 @@
 # Copyright (c) 2025 Adrián Hernández Padrón
 # Licensed under the MIT License. See LICENSE file in the project root for full license information.
 import numpy as np
+from src.common.tracing import traced
 
+@traced()
 def calculate_interferogram(wavefront, reference_frequency, reference_intensity, annular_mask):
     """
     Calcula interferograma simulando exactamente la metodología de WinRoddier 3.0.
@@ -0,0 +1,161 @@
+# Copyright (c) 2025 Adrián Hernández Padrón
+# Licensed under the MIT License. See LICENSE file in the project root for full license information.
+
+from collections import OrderedDict
+from dataclasses import dataclass
+import threading
+import numpy as np
+from scipy.fft import irfft2, rfft2
+from src.common.utils import mask_digest
+from src.core.fft_plan import inverse_laplacian
+from src.core.zernike import PackedBasis, annular_zernike_basis, zernike_polynomials_packed
+from src.common.tracing import traced
+
+# Número de reconstructores (geometrías) que se mantienen en memoria, entre
+# los modales y los de la estimación rápida (`src.core.fast_path`)
+MAX_CACHED_RECONSTRUCTORS = 8
+
+# Modos que se transforman a la vez al construir la matriz
+MODES_PER_BATCH = 8
+
+_reconstructors = OrderedDict()
+_reconstructors_lock = threading.Lock()
+
+
+@dataclass
+class ModalReconstructor:
+    """Reconstructor modal precalculado para una geometría y un desenfoque."""
+    matrix: np.ndarray  # (n_modos, n_píxeles de la pupila): Poisson y ajuste compuestos (`zonal_matrix`)
+    mask: np.ndarray  # máscara anular usada
+    base: PackedBasis  # base de Zernike sobre los píxeles de la pupila
+
+    def solve(self, delta_I_norm):
+        """Coeficientes de Zernike a partir de ΔI/I₀ con un único producto matriz-vector."""
+        return self.matrix @ self.base.sample(delta_I_norm)
+
+
+def cached_reconstructor(key, build):
+    """
+    Reconstructor de la caché compartida (LRU) o, si no está, el que construye `build()`.
+
+    Parámetros:
+    - key: clave hashable de la geometría
+    - build: función sin argumentos que construye el reconstructor
+
+    Retorna:
+    - el reconstructor almacenado o recién construido
+    """
+    with _reconstructors_lock:
+        reconstructor = _reconstructors.get(key)
+        if reconstructor is not None:
+            _reconstructors.move_to_end(key)
+            return reconstructor
+
+    reconstructor = build()
+    with _reconstructors_lock:
+        _reconstructors[key] = reconstructor
+        if len(_reconstructors) > MAX_CACHED_RECONSTRUCTORS:
+            _reconstructors.popitem(last=False)
+    return reconstructor
+
+
+def _calibration_factor(wavelength_nm, dz_mm):
+    if dz_mm is None:
+        return 1.0
+    return (wavelength_nm / 1e6 / (4 * np.pi)) * dz_mm
+
+
+def zonal_matrix(base, projection, fft_shape=None):
+    """
+    Matriz ΔI/I₀ -> coeficientes equivalente al método zonal, sin el factor de calibración.
+
+    El método zonal calcula W = factor · G(ΔI/I₀) en la pupila, con G el
+    inverso espectral del laplaciano (`inverse_laplacian`), y ajusta W con la
+    proyección P de la base. ΔI/I₀ llega enmascarado a la pupila
+    (`roddier_signal`), así que la matriz es P·G restringida a la pupila por
+    ambos lados. Como G es simétrico, cada fila se obtiene aplicando G a la
+    fila de P correspondiente: basta una transformada por modo.
+
+    Parámetros:
+    - base: PackedBasis de los modos sobre la pupila
+    - projection: (n_modos, n_píxeles de la pupila) que lleva W a los coeficientes
+    - fft_shape: tamaño de la transformada usado por el método zonal
+
+    Retorna:
+    - array (n_modos, n_píxeles de la pupila)
+    """
+    n_modes, height, width = base.shape
+    if fft_shape is None:
+        fft_shape = (height, width)
+    fft_shape = tuple(fft_shape)
+    laplacian = inverse_laplacian(fft_shape, real=True)
+    matrix = np.empty((n_modes, base.index.size))
+    for start in range(0, n_modes, MODES_PER_BATCH):
+        stop = min(n_modes, start + MODES_PER_BATCH)
+        rows = base.scatter(projection[start:stop]).reshape(stop - start, height, width)
+        smoothed = irfft2(rfft2(rows, s=fft_shape) * laplacian, s=fft_shape)[:, :height, :width]
+        matrix[start:stop] = smoothed.reshape(stop - start, -1)[:, base.index]
+    return matrix
+
+
+@traced()
+def build_modal_reconstructor(annular_mask, R_out, center, dz_mm=None, wavelength_nm=555,
+                              max_order=23, fft_shape=None, orthonormal=False):
+    """
+    Construye (o recupera de la caché) el reconstructor modal de una geometría.
+
+    Parámetros:
+    - annular_mask: máscara binaria anular de la pupila
+    - R_out: radio exterior de la pupila
+    - center: centro de la pupila, con el mismo convenio que `fit_zernike`
+    - dz_mm: distancia de desenfoque en milímetros
+    - wavelength_nm: longitud de onda en nanómetros
+    - max_order: número de modos de Zernike
+    - fft_shape: tamaño de la transformada usado por el método zonal equivalente
+    - orthonormal: usar la base anular ortonormal en lugar de los Zernike circulares
+
+    Retorna:
+    - ModalReconstructor
+    """
+    mask = np.asarray(annular_mask, dtype=bool)
+    key = ('modal', mask_digest(mask), float(R_out), tuple(float(c) for c in center),
+           None if dz_mm is None else float(dz_mm), float(wavelength_nm), int(max_order),
+           None if fft_shape is None else tuple(fft_shape), bool(orthonormal))
+    return cached_reconstructor(key, lambda: _modal_reconstructor(mask, R_out, center, dz_mm, wavelength_nm,
+                                                                  max_order, fft_shape, orthonormal))
+
+
+def _modal_reconstructor(mask, R_out, center, dz_mm, wavelength_nm, max_order, fft_shape, orthonormal):
+    if orthonormal:
+        base, _ = annular_zernike_basis(mask.shape, mask, R_out, center, max_order)
+        projection = base.values / base.index.size
+    else:
+        base = zernike_polynomials_packed(mask.shape, mask, R_out, center, max_order)
+        projection = np.linalg.pinv(base.values.T)
+    matrix = _calibration_factor(wavelength_nm, dz_mm) * zonal_matrix(base, projection, fft_shape)
+    return ModalReconstructor(matrix, mask, base)
+
+
+@traced()
+def fit_zernike_modal(delta_I_norm, annular_mask, R_out, center, dz_mm=None, wavelength_nm=555,
+                      max_order=23, fft_shape=None, orthonormal=False):
+    """
+    Coeficientes de Zernike directamente desde ΔI/I₀, sin resolver la ecuación de Poisson.
+
+    Equivale a `calculate_wavefront` seguido de `fit_zernike` sobre ΔI/I₀
+    enmascarado a la pupila, como lo deja `roddier_signal` (fuera de ella se
+    ignora): ambos pasos se componen en una matriz por geometría y, tras la
+    primera llamada, cuesta un producto matriz-vector.
+
+    Retorna:
+    - tuple: (coeficientes, base como PackedBasis)
+    """
+    reconstructor = build_modal_reconstructor(annular_mask, R_out, center, dz_mm, wavelength_nm,
+                                              max_order, fft_shape, orthonormal)
+    return reconstructor.solve(delta_I_norm), reconstructor.base
+
+
+def clear_modal_cache():
+    """Elimina los reconstructores almacenados (también los de la estimación rápida)."""
+    with _reconstructors_lock:
+        _reconstructors.clear()
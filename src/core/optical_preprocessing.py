@@ -2,7 +2,9 @@ from scipy.signal import fftconvolve
 from scipy.ndimage import  shift
 from src.common.utils import apply_mask, find_center
 import numpy as np
+from src.common.tracing import traced
 
+@traced()
 def align_images(intra_img, extra_img):
     corr = fftconvolve(intra_img, extra_img[::-1, ::-1], mode='same')
     max_corr_pos = np.array(np.unravel_index(np.argmax(corr), corr.shape))
@@ -23,6 +25,7 @@ def generate_perfect_annular_mask(cx, cy, R_in, R_out, img):
     return (r >= R_in) & (r <= R_out)
 
 
+@traced()
 def estimate_radii(img, cx, cy, threshold=0.5):
     max_val = img.max()
     mask = img > (threshold * max_val)
@@ -53,17 +56,28 @@ def estimate_defocus_mm(r_px, pixel_size_um, focal_length_mm, aperture_mm):
     dz_mm = (r_px * pixel_size_mm) / np.tan(theta)
     return dz_mm
 
+@traced()
 def preprocess_roddier(intra_image, extra_image, apertura=900, focal=7200,
                           pixel_scale=15, threshold=0.5):
 
     extra_aligned, _ = align_images(intra_image, extra_image)
-    intra_aligned = intra_image
+    return roddier_signal(intra_image, extra_aligned, apertura, focal, pixel_scale, threshold)
+
+
+@traced()
+def roddier_signal(intra_aligned, extra_aligned, apertura=900, focal=7200, pixel_scale=15, threshold=0.5):
+    """
+    Geometría de la pupila y ΔI/I₀ de un par ya alineado (segunda parte de `preprocess_roddier`).
+
+    Retorna:
+    - (delta_I_norm, annular_mask, (cx, cy), R_out, dz_mm)
+    """
     # Normalizar imágenes entre 0 y 1 (ambas con los mismos límites)
     img_avg = 0.5 * (intra_aligned + extra_aligned)
     cx, cy = find_center(img_avg)
     R_out, R_in = estimate_radii(img_avg, cx, cy, threshold=threshold)
     dz_mm = estimate_defocus_mm(R_out, pixel_scale, focal, apertura)
-    annular_mask = generate_perfect_annular_mask(cx, cy, R_in, R_out, intra_image)
+    annular_mask = generate_perfect_annular_mask(cx, cy, R_in, R_out, intra_aligned)
     intra_masked = apply_mask(intra_aligned, annular_mask)
     extra_masked = apply_mask(extra_aligned, annular_mask)
     delta_I = extra_masked.astype(np.float64) - intra_masked.astype(np.float64)
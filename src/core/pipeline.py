@@ -0,0 +1,269 @@
+# Copyright (c) 2025 Adrián Hernández Padrón
+# Licensed under the MIT License. See LICENSE file in the project root for full license information.
+
+"""
+Ejecución completa del test de Roddier sobre un par de imágenes, sin interfaz.
+
+La usan tanto la ventana principal (tras aceptar el diálogo del test) como
+el modo en vivo, que repite el análisis con los parámetros del último test
+sobre cada par nuevo. `run_fast_path` es la alternativa de baja latencia del
+modo en vivo: sólo los modos de bajo orden (ver `src.core.fast_path`).
+
+El test se expresa como un grafo de etapas (`RoddierGraph`) con resultados
+memorizados: al repetirlo con otros parámetros, en la interfaz o en un
+barrido desde un script, sólo se recalculan las etapas que dependen de los
+parámetros cambiados.
+"""
+
+from dataclasses import dataclass
+import numpy as np
+from src.common.graph import Stage, StageGraph
+from src.common.tracing import span
+from src.common.utils import crop_around_center
+from src.core.fast_path import estimate_low_order
+from src.core.fft_plan import plan_fft
+from src.core.optical_preprocessing import align_images, roddier_signal
+from src.core.roddier import fit_wavefront, solve_wavefront
+from src.core.wavefront import LazyWavefront
+from src.core.zernike import annular_zernike_basis, zernike_polynomials_packed
+
+
+@dataclass
+class RoddierSettings:
+    """Parámetros de un test de Roddier, tal y como los devuelve el diálogo del test."""
+    telescope_params: dict  # apertura y focal en mm, tamano_pixel en µm (sin binning)
+    roddier_params: dict  # max_order, threshold, solver, annular_basis, uncertainty_replicas, gain
+    interferogram_params: dict = None
+    crop_size: int = None  # lado del recorte alrededor del centro de masa
+    fft_shape: tuple = None  # forma de la FFT del solver (ver `plan_fft`)
+    binning: int = 1  # binning aplicado al cargar las imágenes
+
+
+@dataclass
+class RoddierResult:
+    """Resultado de un test de Roddier."""
+    zernike_coeffs: np.ndarray
+    zernike_base: object  # PackedBasis sobre la pupila del recorte
+    annular_mask: np.ndarray
+    center: tuple  # (cx, cy) centro de la pupila en el recorte
+    R_out: float
+    dz_mm: float
+    wavefront: LazyWavefront
+    fft_shape: tuple = None
+    coeff_errors: np.ndarray = None  # error típico de cada coeficiente (ver `src.core.uncertainty`)
+
+
+def _crop(intra_image, extra_image, crop_size):
+    if crop_size:
+        intra_image = crop_around_center(intra_image, crop_size)
+        extra_image = crop_around_center(extra_image, crop_size)
+    return {'intra': intra_image, 'extra': extra_image}
+
+
+def _align(crop):
+    return {'extra': align_images(crop['intra'], crop['extra'])[0]}
+
+
+def _preprocess(crop, align, threshold, apertura, focal, pixel_scale):
+    delta_I_norm, annular_mask, center, R_out, dz_mm = roddier_signal(
+        crop['intra'], align['extra'], apertura=apertura, focal=focal, pixel_scale=pixel_scale,
+        threshold=threshold)
+    return {'delta_I_norm': delta_I_norm, 'annular_mask': annular_mask, 'center': np.asarray(center),
+            'R_out': R_out, 'dz_mm': dz_mm}
+
+
+def _geometry(preprocess):
+    """Máscara, R_out, centro y desenfoque de la etapa de preprocesado (también leída de la caché)."""
+    return (preprocess['annular_mask'], float(preprocess['R_out']),
+            tuple(float(c) for c in preprocess['center']), float(preprocess['dz_mm']))
+
+
+def _wavefront(preprocess, solver, fft_shape):
+    annular_mask, _, _, dz_mm = _geometry(preprocess)
+    return {'wavefront': solve_wavefront(preprocess['delta_I_norm'], annular_mask, dz_mm, solver,
+                                         fft_shape=fft_shape)}
+
+
+def _reconstruct(preprocess, wavefront, solver, max_order, fft_shape, annular_basis):
+    annular_mask, R_out, center, dz_mm = _geometry(preprocess)
+    coeffs, base = fit_wavefront(wavefront['wavefront'], preprocess['delta_I_norm'], annular_mask, R_out,
+                                 center, dz_mm, max_order, solver, fft_shape=fft_shape,
+                                 orthonormal=annular_basis)
+    # La base no se guarda en disco: con los coeficientes de la caché se evalúa de nuevo
+    return {'zernike_coeffs': coeffs, 'zernike_base': base}
+
+
+def _uncertainty(crop, align, preprocess, solver, max_order, fft_shape, annular_basis,
+                 uncertainty_replicas, gain):
+    from src.core.uncertainty import (ITERATIVE_REPLICAS_PER_BATCH, REPLICAS_PER_BATCH, build_batch_solver,
+                                      coefficient_uncertainty, delta_noise)
+    annular_mask, R_out, center, dz_mm = _geometry(preprocess)
+    batch_solver = build_batch_solver(annular_mask, R_out, center, dz_mm, max_order=max_order, solver=solver,
+                                      fft_shape=fft_shape, orthonormal=annular_basis,
+                                      delta_I_norm=preprocess['delta_I_norm'])
+    noise = delta_noise(crop['intra'], align['extra'], annular_mask, gain, aligned=True)
+    replicas_per_batch = ITERATIVE_REPLICAS_PER_BATCH if solver == 'iterative' else REPLICAS_PER_BATCH
+    stats = coefficient_uncertainty(noise, batch_solver, uncertainty_replicas,
+                                    replicas_per_batch=replicas_per_batch)
+    return {'coeff_errors': stats.std()}
+
+
+def _basis(preprocess, reconstruct, max_order, annular_basis):
+    annular_mask, R_out, center, _ = _geometry(preprocess)
+    transform = None
+    if annular_basis:
+        base, transform = annular_zernike_basis(annular_mask.shape, annular_mask, R_out, center, max_order)
+    else:
+        base = reconstruct.get('zernike_base')
+        if base is None:
+            base = zernike_polynomials_packed(annular_mask.shape, annular_mask, R_out, center, max_order)
+    return {'zernike_base': base, 'transform': transform}
+
+
+# Etapas del test: recorte → alineado → máscara, radios y ΔI/I₀ → frente de onda →
+# ajuste de Zernike → errores y base. La PSF y el interferograma dependen de los
+# modos que se elijan en la ventana de resultados, que los calcula. Las etapas
+# costosas y reutilizables entre sesiones se guardan en la caché en disco
+RODDIER_STAGES = (
+    Stage('crop', _crop, params=('intra_image', 'extra_image', 'crop_size')),
+    Stage('align', _align, ('crop',), persist=('extra',)),
+    Stage('preprocess', _preprocess, ('crop', 'align'), ('threshold', 'apertura', 'focal', 'pixel_scale'),
+          persist=('delta_I_norm', 'annular_mask', 'center', 'R_out', 'dz_mm')),
+    Stage('wavefront', _wavefront, ('preprocess',), ('solver', 'fft_shape')),
+    Stage('reconstruct', _reconstruct, ('preprocess', 'wavefront'),
+          ('solver', 'max_order', 'fft_shape', 'annular_basis'), persist=('zernike_coeffs',)),
+    Stage('uncertainty', _uncertainty, ('crop', 'align', 'preprocess'),
+          ('solver', 'max_order', 'fft_shape', 'annular_basis', 'uncertainty_replicas', 'gain'),
+          persist=('coeff_errors',)),
+    Stage('basis', _basis, ('preprocess', 'reconstruct'), ('max_order', 'annular_basis')),
+)
+
+
+def settings_params(settings):
+    """Parámetros del grafo del test a partir de unos RoddierSettings."""
+    telescope_params = settings.telescope_params
+    roddier_params = settings.roddier_params
+    return {
+        'crop_size': settings.crop_size,
+        'threshold': roddier_params['threshold'],
+        'apertura': telescope_params['apertura'],
+        'focal': telescope_params['focal'],
+        # Tamaño efectivo del píxel tras el binning aplicado al cargar
+        'pixel_scale': telescope_params['tamano_pixel'] * settings.binning,
+        'solver': roddier_params.get('solver', 'zonal'),
+        'fft_shape': None if settings.fft_shape is None else tuple(settings.fft_shape),
+        'max_order': roddier_params['max_order'],
+        'annular_basis': roddier_params.get('annular_basis', False),
+        'uncertainty_replicas': roddier_params.get('uncertainty_replicas', 0),
+        'gain': roddier_params.get('gain', 1.0),
+    }
+
+
+class RoddierGraph(StageGraph):
+    """
+    Test de Roddier como grafo de etapas (ver `src.common.graph`).
+
+    Se conserva entre ejecuciones sobre el mismo par: al cambiar p. ej. el
+    umbral o el número de modos sólo se recalculan las etapas afectadas.
+    """
+
+    def __init__(self, cache=None):
+        super().__init__(RODDIER_STAGES, cache)
+        self.cropped = False  # el par actual se fijó ya recortado (`set_cropped`)
+
+    def configure(self, settings, intra=None, extra=None):
+        """
+        Fija los parámetros de unos RoddierSettings y, opcionalmente, el par de
+        imágenes completas (se recortan con `settings.crop_size`).
+
+        Con un par ya recortado (`set_cropped`) y sin imágenes nuevas,
+        `settings.crop_size` no se aplica: el recorte ya está hecho y
+        cambiarlo invalidaría todo el grafo en cada repetición.
+
+        Retorna:
+        - conjunto con las etapas invalidadas
+        """
+        params = settings_params(settings)
+        if intra is not None:
+            params.update(intra_image=intra, extra_image=extra)
+            self.cropped = False
+        elif self.cropped:
+            del params['crop_size']
+        return self.set(**params)
+
+    def set_cropped(self, cropped_intra, cropped_extra):
+        """Fija un par ya recortado (el extra ya girado)."""
+        self.cropped = True
+        return self.set(intra_image=cropped_intra, extra_image=cropped_extra, crop_size=None)
+
+    def result(self):
+        """Evalúa las etapas necesarias y retorna el RoddierResult."""
+        # Las dos primeras etapas forman el preprocesado (`preprocess_roddier`) de las trazas
+        with span('preprocess_roddier'):
+            preprocess = self.get('preprocess')
+        annular_mask, R_out, center, dz_mm = _geometry(preprocess)
+        zernike_coeffs = self.get('reconstruct')['zernike_coeffs']
+        basis = self.get('basis')
+        wavefront = LazyWavefront.from_mask(zernike_coeffs, annular_mask, R_out, center,
+                                            transform=basis['transform'])
+        result = RoddierResult(zernike_coeffs, basis['zernike_base'], annular_mask, center, R_out, dz_mm,
+                               wavefront, self.params['fft_shape'])
+        if self.params['uncertainty_replicas']:
+            result.coeff_errors = self.get('uncertainty')['coeff_errors']
+        return result
+
+
+def run_roddier(cropped_intra, cropped_extra, settings, cache=None):
+    """
+    Preprocesa un par de recortes, reconstruye el frente de onda y ajusta Zernike.
+
+    Para repetir el test con otros parámetros reutilizando lo ya calculado,
+    usar un `RoddierGraph`.
+
+    Parámetros:
+    - cropped_intra, cropped_extra: recortes intra y extra-focal (el extra ya girado)
+    - settings: RoddierSettings
+    - cache: ResultCache opcional (ver `src.common.cache`). Cada etapa
+      (alineado, ΔI/I₀ y geometría, coeficientes, errores) se guarda con una
+      clave de sus datos y parámetros, de modo que al repetir el test sólo
+      se recalculan las etapas cuyos parámetros han cambiado
+
+    Retorna:
+    - RoddierResult
+    """
+    graph = RoddierGraph(cache)
+    graph.configure(settings)
+    graph.set_cropped(cropped_intra, cropped_extra)
+    return graph.result()
+
+
+def run_roddier_pair(intra, extra, settings):
+    """Recorta un par completo alrededor de cada donut (`settings.crop_size`) y ejecuta el test."""
+    graph = RoddierGraph()
+    graph.configure(settings, intra, extra)
+    return graph.result()
+
+
+def run_fast_path(intra, extra, settings):
+    """
+    Estima sólo tilt, defocus, astigmatismo y coma de un par (ver `estimate_low_order`).
+
+    No necesita recorte previo: la ventana se elige alrededor del donut.
+
+    Retorna:
+    - RoddierResult con los 8 primeros modos sobre la ventana analizada
+    """
+    telescope_params = settings.telescope_params
+    fast = estimate_low_order(
+        intra,
+        extra,
+        apertura=telescope_params['apertura'],
+        focal=telescope_params['focal'],
+        pixel_scale=telescope_params['tamano_pixel'] * settings.binning,
+        threshold=settings.roddier_params.get('threshold', 0.5)
+    )
+    reconstructor = fast.reconstructor
+    wavefront = LazyWavefront.from_mask(fast.zernike_coeffs, reconstructor.mask, reconstructor.R_out,
+                                        reconstructor.center)
+    return RoddierResult(fast.zernike_coeffs, reconstructor.base, reconstructor.mask, reconstructor.center,
+                         reconstructor.R_out, fast.dz_mm, wavefront, plan_fft(reconstructor.R_out).fft_shape)
@@ -0,0 +1,95 @@
+# Copyright (c) 2025 Adrián Hernández Padrón
+# Licensed under the MIT License. See LICENSE file in the project root for full license information.
+
+"""
+Vista previa del test de Roddier sobre un proxy de baja resolución.
+
+Mientras se eligen el umbral y el recorte en el diálogo del test, el análisis
+se repite sobre los recortes binneados 2-4x (unos 128 px de lado) y sólo con
+los modos de bajo orden, lo que cuesta unas decenas de milisegundos. El
+proxy tiene su propio `RoddierGraph`: al cambiar sólo el umbral se reutiliza
+su alineado. El test a resolución completa se ejecuta al aceptar el diálogo.
+"""
+
+from dataclasses import dataclass
+import time
+import numpy as np
+from scipy.fft import next_fast_len
+from src.common.utils import bin_image
+from src.core.fast_path import FAST_PATH_MODES
+from src.core.pipeline import RoddierGraph, RoddierSettings
+from src.core.wavefront import LazyWavefront
+
+# Lado aproximado del proxy en píxeles
+PREVIEW_SIZE = 128
+
+# Parámetros del telescopio cuando aún no se han introducido: la geometría es
+# correcta pero el frente de onda queda en unidades arbitrarias
+PLACEHOLDER_TELESCOPE = {'apertura': 100.0, 'focal': 1000.0, 'tamano_pixel': 1.0}
+
+
+def proxy_factor(crop_size, target=PREVIEW_SIZE):
+    """Factor de binning (2-4) que deja el recorte cerca de `target` píxeles."""
+    return int(np.clip(np.ceil(crop_size / target), 2, 4))
+
+
+@dataclass
+class Preview:
+    """Resultado de la vista previa; la geometría en píxeles del proxy."""
+    factor: int  # binning del proxy respecto al recorte
+    image: np.ndarray  # media de los dos recortes binneados
+    annular_mask: np.ndarray
+    center: tuple  # (cx, cy)
+    R_out: float
+    R_in: float  # radio interior de la máscara
+    zernike_coeffs: np.ndarray  # modos de bajo orden, en la escala del recorte completo
+    wavefront: LazyWavefront
+    calibrated: bool  # False si el frente de onda está en unidades arbitrarias
+    elapsed: float  # segundos
+
+    @property
+    def rms(self):
+        """RMS del frente de onda sin pistón, tilt ni defocus (astigmatismo y coma)."""
+        return float(np.sqrt(np.sum(np.asarray(self.zernike_coeffs)[4:]**2)))
+
+
+class PreviewRunner:
+    """Repite la vista previa al cambiar los recortes, el umbral o el telescopio."""
+
+    def __init__(self, target=PREVIEW_SIZE):
+        self.target = target
+        self.graph = RoddierGraph()
+
+    def update(self, cropped_intra, cropped_extra, threshold, telescope_params=None):
+        """
+        Parámetros:
+        - cropped_intra, cropped_extra: recortes a resolución completa
+        - threshold: umbral de la máscara
+        - telescope_params: apertura, focal y tamano_pixel (None si no son válidos)
+
+        Retorna:
+        - Preview
+        """
+        start = time.perf_counter()
+        factor = proxy_factor(max(np.shape(cropped_intra)), self.target)
+        intra = bin_image(np.asarray(cropped_intra), factor, method='mean')
+        extra = bin_image(np.asarray(cropped_extra), factor, method='mean')
+
+        calibrated = telescope_params is not None
+        telescope = dict(telescope_params if calibrated else PLACEHOLDER_TELESCOPE)
+        # El píxel del proxy agrupa factor x factor píxeles del recorte
+        telescope['tamano_pixel'] *= factor
+        side = next_fast_len(2 * max(intra.shape))
+        self.graph.configure(RoddierSettings(
+            telescope_params=telescope,
+            roddier_params={'max_order': FAST_PATH_MODES, 'threshold': threshold, 'solver': 'zonal'},
+            fft_shape=(side, side)))
+        self.graph.set_cropped(intra, extra)
+        result = self.graph.result()
+
+        # La ecuación de Poisson se resuelve en píxeles: con píxeles factor veces
+        # mayores el frente de onda sale factor² veces menor que en el recorte
+        coeffs = result.zernike_coeffs * factor**2
+        wavefront = LazyWavefront.from_mask(coeffs, result.annular_mask, result.R_out, result.center)
+        return Preview(factor, 0.5 * (intra + extra), result.annular_mask, result.center, result.R_out,
+                       wavefront.R_in, coeffs, wavefront, calibrated, time.perf_counter() - start)
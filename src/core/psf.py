@@ -1,11 +1,22 @@
 # Copyright (c) 2025 Adrián Hernández Padrón
 # Licensed under the MIT License. See LICENSE file in the project root for full license information.
 import numpy as np
+from src.core.fft_plan import pad_to_shape
+from src.common.tracing import traced
 
-def calculate_psf(wavefront, pupila_mask, wavelength = 556):
+@traced()
+def calculate_psf(wavefront, pupila_mask, wavelength = 556, fft_shape=None):
+    """
+    Calcula la PSF a partir del frente de onda y la pupila.
+
+    Con `fft_shape` (ver `plan_fft`) la pupila se centra en una transformada
+    mayor rellena con ceros, lo que muestrea la PSF más finamente.
+    """
     rad =  (2 * np.pi / wavelength)
     fase_W = 2 * np.pi * wavefront * rad
     pupil_function = pupila_mask * np.exp(1j * fase_W)
+    if fft_shape is not None:
+        pupil_function = pad_to_shape(pupil_function, fft_shape, centered=True)
     E_focal = np.fft.fftshift(np.fft.fft2(np.fft.ifftshift(pupil_function)))
     PSF = np.abs(E_focal)**2
     PSF /= PSF.max()
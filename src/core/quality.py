@@ -0,0 +1,253 @@
+# Copyright (c) 2025 Adrián Hernández Padrón
+# Licensed under the MIT License. See LICENSE file in the project root for full license information.
+
+"""
+Puntuación de la calidad de cada fotograma de un vídeo para seleccionar los
+mejores (lucky imaging) antes de apilar y reconstruir.
+
+Las medidas se calculan por bloques sobre los fotogramas submuestreados (como
+el registro de `src.core.stacking`), salvo la saturación, que se cuenta a
+resolución completa:
+
+- saturation: fracción de píxeles del donut en el valor máximo del sensor
+  (fuera del donut, p. ej. los píxeles calientes, no cuentan);
+- snr: nivel medio del donut sobre el fondo dividido por el ruido del fondo;
+- sharpness: caída más pronunciada del perfil radial normalizado (el borde
+  del anillo se suaviza con el mal seeing);
+- circularity: relación entre los ejes menor y mayor del donut (momentos de
+  segundo orden), que detecta fotogramas movidos o deformados;
+- jitter: distancia del centroide a la mediana de todos los centroides.
+"""
+
+import csv
+from dataclasses import dataclass, fields
+import numpy as np
+from src.core.stacking import REGISTRATION_SIZE, REGISTRATION_THRESHOLD, chunk_frames_for
+from src.common.tracing import traced
+from src.common.utils import border_background
+
+# Fracción del máximo que separa los píxeles del donut del fondo
+DONUT_THRESHOLD = 0.5
+
+# Fracción de fotogramas que se conserva por defecto al seleccionar
+KEEP_FRACTION = 0.5
+
+# Desviaciones (MAD) del jitter a partir de las que se rechaza un fotograma
+JITTER_MAD_LIMIT = 5.0
+
+
+@dataclass
+class FrameScore:
+    """Medidas de calidad de un fotograma."""
+    index: int
+    saturation: float
+    snr: float
+    sharpness: float
+    circularity: float
+    cx: float
+    cy: float
+    jitter: float = 0.0
+    score: float = 0.0  # sharpness * circularity: criterio de ordenación
+    rank: int = -1  # posición entre los fotogramas aceptados (0 = el mejor)
+    selected: bool = False
+    reason: str = ''  # motivo del rechazo
+
+
+def _radial_sharpness(weights, cx, cy, lit):
+    """Caída máxima por píxel del perfil radial de un fotograma, relativa a su máximo."""
+    y, x = np.indices(weights.shape)
+    radius = np.hypot(x - cx, y - cy).astype(int).ravel()
+    inside = lit.ravel() | (radius <= radius[lit.ravel()].max(initial=0) + 2)
+    sums = np.bincount(radius[inside], weights=weights.ravel()[inside])
+    counts = np.bincount(radius[inside])
+    profile = np.divide(sums, counts, out=np.zeros_like(sums), where=counts > 0)
+    if profile.size < 2 or profile.max() <= 0:
+        return 0.0
+    return float(max(0.0, -np.diff(profile).min()) / profile.max())
+
+
+def score_frames(frames, saturation_level=None, first_index=0, size=REGISTRATION_SIZE):
+    """
+    Puntúa un bloque de fotogramas (n, alto, ancho).
+
+    Parámetros:
+    - saturation_level: valor de un píxel saturado; None si no se conoce
+    - first_index: índice del primer fotograma del bloque en el vídeo
+    - size: lado aproximado de los fotogramas submuestreados
+
+    Retorna:
+    - lista de FrameScore (sin jitter, que depende de todo el vídeo)
+    """
+    n = frames.shape[0]
+    factor = max(1, min(frames.shape[1:]) // size)
+    small = frames[:, ::factor, ::factor]
+    h, w = small.shape[1:]
+    y, x = np.indices((h, w))
+
+    background, noise = border_background(small)
+    weights = small - background[:, np.newaxis, np.newaxis]
+    # Máximo de los pares de píxeles vecinos: un píxel caliente aislado no fija el nivel
+    peak = np.minimum(weights[:, :, 1:], weights[:, :, :-1]).max(axis=(1, 2))
+
+    lit = weights > DONUT_THRESHOLD * peak[:, np.newaxis, np.newaxis]
+    # Sólo son del donut los píxeles iluminados con algún vecino iluminado
+    neighbour = np.zeros_like(lit)
+    neighbour[:, 1:] |= lit[:, :-1]
+    neighbour[:, :-1] |= lit[:, 1:]
+    neighbour[:, :, 1:] |= lit[:, :, :-1]
+    neighbour[:, :, :-1] |= lit[:, :, 1:]
+    lit &= neighbour
+    lit_count = np.count_nonzero(lit, axis=(1, 2))
+    signal = np.sum(weights, axis=(1, 2), where=lit) / np.maximum(lit_count, 1)
+    snr = np.divide(signal, noise, out=np.full(n, np.inf), where=noise > 0)
+
+    if saturation_level is not None:
+        # Sólo cuentan los píxeles del donut: los calientes y el fondo no lo saturan
+        height, width = frames.shape[1:]
+        donut = np.repeat(np.repeat(lit, factor, axis=1), factor, axis=2)[:, :height, :width]
+        saturated = np.count_nonzero((frames >= saturation_level) & donut, axis=(1, 2))
+        saturation = saturated / np.maximum(lit_count * factor**2, 1)
+    else:
+        saturation = np.zeros(n)
+
+    # Centroide con el mismo criterio que el registro
+    centroid_weights = np.where(weights > REGISTRATION_THRESHOLD * peak[:, np.newaxis, np.newaxis], weights, 0.0)
+    total = centroid_weights.sum(axis=(1, 2))
+    total[total <= 0] = np.nan
+    cx = np.einsum('ijk,k->i', centroid_weights, np.arange(w, dtype=float)) / total
+    cy = np.einsum('ijk,j->i', centroid_weights, np.arange(h, dtype=float)) / total
+
+    scores = []
+    for i in range(n):
+        circularity = 0.0
+        sharpness = 0.0
+        if lit_count[i] > 2 and np.isfinite(cx[i]):
+            ly, lx = np.nonzero(lit[i])
+            covariance = np.cov(np.stack([lx, ly]))
+            eigenvalues = np.linalg.eigvalsh(covariance)
+            if eigenvalues[1] > 0:
+                circularity = float(np.sqrt(max(eigenvalues[0], 0.0) / eigenvalues[1]))
+            sharpness = _radial_sharpness(weights[i], cx[i], cy[i], lit[i])
+        scores.append(FrameScore(first_index + i, float(saturation[i]), float(snr[i]), sharpness,
+                                 circularity, float(cx[i] * factor), float(cy[i] * factor)))
+    return scores
+
+
+@traced()
+def score_source(reader, saturation_level=None, chunk_frames=None, progress=None):
+    """
+    Puntúa todos los fotogramas de una fuente (ver `src.common.frames`) por bloques.
+
+    Parámetros:
+    - saturation_level: por defecto el máximo del sensor que indica la fuente
+      (`max_value`), si lo conoce
+
+    Retorna:
+    - lista de FrameScore con el jitter calculado
+    """
+    if saturation_level is None:
+        saturation_level = getattr(reader, 'max_value', None)
+    if chunk_frames is None:
+        chunk_frames = chunk_frames_for(reader.frame_shape)
+    scores = []
+    for start in range(0, len(reader), chunk_frames):
+        stop = min(len(reader), start + chunk_frames)
+        scores.extend(score_frames(reader.read(start, stop), saturation_level, start))
+        if progress:
+            progress(stop, len(reader))
+    _add_jitter(scores)
+    return scores
+
+
+def _add_jitter(scores):
+    centroids = np.array([(s.cx, s.cy) for s in scores])
+    if centroids.size == 0:
+        return
+    center = np.nanmedian(centroids, axis=0)
+    jitter = np.hypot(*(centroids - center).T)
+    for score, value in zip(scores, jitter):
+        score.jitter = float(value)
+
+
+def select_frames(scores, keep_fraction=KEEP_FRACTION, max_saturation=0.001, min_snr=5.0,
+                  min_circularity=0.8, max_jitter=None):
+    """
+    Rechaza los fotogramas defectuosos y conserva los mejores.
+
+    Se descartan los fotogramas saturados, con poca señal, deformados o cuyo
+    centroide se aleja más de `max_jitter` píxeles (por defecto
+    JITTER_MAD_LIMIT desviaciones robustas) del centro habitual; del resto se
+    conserva la fracción `keep_fraction` con mayor `sharpness * circularity`.
+    Si ningún fotograma supera los criterios (p. ej. todos tienen algunos
+    píxeles saturados) se conservan los mejores de todos por la misma
+    puntuación, y su motivo de rechazo se mantiene en `reason` con el sufijo
+    "(sin alternativa)", en lugar de quedarse sin nada que apilar.
+    Actualiza `score`, `rank`, `selected` y `reason` de cada FrameScore.
+
+    Retorna:
+    - array booleano (n,) con los fotogramas seleccionados
+    """
+    if max_jitter is None and scores:
+        jitter = np.array([s.jitter for s in scores])
+        spread = 1.4826 * np.median(np.abs(jitter - np.median(jitter)))
+        max_jitter = np.median(jitter) + JITTER_MAD_LIMIT * max(spread, 0.5)
+
+    candidates = []
+    for s in scores:
+        s.score = s.sharpness * s.circularity
+        s.rank = -1
+        s.selected = False
+        if s.saturation > max_saturation:
+            s.reason = 'saturado'
+        elif s.snr < min_snr:
+            s.reason = 'señal baja'
+        elif s.circularity < min_circularity:
+            s.reason = 'deformado'
+        elif s.jitter > max_jitter:
+            s.reason = 'desplazado'
+        else:
+            s.reason = ''
+            candidates.append(s)
+
+    fallback = not candidates
+    if fallback:
+        candidates = list(scores)
+    candidates.sort(key=lambda s: s.score, reverse=True)
+    n_keep = max(1, int(np.ceil(keep_fraction * len(candidates)))) if candidates else 0
+    for rank, s in enumerate(candidates):
+        s.rank = rank
+        s.selected = rank < n_keep
+        if fallback:
+            if s.selected:
+                s.reason = f"{s.reason} (sin alternativa)"
+        elif not s.selected:
+            s.reason = 'descartado por calidad'
+    return np.array([s.selected for s in scores], dtype=bool)
+
+
+def save_scores_csv(scores, path, label=None):
+    """
+    Guarda las puntuaciones en CSV, una fila por fotograma.
+
+    Parámetros:
+    - label: valor de una primera columna 'video' (p. ej. 'intra' o 'extra'),
+      para guardar varias listas en el mismo fichero con `append_scores_csv`
+    """
+    with open(path, 'w', newline='') as f:
+        _write_scores(f, scores, label, header=True)
+
+
+def append_scores_csv(scores, path, label=None):
+    """Añade puntuaciones a un CSV creado con `save_scores_csv` (sin repetir la cabecera)."""
+    with open(path, 'a', newline='') as f:
+        _write_scores(f, scores, label, header=False)
+
+
+def _write_scores(f, scores, label, header):
+    names = [field.name for field in fields(FrameScore)]
+    writer = csv.writer(f)
+    if header:
+        writer.writerow((['video'] if label is not None else []) + names)
+    for score in scores:
+        row = [getattr(score, name) for name in names]
+        writer.writerow(([label] if label is not None else []) + row)
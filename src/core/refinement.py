@@ -0,0 +1,157 @@
+# Copyright (c) 2025 Adrián Hernández Padrón
+# Licensed under the MIT License. See LICENSE file in the project root for full license information.
+
+from dataclasses import dataclass, field
+import time
+import numpy as np
+from scipy.fft import fft2, ifft2, irfft2, rfft2
+from src.core.fft_plan import inverse_laplacian, pad_to_shape, squared_frequencies
+from src.common.tracing import traced
+
+
+@dataclass
+class RefinementResult:
+    """Resultado del refinamiento iterativo del frente de onda."""
+    wavefront: np.ndarray  # frente de onda final (mismas unidades que `calculate_wavefront`)
+    residuals: list = field(default_factory=list)  # RMS relativo de ΔI/I₀ medido - simulado, por iteración
+    timings: list = field(default_factory=list)  # segundos de cada iteración
+    n_iter: int = 0  # correcciones incluidas en `wavefront` (sin las deshechas)
+    converged: bool = False
+
+
+class RoddierPropagator:
+    """
+    Modelo directo de Roddier por espectro angular, con núcleos precalculados.
+
+    El campo en la pupila, máscara · exp(i·k·W), se propaga a ambos lados del
+    foco con el núcleo de Fresnel exp(∓iα(2πf)²) y se obtiene la señal
+    ΔI/I₀ = (I_extra - I_intra) / I₀ que vería el sensor. La distancia α se
+    elige para que la linealización del modelo coincida exactamente con la
+    ecuación de Poisson que invierte `calculate_wavefront`, de modo que el
+    paso de corrección y el modelo directo son coherentes.
+    """
+
+    def __init__(self, annular_mask, dz_mm, wavelength_nm=555, fft_shape=None):
+        if dz_mm is None:
+            raise ValueError("El modelo de propagación necesita la distancia de desenfoque dz_mm")
+        self.mask = np.asarray(annular_mask, dtype=bool)
+        self.shape = self.mask.shape
+        self.fft_shape = tuple(fft_shape) if fft_shape is not None else self.shape
+
+        wavelength_mm = wavelength_nm / 1e6
+        self.factor = (wavelength_mm / (4 * np.pi)) * dz_mm
+        self.wavenumber = 2 * np.pi / wavelength_mm
+        alpha = 1.0 / (16 * np.pi**2 * self.factor * self.wavenumber)
+
+        # Núcleos reutilizados en todas las iteraciones
+        freq_squared = squared_frequencies(self.fft_shape)
+        self.kernel_extra = np.exp(-1j * alpha * (2 * np.pi)**2 * freq_squared)
+        self.kernel_intra = np.conj(self.kernel_extra)
+        self.inverse_laplacian = inverse_laplacian(self.fft_shape, real=True)
+
+    def propagate(self, wavefront):
+        """
+        Intensidades (extra, intra) a ambos lados del foco para un frente de onda.
+
+        Admite ejes iniciales de lote: `wavefront` de forma (..., alto, ancho).
+        """
+        height, width = self.shape
+        field = pad_to_shape(self.mask * np.exp(1j * self.wavenumber * wavefront), self.fft_shape)
+        field_fft = fft2(field)
+        extra = np.abs(ifft2(field_fft * self.kernel_extra))**2
+        intra = np.abs(ifft2(field_fft * self.kernel_intra))**2
+        return extra[..., :height, :width], intra[..., :height, :width]
+
+    def simulate(self, wavefront):
+        """ΔI/I₀ simulado para un frente de onda, enmascarado como en `preprocess_roddier`."""
+        extra, intra = self.propagate(wavefront)
+        I0 = 0.5 * (extra + intra)
+        delta_I = np.divide(extra - intra, I0, out=np.zeros(extra.shape), where=I0 > 1e-12)
+        return delta_I * self.mask
+
+    def solve(self, delta_I_norm):
+        """
+        Paso zonal: igual que `calculate_wavefront` con el mismo `fft_shape` y dz.
+
+        Admite ejes iniciales de lote, como `propagate`.
+        """
+        height, width = self.shape
+        spectrum = rfft2(pad_to_shape(delta_I_norm, self.fft_shape), workers=-1)
+        spectrum *= self.inverse_laplacian
+        wavefront = irfft2(spectrum, s=self.fft_shape, workers=-1)[..., :height, :width]
+        return self.factor * wavefront * self.mask
+
+
+def correct_wavefront(delta_I_norm, propagator, n_iter):
+    """
+    Solución zonal seguida de `n_iter` correcciones de `refine_wavefront`, sin criterios de parada.
+
+    Repite sobre otras ΔI/I₀ (p. ej. réplicas con ruido, con ejes iniciales de
+    lote) las correcciones que aceptó el refinamiento de la medida.
+
+    Retorna:
+    - frente de onda con la forma de `delta_I_norm`
+    """
+    delta_I_norm = delta_I_norm * propagator.mask
+    wavefront = propagator.solve(delta_I_norm)
+    for _ in range(n_iter):
+        wavefront = wavefront + propagator.solve(delta_I_norm - propagator.simulate(wavefront))
+    return wavefront
+
+
+def _relative_rms(residual, reference, mask):
+    norm = np.sqrt(np.mean(reference[mask]**2))
+    if norm == 0:
+        return 0.0
+    return float(np.sqrt(np.mean(residual[mask]**2)) / norm)
+
+
+@traced()
+def refine_wavefront(delta_I_norm, annular_mask, dz_mm, wavelength_nm=555, fft_shape=None,
+                     max_iter=20, tol=1e-3, min_improvement=0.01):
+    """
+    Refina el frente de onda simulando las imágenes desenfocadas y corrigiendo el residuo.
+
+    Se parte de la solución zonal y en cada iteración se hace
+    W ← W + zonal(ΔI_medido - ΔI_simulado(W)), como en WinRoddier.
+
+    Parámetros:
+    - delta_I_norm, annular_mask, dz_mm, wavelength_nm, fft_shape: como en `calculate_wavefront`
+    - max_iter: número máximo de iteraciones de corrección
+    - tol: se detiene cuando el RMS relativo del residuo baja de este valor
+    - min_improvement: se detiene si el residuo mejora menos que esta fracción
+
+    Retorna:
+    - RefinementResult
+    """
+    propagator = RoddierPropagator(annular_mask, dz_mm, wavelength_nm, fft_shape)
+    mask = propagator.mask
+    wavefront = propagator.solve(delta_I_norm)
+    result = RefinementResult(wavefront)
+
+    previous_rms = np.inf
+    previous_wavefront = wavefront
+    for _ in range(max_iter):
+        start = time.perf_counter()
+        residual = delta_I_norm * mask - propagator.simulate(wavefront)
+        rms = _relative_rms(residual, delta_I_norm, mask)
+        result.residuals.append(rms)
+
+        if rms > previous_rms:
+            # La última corrección empeoró el ajuste: deshacerla
+            wavefront = previous_wavefront
+            result.n_iter -= 1
+        elif rms < tol:
+            result.converged = True
+        elif rms <= previous_rms * (1 - min_improvement):
+            previous_wavefront, previous_rms = wavefront, rms
+            wavefront = wavefront + propagator.solve(residual)
+            result.n_iter += 1
+            result.timings.append(time.perf_counter() - start)
+            continue
+
+        result.timings.append(time.perf_counter() - start)
+        break
+
+    result.wavefront = wavefront
+    return result
@@ -2,10 +2,17 @@
 # Licensed under the MIT License. See LICENSE file in the project root for full license information.
 
 import numpy as np
-from scipy.fft import fft2, ifft2, fftfreq
+from scipy.fft import fft2, ifft2
+from src.core.fft_plan import inverse_laplacian, pad_to_shape
+from src.core.zernike import fit_zernike
+from src.core.modal import fit_zernike_modal
+from src.core.refinement import refine_wavefront
+from src.common.tracing import traced
 
 
-def calculate_wavefront(delta_I_norm, annular_mask, wavelength_nm=555, dz_mm=None, subtract_tilt_and_defocus=True):
+@traced()
+def calculate_wavefront(delta_I_norm, annular_mask, wavelength_nm=555, dz_mm=None, subtract_tilt_and_defocus=True,
+                        fft_shape=None):
     """
     Calcula el frente de onda a partir de la diferencia normalizada ΔI/I₀
     utilizando el método de Roddier, tal como lo hace WinRoddier.
@@ -16,31 +23,82 @@ def calculate_wavefront(delta_I_norm, annular_mask, wavelength_nm=555, dz_mm=Non
     - wavelength_nm: longitud de onda en nanómetros (por defecto 555nm)
     - dz_mm: distancia de desenfoque en milímetros (si se quiere calibrar en unidades físicas)
     - subtract_tilt_and_defocus: si True, elimina piston, tilt X/Y y defocus
+    - fft_shape: tamaño de la transformada (ver `plan_fft`); ΔI/I₀ se rellena con
+      ceros hasta ese tamaño para evitar el solapamiento periódico
 
     Retorna:
     - wavefront: frente de onda reconstruido (en radianes si dz_mm se especifica)
     """
-    pupil_mask_float = annular_mask.astype(float)
-
-    normalized_diff_fft = fft2(delta_I_norm)
-
     height, width = delta_I_norm.shape
-    freq_x = fftfreq(width)
-    freq_y = fftfreq(height)
-    freq_x_grid, freq_y_grid = np.meshgrid(freq_x, freq_y)
-    freq_squared = freq_x_grid**2 + freq_y_grid**2
+    if fft_shape is None:
+        fft_shape = (height, width)
+    normalized_diff_fft = fft2(pad_to_shape(delta_I_norm, fft_shape))
 
+    # ∇²W ∝ -ΔI/I₀: el signo se compensa al aplicar la máscara
     normalized_diff_fft[0, 0] = 0.0
-    wavefront_fft = np.zeros_like(normalized_diff_fft, dtype=complex)
-    nonzero_freq = freq_squared > 1e-8
-    wavefront_fft[nonzero_freq] = normalized_diff_fft[nonzero_freq] / (-freq_squared[nonzero_freq])
+    wavefront_fft = -normalized_diff_fft * inverse_laplacian(fft_shape)
 
-    wavefront = ifft2(wavefront_fft).real
+    wavefront = ifft2(wavefront_fft).real[:height, :width]
 
     if dz_mm is not None:
         wavelength_mm = wavelength_nm / 1e6
         factor = (wavelength_mm / (4 * np.pi)) * dz_mm
         wavefront *= factor
 
-    wavefront *= -pupil_mask_float
-    return wavefront
\ No newline at end of file
+    wavefront *= -annular_mask.astype(float)
+    return wavefront
+
+SOLVERS = ('zonal', 'modal', 'iterative')
+
+def solve_wavefront(delta_I_norm, annular_mask, dz_mm=None, solver='zonal', wavelength_nm=555, fft_shape=None):
+    """
+    Frente de onda previo al ajuste de Zernike con el método indicado.
+
+    No depende del número de modos: al cambiar sólo `max_order` se reutiliza.
+
+    Retorna:
+    - array (alto, ancho), o None con el método 'modal', que no lo calcula
+    """
+    if solver == 'zonal':
+        return calculate_wavefront(delta_I_norm, annular_mask, wavelength_nm=wavelength_nm,
+                                   dz_mm=dz_mm, fft_shape=fft_shape)
+    if solver == 'iterative':
+        return refine_wavefront(delta_I_norm, annular_mask, dz_mm, wavelength_nm=wavelength_nm,
+                                fft_shape=fft_shape).wavefront
+    if solver == 'modal':
+        return None
+    raise ValueError(f"Método de reconstrucción desconocido: {solver}")
+
+def fit_wavefront(wavefront, delta_I_norm, annular_mask, R_out, center, dz_mm=None, max_order=23,
+                  solver='zonal', wavelength_nm=555, fft_shape=None, orthonormal=False):
+    """
+    Coeficientes de Zernike del frente de onda de `solve_wavefront` (o de ΔI/I₀ con el método 'modal').
+
+    Retorna:
+    - tuple: (coeficientes, base)
+    """
+    if solver == 'modal':
+        return fit_zernike_modal(delta_I_norm, annular_mask, R_out, center, dz_mm=dz_mm,
+                                 wavelength_nm=wavelength_nm, max_order=max_order, fft_shape=fft_shape,
+                                 orthonormal=orthonormal)
+    return fit_zernike(wavefront, annular_mask, R_out, center, max_order, orthonormal=orthonormal)
+
+@traced()
+def reconstruct_zernike(delta_I_norm, annular_mask, R_out, center, dz_mm=None, max_order=23,
+                        solver='zonal', wavelength_nm=555, fft_shape=None, orthonormal=False):
+    """
+    Obtiene los coeficientes de Zernike de ΔI/I₀ con el método indicado.
+
+    - 'zonal': resuelve la ecuación de Poisson en todo el campo y ajusta los modos
+    - 'modal': aplica a ΔI/I₀ la matriz del método zonal precalculada para la geometría (ver `zonal_matrix`)
+    - 'iterative': refina la solución zonal con el modelo de propagación (ver `refine_wavefront`)
+
+    Con `orthonormal=True` los coeficientes se expresan en la base anular
+    ortonormal (ver `annular_zernike_basis`).
+
+    Retorna:
+    - tuple: (coeficientes, base)
+    """
+    wavefront = solve_wavefront(delta_I_norm, annular_mask, dz_mm, solver, wavelength_nm, fft_shape)
+    return fit_wavefront(wavefront, delta_I_norm, annular_mask, R_out, center, dz_mm, max_order, solver,
+                         wavelength_nm, fft_shape, orthonormal)
@@ -0,0 +1,170 @@
+# Copyright (c) 2025 Adrián Hernández Padrón
+# Licensed under the MIT License. See LICENSE file in the project root for full license information.
+
+from dataclasses import dataclass
+import os
+import numpy as np
+from astropy.io import fits
+from scipy.fft import fft2, ifft2, fftfreq
+from src.core.fft_plan import plan_fft
+from src.core.refinement import RoddierPropagator
+from src.core.zernike import zernike_polynomials_packed
+
+# Segundos de arco por radián / 1000 (escala de placa con píxel en µm y focal en mm)
+ARCSEC_PER_UM_PER_MM = 206.265
+
+
+@dataclass
+class DonutBatch:
+    """Lote de pares intra/extra simulados con su verdad conocida."""
+    intra: np.ndarray  # (n, alto, ancho)
+    extra: np.ndarray  # (n, alto, ancho), con la misma orientación que intra
+    coeffs: np.ndarray  # (n, n_modos) coeficientes de Zernike usados
+    dz_mm: float  # desenfoque
+    center: tuple  # (cx, cy) centro de la pupila en la imagen
+    R_out: float  # radio exterior del patrón en píxeles
+    R_in: float  # radio de la obstrucción en píxeles
+    mask: np.ndarray  # máscara anular de la pupila
+
+    def __len__(self):
+        return self.intra.shape[0]
+
+
+def donut_radius_px(telescope, dz_mm):
+    """
+    Radio en píxeles del patrón desenfocado (inversa de `estimate_defocus_mm`).
+
+    Como en el resto del programa, `telescope.effective_pixel_scale` se
+    interpreta como el tamaño de píxel en micras.
+    """
+    pixel_size_mm = telescope.effective_pixel_scale / 1000
+    return dz_mm * (telescope.apertura / 2) / telescope.focal / pixel_size_mm
+
+
+def plate_scale_arcsec(telescope):
+    """Escala de placa en segundos de arco por píxel."""
+    return ARCSEC_PER_UM_PER_MM * telescope.effective_pixel_scale / telescope.focal
+
+
+def _seeing_kernel(shape, sigma_px):
+    """Transferencia de un desenfoque gaussiano (seeing) de desviación `sigma_px`."""
+    freq_y = fftfreq(shape[0])
+    freq_x = fftfreq(shape[1])
+    freq_squared = freq_x[np.newaxis, :]**2 + freq_y[:, np.newaxis]**2
+    return np.exp(-2 * np.pi**2 * sigma_px**2 * freq_squared)
+
+
+def _bin(images, factor):
+    if factor == 1:
+        return images
+    n, height, width = images.shape
+    return images.reshape(n, height // factor, factor, width // factor, factor).sum(axis=(2, 4))
+
+
+def simulate_donuts(telescope, dz_mm, coeffs, size=None, obstruction=0.3, flux=1e6, sky=100.0,
+                    seeing_arcsec=2.0, read_noise=5.0, wavelength_nm=555, oversample=1,
+                    noise=True, quantize=True, rng=None, batch_size=64):
+    """
+    Simula pares de estrellas desenfocadas (intra/extra) con aberraciones conocidas.
+
+    El frente de onda de cada par se propaga con el mismo modelo directo que
+    usa el refinamiento iterativo, de modo que al reconstruir se recuperan
+    los coeficientes de partida. Después se aplica el seeing, la integración
+    en píxeles, el fondo de cielo y el ruido (Poisson y de lectura).
+
+    Parámetros:
+    - telescope: TelescopeParams (apertura y focal en mm, tamaño de píxel en µm)
+    - dz_mm: desenfoque en milímetros
+    - coeffs: coeficientes de Zernike, (n_modos,) o (n, n_modos), en las
+      unidades que devuelve `fit_zernike` sobre `calculate_wavefront` con dz_mm
+    - size: lado de las imágenes; por defecto el recorte de `plan_fft`
+    - obstruction: fracción de obstrucción central (R_in / R_out)
+    - flux: cuentas totales de cada imagen (sin el fondo)
+    - sky: fondo de cielo en cuentas por píxel
+    - seeing_arcsec: FWHM del seeing; 0 para desactivarlo
+    - read_noise: ruido de lectura en cuentas
+    - oversample: submuestreo de cada píxel para simular su integración
+    - noise: si False se devuelven las imágenes sin ruido
+    - quantize: convertir a uint16 como una cámara
+    - rng: numpy.random.Generator o semilla
+    - batch_size: pares que se propagan a la vez
+
+    Retorna:
+    - DonutBatch
+    """
+    rng = np.random.default_rng(rng)
+    coeffs = np.atleast_2d(np.asarray(coeffs, dtype=float))
+    n_pairs, n_modes = coeffs.shape
+
+    R_out = donut_radius_px(telescope, dz_mm)
+    if size is None:
+        size = plan_fft(R_out).crop_size
+    fine_size = size * oversample
+    c = (fine_size - 1) / 2
+    fine_R_out = R_out * oversample
+
+    y, x = np.indices((fine_size, fine_size))
+    r = np.hypot(x - c, y - c)
+    fine_mask = (r >= obstruction * fine_R_out) & (r <= fine_R_out)
+    basis = zernike_polynomials_packed(fine_mask.shape, fine_mask, fine_R_out, (c, c), n_modes)
+    # El desenfoque de la simulación fina equivale al de la imagen por el factor de píxel
+    propagator = RoddierPropagator(fine_mask, dz_mm / oversample**2, wavelength_nm,
+                                   plan_fft(fine_R_out).fft_shape)
+
+    sigma_px = 0.0
+    if seeing_arcsec > 0:
+        sigma_px = seeing_arcsec / 2.3548 / plate_scale_arcsec(telescope) * oversample
+    blur = _seeing_kernel(propagator.fft_shape, sigma_px) if sigma_px > 0 else None
+
+    intra = np.empty((n_pairs, size, size))
+    extra = np.empty((n_pairs, size, size))
+    for start in range(0, n_pairs, batch_size):
+        stop = min(n_pairs, start + batch_size)
+        wavefront = basis.scatter(coeffs[start:stop] @ basis.values)
+        images = np.stack(propagator.propagate(wavefront))  # (2, lote, alto, ancho)
+        if blur is not None:
+            padded = np.zeros(images.shape[:2] + propagator.fft_shape)
+            padded[..., :fine_size, :fine_size] = images
+            images = ifft2(fft2(padded) * blur).real[..., :fine_size, :fine_size]
+            np.clip(images, 0, None, out=images)
+        images = _bin(images.reshape((-1, fine_size, fine_size)), oversample)
+        images = images.reshape((2, stop - start, size, size))
+        images *= flux / images.sum(axis=(-2, -1), keepdims=True)
+        extra[start:stop], intra[start:stop] = images
+
+    intra += sky
+    extra += sky
+    if noise:
+        intra = rng.poisson(intra) + rng.normal(0.0, read_noise, intra.shape)
+        extra = rng.poisson(extra) + rng.normal(0.0, read_noise, extra.shape)
+    if quantize:
+        intra = np.clip(np.round(intra), 0, 65535).astype(np.uint16)
+        extra = np.clip(np.round(extra), 0, 65535).astype(np.uint16)
+
+    c = (size - 1) / 2
+    y, x = np.indices((size, size))
+    r = np.hypot(x - c, y - c)
+    mask = (r >= obstruction * R_out) & (r <= R_out)
+    return DonutBatch(intra, extra, coeffs, dz_mm, (c, c), R_out, obstruction * R_out, mask)
+
+
+def write_fits_pairs(batch, directory, start_index=0):
+    """
+    Guarda un lote como ficheros intra_XXXX.fits / extra_XXXX.fits.
+
+    La imagen extrafocal se guarda girada 180°, como sale de la cámara: al
+    cargarla la aplicación la vuelve a girar.
+
+    Retorna:
+    - lista de tuplas (ruta_intra, ruta_extra)
+    """
+    os.makedirs(directory, exist_ok=True)
+    paths = []
+    for i in range(len(batch)):
+        index = start_index + i
+        intra_path = os.path.join(directory, f"intra_{index:04d}.fits")
+        extra_path = os.path.join(directory, f"extra_{index:04d}.fits")
+        fits.writeto(intra_path, batch.intra[i], overwrite=True)
+        fits.writeto(extra_path, np.rot90(batch.extra[i], k=2), overwrite=True)
+        paths.append((intra_path, extra_path))
+    return paths
@@ -0,0 +1,253 @@
+# Copyright (c) 2025 Adrián Hernández Padrón
+# Licensed under the MIT License. See LICENSE file in the project root for full license information.
+
+"""
+Apilado en streaming de vídeos de estrellas desenfocadas (SER o cubos FITS).
+
+Los fotogramas se leen en bloques de tamaño fijo, se registran desplazándolos
+un número entero de píxeles hasta el centroide del primero y se acumulan en
+sumas por píxel, de modo que la memoria no depende de la duración del vídeo:
+
+- 'mean': media de los fotogramas registrados (una pasada);
+- 'sigma_clip': media y desviación por píxel en una primera pasada y, en la
+  segunda, media de los valores a menos de `sigma` desviaciones (rechaza
+  rayos cósmicos, satélites o fotogramas con un golpe de seeing).
+
+Cada píxel se promedia sólo sobre los fotogramas que lo cubren tras el
+desplazamiento, así que los bordes no se oscurecen. Con `selection` sólo se
+apilan los fotogramas elegidos por `src.core.quality` (lucky imaging).
+"""
+
+from dataclasses import dataclass
+import numpy as np
+from src.common.frames import open_frames
+from src.common.tracing import traced
+from src.common.utils import border_background
+from src.core.statistics import RunningStats
+
+STACK_METHODS = ('mean', 'sigma_clip')
+
+# Memoria aproximada de cada bloque de fotogramas en float64
+STACK_CHUNK_BYTES = 64 * 1024 * 1024
+
+# Fracción del máximo (sobre el fondo) por encima de la cual un píxel cuenta para el centroide
+REGISTRATION_THRESHOLD = 0.1
+
+# Lado aproximado de los fotogramas reducidos sobre los que se calcula el registro
+REGISTRATION_SIZE = 128
+
+
+@dataclass
+class StackResult:
+    """Imagen apilada y estadísticas del apilado."""
+    image: np.ndarray  # (alto, ancho) float64
+    n_frames: int
+    shifts: np.ndarray  # (n, 2) desplazamiento entero (dy, dx) aplicado a cada fotograma
+    rejected: int = 0  # valores de píxel rechazados por el recorte sigma
+    method: str = 'mean'
+    scores: list = None  # FrameScore de cada fotograma si se seleccionaron por calidad
+
+
+def chunk_frames_for(frame_shape, chunk_bytes=STACK_CHUNK_BYTES):
+    """Fotogramas por bloque para que un bloque en float64 ocupe unos `chunk_bytes`."""
+    return max(1, int(chunk_bytes // (8 * frame_shape[0] * frame_shape[1])))
+
+
+def frame_centroids(frames, threshold=REGISTRATION_THRESHOLD, size=REGISTRATION_SIZE):
+    """
+    Centroides (cx, cy) de un bloque de fotogramas.
+
+    Se calculan sobre los fotogramas submuestreados hasta unos `size` píxeles
+    de lado: para un donut extenso basta para un desplazamiento entero y
+    evita recorrer varias veces los datos a resolución completa. A cada
+    fotograma se le resta el fondo (mediana del borde) y sólo pesan los
+    píxeles por encima de `threshold` veces su máximo, como en
+    `calculate_center_of_mass`.
+
+    Retorna:
+    - array (n, 2) en píxeles de los fotogramas originales
+    """
+    factor = max(1, min(frames.shape[1:]) // size)
+    small = frames[:, ::factor, ::factor]
+    h, w = small.shape[1:]
+
+    background, _ = border_background(small)
+    weights = small - background[:, np.newaxis, np.newaxis]
+    peak = weights.max(axis=(1, 2))
+    weights[weights <= threshold * peak[:, np.newaxis, np.newaxis]] = 0.0
+    rows = weights.sum(axis=2)
+    cols = weights.sum(axis=1)
+    total = rows.sum(axis=1)
+    total[total <= 0] = np.nan
+    cx = cols @ np.arange(w) / total * factor
+    cy = rows @ np.arange(h) / total * factor
+    return np.stack([cx, cy], axis=1)
+
+
+def _shifted_slices(shift, shape):
+    """Ventanas origen y destino para desplazar un fotograma (dy, dx) píxeles sin rotarlo."""
+    slices = []
+    for offset, size in zip(shift, shape):
+        offset = int(offset)
+        source = slice(max(0, -offset), min(size, size - offset))
+        target = slice(max(0, offset), min(size, size + offset))
+        slices.append((source, target))
+    (src_y, dst_y), (src_x, dst_x) = slices
+    return (src_y, src_x), (dst_y, dst_x)
+
+
+def _uncovered(shift, shape):
+    """Franjas de un fotograma desplazado (dy, dx) que no cubre ningún píxel del original."""
+    dy, dx = (int(offset) for offset in shift)
+    strips = []
+    if dy > 0:
+        strips.append(np.s_[:dy])
+    elif dy < 0:
+        strips.append(np.s_[shape[0] + dy:])
+    if dx > 0:
+        strips.append(np.s_[:, :dx])
+    elif dx < 0:
+        strips.append(np.s_[:, shape[1] + dx:])
+    return strips
+
+
+def _coverage(shifts, shape):
+    """Número de fotogramas que cubren cada píxel, sumado por desplazamiento distinto."""
+    count = np.zeros(shape)
+    unique_shifts, repeats = np.unique(shifts, axis=0, return_counts=True)
+    for shift, repeat in zip(unique_shifts, repeats):
+        count[_shifted_slices(shift, shape)[1]] += repeat
+    return count
+
+
+def _register(frames, shifts):
+    """Desplaza en el sitio cada fotograma de un bloque según `shifts`, con ceros fuera del original."""
+    for frame, shift in zip(frames, shifts):
+        if not np.any(shift):
+            continue
+        source, target = _shifted_slices(shift, frame.shape)
+        frame[target] = frame[source].copy()
+        for strip in _uncovered(shift, frame.shape):
+            frame[strip] = 0.0
+    return frames
+
+
+def _chunks(reader, chunk_frames, selection):
+    """Bloques (índices, fotogramas) con sólo los fotogramas seleccionados."""
+    for start in range(0, len(reader), chunk_frames):
+        stop = min(len(reader), start + chunk_frames)
+        keep = selection[start:stop]
+        if not keep.any():
+            continue
+        frames = reader.read(start, stop)
+        if not keep.all():
+            frames = frames[keep]
+        yield np.arange(start, stop)[keep], frames
+
+
+@traced()
+def stack_frames(reader, method='mean', sigma=3.0, register=True, chunk_frames=None, progress=None,
+                 selection=None):
+    """
+    Apila los fotogramas de una fuente (ver `src.common.frames`).
+
+    Parámetros:
+    - reader: fuente de fotogramas (`open_frames`)
+    - method: 'mean' o 'sigma_clip'
+    - sigma: umbral de rechazo en desviaciones típicas ('sigma_clip')
+    - register: alinear los fotogramas con el centroide del primero
+    - chunk_frames: fotogramas por bloque; por defecto según STACK_CHUNK_BYTES
+    - progress: función opcional (fotogramas procesados, total de la pasada)
+    - selection: array booleano (n,) con los fotogramas a apilar; por defecto todos
+
+    Retorna:
+    - StackResult
+    """
+    if method not in STACK_METHODS:
+        raise ValueError(f"Método de apilado desconocido: {method}")
+    n_frames = len(reader)
+    if n_frames == 0:
+        raise ValueError("El vídeo no contiene fotogramas")
+    shape = tuple(reader.frame_shape)
+    if chunk_frames is None:
+        chunk_frames = chunk_frames_for(shape)
+    selection = np.ones(n_frames, dtype=bool) if selection is None else np.asarray(selection, dtype=bool)
+    if not selection.any():
+        raise ValueError("Ningún fotograma ha superado la selección")
+
+    shifts = np.zeros((n_frames, 2), dtype=int)
+    reference = None
+    total = np.zeros(shape)  # suma de los fotogramas registrados ('mean')
+    stats = RunningStats(shape)  # media y varianza por píxel ('sigma_clip')
+
+    # Primera pasada: registro, media y, para el recorte, varianza por píxel
+    for index, frames in _chunks(reader, chunk_frames, selection):
+        if register:
+            centroids = frame_centroids(frames)
+            if reference is None:
+                reference = centroids[0]
+            offsets = np.nan_to_num(reference - centroids)
+            shifts[index] = np.round(offsets[:, ::-1]).astype(int)
+        if method == 'mean':
+            # Sin recorte basta acumular cada fotograma desplazado
+            for frame, shift in zip(frames, shifts[index]):
+                source, target = _shifted_slices(shift, shape)
+                total[target] += frame[source]
+        else:
+            deviation = _register(frames, shifts[index])
+            chunk_count = _coverage(shifts[index], shape)
+            chunk_mean = np.divide(deviation.sum(axis=0), chunk_count, out=np.zeros(shape),
+                                   where=chunk_count > 0)
+            deviation -= chunk_mean
+            for frame, shift in zip(deviation, shifts[index]):
+                for strip in _uncovered(shift, shape):
+                    frame[strip] = 0.0
+            stats.merge_moments(chunk_count, chunk_mean, np.einsum('ijk,ijk->jk', deviation, deviation))
+        if progress:
+            progress(index[-1] + 1, n_frames)
+
+    n_stacked = int(selection.sum())
+    if method == 'mean':
+        count = _coverage(shifts[selection], shape)
+        mean = np.divide(total, count, out=np.zeros(shape), where=count > 0)
+        return StackResult(mean, n_stacked, shifts, 0, method)
+
+    # Segunda pasada: media de los valores a menos de `sigma` desviaciones
+    mean = stats.mean
+    limit = sigma * np.nan_to_num(stats.std(ddof=0))
+    kept_deviation = np.zeros(shape)
+    kept_count = np.zeros(shape)
+    for index, frames in _chunks(reader, chunk_frames, selection):
+        deviation = _register(frames, shifts[index])
+        deviation -= mean
+        keep = np.abs(deviation) <= limit
+        for frame_keep, shift in zip(keep, shifts[index]):
+            for strip in _uncovered(shift, shape):
+                frame_keep[strip] = False
+        kept_deviation += np.sum(deviation, axis=0, where=keep)
+        kept_count += np.count_nonzero(keep, axis=0)
+        if progress:
+            progress(index[-1] + 1, n_frames)
+
+    image = mean + np.divide(kept_deviation, kept_count, out=np.zeros(shape), where=kept_count > 0)
+    rejected = int(stats.count.sum() - kept_count.sum())
+    return StackResult(image, n_stacked, shifts, rejected, method)
+
+
+def stack_file(path, keep_fraction=None, **options):
+    """
+    Abre un vídeo SER o un cubo FITS y lo apila (opciones de `stack_frames`).
+
+    Con `keep_fraction` se puntúan antes los fotogramas y sólo se apila esa
+    fracción de los mejores (ver `src.core.quality.select_frames`); las
+    puntuaciones se devuelven en `StackResult.scores`.
+    """
+    with open_frames(path) as reader:
+        if keep_fraction is None:
+            return stack_frames(reader, **options)
+        from src.core.quality import score_source, select_frames
+        scores = score_source(reader, chunk_frames=options.get('chunk_frames'))
+        selection = select_frames(scores, keep_fraction)
+        result = stack_frames(reader, selection=selection, **options)
+        result.scores = scores
+        return result
@@ -0,0 +1,180 @@
+# Copyright (c) 2025 Adrián Hernández Padrón
+# Licensed under the MIT License. See LICENSE file in the project root for full license information.
+
+"""
+Estadísticas en streaming de muchos pares de imágenes.
+
+`RunningStats` acumula la media y la varianza por elemento (y, para vectores,
+la covarianza) sin guardar las muestras: cada bloque se resume en su número
+de muestras, su media y su suma de cuadrados de las desviaciones, y se
+combina con lo acumulado (Welford; Chan et al. para bloques). Dos
+acumuladores se pueden combinar con `merge`, p. ej. los de varios procesos,
+y se pueden serializar con pickle.
+
+`ResultStatistics` aplica lo anterior a los RoddierResult de una serie de
+pares (coeficientes, mapa del frente de onda y métricas RMS / pico-valle),
+ya sea en lote, en el modo en vivo o tras apilar vídeos.
+"""
+
+import numpy as np
+
+# Lado del mapa del frente de onda sobre el que se promedian los resultados
+MAP_SIZE = 128
+
+
+class RunningStats:
+    """Media, varianza y covarianza en streaming de muestras con la misma forma."""
+
+    def __init__(self, shape=(), covariance=False):
+        """
+        Parámetros:
+        - shape: forma de cada muestra (() para escalares)
+        - covariance: acumular también la covarianza entre elementos (sólo
+          para vectores; las muestras no pueden tener NaN)
+        """
+        self.shape = (int(shape),) if np.isscalar(shape) else tuple(shape)
+        if covariance and len(self.shape) != 1:
+            raise ValueError("La covarianza sólo se acumula para muestras vectoriales")
+        self.count = np.zeros(self.shape)  # muestras válidas (no NaN) de cada elemento
+        self.mean = np.zeros(self.shape)
+        self.m2 = np.zeros(self.shape)  # suma de cuadrados de las desviaciones a la media
+        self.comoment = np.zeros(self.shape * 2) if covariance else None
+
+    @property
+    def n(self):
+        """Número de muestras acumuladas (el máximo sobre los elementos)."""
+        return int(self.count.max(initial=0))
+
+    def update(self, sample):
+        """Añade una muestra; los elementos NaN no cuentan."""
+        return self.update_batch(np.asarray(sample, dtype=float)[np.newaxis])
+
+    def update_batch(self, samples):
+        """Añade un bloque de muestras (n, *shape) en una sola combinación."""
+        samples = np.asarray(samples, dtype=float)
+        if samples.shape[1:] != self.shape:
+            raise ValueError(f"Las muestras tienen forma {samples.shape[1:]}, se esperaba {self.shape}")
+        if len(samples) == 0:
+            return self
+        valid = np.isfinite(samples)
+        comoment = None
+        if valid.all():
+            count = np.full(self.shape, float(len(samples)))
+            mean = samples.mean(axis=0)
+            deviation = samples - mean
+            m2 = np.sum(deviation**2, axis=0)
+            if self.comoment is not None:
+                comoment = deviation.T @ deviation
+        else:
+            if self.comoment is not None:
+                raise ValueError("Las muestras con NaN no admiten covarianza")
+            count = np.count_nonzero(valid, axis=0).astype(float)
+            total = np.sum(samples, axis=0, where=valid)
+            mean = np.divide(total, count, out=np.zeros(self.shape), where=count > 0)
+            deviation = np.where(valid, samples - mean, 0.0)
+            m2 = np.sum(deviation**2, axis=0)
+        return self.merge_moments(count, mean, m2, comoment)
+
+    def merge_moments(self, count, mean, m2, comoment=None):
+        """
+        Combina un bloque resumido por su número de muestras, media y suma de
+        cuadrados de las desviaciones (por elemento), y su comomento si se
+        acumula la covarianza.
+        """
+        merged = self.count + count
+        delta = mean - self.mean
+        weight = np.divide(count, merged, out=np.zeros(self.shape), where=merged > 0)
+        if self.comoment is not None:
+            if comoment is None:
+                raise ValueError("Falta el comomento del bloque para acumular la covarianza")
+            # Sin NaN el número de muestras es el mismo en todos los elementos
+            n_self = self.count.flat[0] if self.count.size else 0.0
+            self.comoment += comoment + np.outer(delta, delta) * n_self * weight.flat[0]
+        self.mean += delta * weight
+        self.m2 += m2 + delta**2 * self.count * weight
+        self.count = merged
+        return self
+
+    def merge(self, other):
+        """Combina en el sitio otro acumulador de la misma forma (p. ej. de otro proceso)."""
+        if other.shape != self.shape:
+            raise ValueError(f"No se pueden combinar estadísticas de forma {other.shape} y {self.shape}")
+        comoment = other.comoment if self.comoment is not None else None
+        return self.merge_moments(other.count, other.mean, other.m2, comoment)
+
+    def variance(self, ddof=1):
+        """Varianza por elemento; NaN donde no hay más de `ddof` muestras."""
+        return np.divide(self.m2, self.count - ddof, out=np.full(self.shape, np.nan), where=self.count > ddof)
+
+    def std(self, ddof=1):
+        return np.sqrt(self.variance(ddof))
+
+    def sem(self):
+        """Error típico de la media."""
+        return np.sqrt(np.divide(self.variance(), self.count, out=np.full(self.shape, np.nan),
+                                 where=self.count > 1))
+
+    def covariance(self, ddof=1):
+        """Matriz de covarianza entre los elementos (requiere `covariance=True`)."""
+        if self.comoment is None:
+            raise ValueError("Estas estadísticas no acumulan la covarianza")
+        n = self.n
+        if n <= ddof:
+            return np.full(self.comoment.shape, np.nan)
+        return self.comoment / (n - ddof)
+
+    def confidence_interval(self, level=0.95):
+        """
+        Intervalo de confianza de la media por elemento (t de Student).
+
+        Retorna:
+        - (inferior, superior), arrays con la forma de las muestras
+        """
+        from scipy.stats import t
+        quantile = t.ppf(0.5 + level / 2, np.maximum(self.count - 1, 1))
+        half_width = quantile * self.sem()
+        return self.mean - half_width, self.mean + half_width
+
+
+class ResultStatistics:
+    """Estadísticas de los RoddierResult de una serie de pares."""
+
+    def __init__(self, map_size=MAP_SIZE):
+        self.map_size = map_size
+        self.coeffs = None  # RunningStats de los coeficientes (con covarianza)
+        self.wavefront = RunningStats((map_size, map_size))  # mapa con NaN fuera de la pupila
+        self.rms = RunningStats()
+        self.peak_to_valley = RunningStats()
+
+    @property
+    def n(self):
+        return self.rms.n
+
+    def update(self, result):
+        """Añade el resultado de un par; los coeficientes deben tener siempre los mismos modos."""
+        coeffs = np.asarray(result.zernike_coeffs, dtype=float)
+        if self.coeffs is None:
+            self.coeffs = RunningStats(coeffs.shape, covariance=True)
+        self.coeffs.update(coeffs)
+        wavefront = result.wavefront.render(self.map_size).filled(np.nan)
+        self.wavefront.update(wavefront)
+        self.rms.update(np.nanstd(wavefront))
+        self.peak_to_valley.update(np.nanmax(wavefront) - np.nanmin(wavefront))
+        return self
+
+    def extend(self, results):
+        """Añade los resultados de un lote (cualquier iterable, p. ej. un generador)."""
+        for result in results:
+            self.update(result)
+        return self
+
+    def merge(self, other):
+        """Combina en el sitio las estadísticas de otra serie (mismo `map_size` y modos)."""
+        if other.coeffs is not None:
+            if self.coeffs is None:
+                self.coeffs = RunningStats(other.coeffs.shape, covariance=True)
+            self.coeffs.merge(other.coeffs)
+        self.wavefront.merge(other.wavefront)
+        self.rms.merge(other.rms)
+        self.peak_to_valley.merge(other.peak_to_valley)
+        return self
@@ -36,6 +36,11 @@ class TelescopeParams:
             print(f"Error al cargar configuración: {e}")
             return None
 
+    @property
+    def effective_pixel_scale(self) -> float:
+        """Escala de píxel tras aplicar el binning."""
+        return self.pixel_scale * self.binning
+
     def to_dict(self) -> dict:
         """Convierte la instancia a un diccionario."""
         return {
@@ -0,0 +1,175 @@
+# Copyright (c) 2025 Adrián Hernández Padrón
+# Licensed under the MIT License. See LICENSE file in the project root for full license information.
+
+"""
+Incertidumbre de los coeficientes de Zernike por Monte Carlo.
+
+El ruido de las imágenes (Poisson de la señal y ruido del fondo) se propaga
+a ΔI/I₀ píxel a píxel y se generan réplicas perturbadas. Como la
+reconstrucción zonal (Poisson + mínimos cuadrados) y la modal son lineales
+en ΔI/I₀, basta resolver las perturbaciones: cada bloque de réplicas se
+resuelve con una única FFT por lotes (el paso zonal de `RoddierPropagator`)
+y una proyección matricial contra la pseudo-inversa de la base, calculada
+una sola vez. El método iterativo no es lineal: cada réplica de la medida se
+refina con las mismas correcciones que aceptó el refinamiento de la medida.
+"""
+
+from dataclasses import dataclass
+import numpy as np
+from src.common.utils import border_background
+from src.core.refinement import RoddierPropagator, correct_wavefront, refine_wavefront
+from src.core.statistics import RunningStats
+from src.core.zernike import PackedBasis, annular_zernike_basis, zernike_polynomials_packed
+from src.common.tracing import traced
+
+# Réplicas por defecto: el error típico se estima con un ~5 % de error relativo
+REPLICAS = 200
+
+# Réplicas que se transforman a la vez (memoria: réplicas x tamaño de la FFT)
+REPLICAS_PER_BATCH = 16
+
+# Con el método iterativo cada réplica se propaga: varios campos complejos por réplica
+ITERATIVE_REPLICAS_PER_BATCH = 4
+
+
+@dataclass
+class BatchSolver:
+    """Reconstrucción de una geometría aplicable a muchas perturbaciones de ΔI/I₀ a la vez."""
+    projection: np.ndarray  # (n_modos, n_píxeles de la pupila)
+    base: PackedBasis  # base de Zernike sobre la pupila
+    propagator: RoddierPropagator = None  # paso zonal; None para el modal, que proyecta ΔI/I₀
+    signal: np.ndarray = None  # ΔI/I₀ medido, sólo con el método iterativo (no lineal)
+    n_iter: int = 0  # correcciones que aceptó el refinamiento de la medida
+    reference: np.ndarray = None  # coeficientes de la medida con el método iterativo
+
+    def solve(self, delta_I_norm):
+        """
+        Perturbación de los coeficientes para un bloque de perturbaciones de ΔI/I₀
+        (n, alto, ancho) o para una sola imagen.
+
+        Con los métodos lineales es la reconstrucción de la perturbación; con el
+        iterativo, la diferencia entre la reconstrucción de la medida perturbada
+        y la de la medida.
+
+        Retorna:
+        - array (n, n_modos), o (n_modos,) para una imagen
+        """
+        delta_I_norm = np.asarray(delta_I_norm, dtype=float)
+        single = delta_I_norm.ndim == 2
+        if single:
+            delta_I_norm = delta_I_norm[np.newaxis]
+        if self.signal is not None:
+            delta_I_norm = correct_wavefront(self.signal + delta_I_norm, self.propagator, self.n_iter)
+        elif self.propagator is not None:
+            delta_I_norm = self.propagator.solve(delta_I_norm)
+        samples = delta_I_norm.reshape(len(delta_I_norm), -1)[:, self.base.index]
+        coeffs = samples @ self.projection.T
+        if self.reference is not None:
+            coeffs -= self.reference
+        return coeffs[0] if single else coeffs
+
+
+@traced()
+def build_batch_solver(annular_mask, R_out, center, dz_mm, max_order=23, solver='zonal',
+                       wavelength_nm=555, fft_shape=None, orthonormal=False, delta_I_norm=None):
+    """
+    Prepara la reconstrucción por lotes con los mismos parámetros que `reconstruct_zernike`.
+
+    Parámetros:
+    - delta_I_norm: ΔI/I₀ medido; sólo lo necesita el método iterativo, que no
+      es lineal: cada réplica se refina con las mismas correcciones que aceptó
+      `refine_wavefront` sobre la medida
+
+    Retorna:
+    - BatchSolver
+    """
+    if solver == 'modal':
+        from src.core.modal import build_modal_reconstructor
+        reconstructor = build_modal_reconstructor(annular_mask, R_out, center, dz_mm, wavelength_nm,
+                                                  max_order, fft_shape, orthonormal)
+        return BatchSolver(reconstructor.matrix, reconstructor.base)
+
+    mask = np.asarray(annular_mask)
+    if orthonormal:
+        base, _ = annular_zernike_basis(mask.shape, mask, R_out, center, max_order)
+        projection = base.values / base.index.size
+    else:
+        base = zernike_polynomials_packed(mask.shape, mask, R_out, center, max_order)
+        projection = np.linalg.pinv(base.values.T)
+    propagator = RoddierPropagator(mask, dz_mm, wavelength_nm, fft_shape)
+    if solver == 'zonal':
+        return BatchSolver(projection, base, propagator)
+    if solver != 'iterative':
+        raise ValueError(f"Método de reconstrucción desconocido: {solver}")
+    if delta_I_norm is None:
+        raise ValueError("El método iterativo necesita el ΔI/I₀ medido")
+
+    signal = np.asarray(delta_I_norm, dtype=float)
+    refinement = refine_wavefront(signal, mask, dz_mm, wavelength_nm, fft_shape)
+    reference = projection @ base.sample(refinement.wavefront)
+    return BatchSolver(projection, base, propagator, signal, refinement.n_iter, reference)
+
+
+def delta_noise(intra, extra, annular_mask, gain=1.0, aligned=False):
+    """
+    Desviación típica de ΔI/I₀ en cada píxel de la pupila.
+
+    Se alinean las imágenes como en `preprocess_roddier` (salvo con
+    `aligned=True`). La varianza de cada
+    imagen es la del fondo (medida en su borde) más el ruido de Poisson de la
+    señal sobre el fondo, (I - fondo) / gain en ADU; con ΔI/I₀ = 2(E - I)/(E + I)
+    se propaga con sus derivadas parciales.
+
+    Parámetros:
+    - intra, extra: recortes intra y extra-focal (el extra ya girado)
+    - gain: ganancia de la cámara en e-/ADU
+    - aligned: el extra-focal ya está alineado con el intra-focal
+
+    Retorna:
+    - array (alto, ancho) con ceros fuera de la pupila
+    """
+    intra = np.asarray(intra, dtype=float)
+    extra_aligned = np.asarray(extra, dtype=float)
+    if not aligned:
+        from src.core.optical_preprocessing import align_images
+        extra_aligned, _ = align_images(intra, extra_aligned)
+
+    variances = []
+    for image in (intra, extra_aligned):
+        background, sigma = border_background(image)
+        variances.append(sigma**2 + np.maximum(image - background, 0.0) / gain)
+    var_intra, var_extra = variances
+
+    total = intra + extra_aligned
+    inside = (np.asarray(annular_mask) != 0) & (total > 0)
+    noise = np.zeros_like(total)
+    squared = np.where(inside, total, 1.0)**4
+    noise[inside] = 4 * np.sqrt((intra**2 * var_extra + extra_aligned**2 * var_intra)[inside] / squared[inside])
+    return noise
+
+
+@traced()
+def coefficient_uncertainty(noise, batch_solver, n_replicas=REPLICAS, rng=None,
+                            replicas_per_batch=REPLICAS_PER_BATCH):
+    """
+    Error típico de cada coeficiente por Monte Carlo.
+
+    Parámetros:
+    - noise: desviación típica de ΔI/I₀ por píxel (ver `delta_noise`)
+    - batch_solver: reconstrucción de la geometría (ver `build_batch_solver`)
+    - n_replicas: número de réplicas perturbadas
+    - rng: semilla o numpy Generator
+
+    Retorna:
+    - RunningStats de las perturbaciones de los coeficientes (con covarianza);
+      `std()` es el error típico de cada modo
+    """
+    rng = np.random.default_rng(rng)
+    base = batch_solver.base
+    sigma = base.sample(noise)
+    stats = RunningStats(base.n_modes, covariance=True)
+    for start in range(0, n_replicas, replicas_per_batch):
+        count = min(replicas_per_batch, n_replicas - start)
+        perturbations = base.scatter(rng.standard_normal((count, sigma.size)) * sigma)
+        stats.update_batch(batch_solver.solve(perturbations))
+    return stats
@@ -0,0 +1,123 @@
+# Copyright (c) 2025 Adrián Hernández Padrón
+# Licensed under the MIT License. See LICENSE file in the project root for full license information.
+
+from collections import OrderedDict
+import numpy as np
+from src.core.zernike import PackedBasis, _zernike_values
+
+# Número de resoluciones cuya base se mantiene en memoria
+MAX_CACHED_RESOLUTIONS = 4
+
+
+def circular_coefficients(coeffs, transform):
+    """
+    Convierte coeficientes de la base anular ortonormal a Zernike circulares.
+
+    Parámetros:
+    - coeffs: coeficientes en la base anular
+    - transform: matriz triangular devuelta por `annular_zernike_basis`
+
+    Retorna:
+    - coeficientes equivalentes en la base circular
+    """
+    return np.linalg.solve(np.asarray(transform), np.asarray(coeffs, dtype=float))
+
+
+class LazyWavefront:
+    """
+    Frente de onda definido por sus coeficientes y la geometría de la pupila.
+
+    No almacena ninguna imagen: se evalúa bajo demanda a la resolución pedida
+    (p. ej. el tamaño del lienzo al mostrarlo o 2048² al exportarlo). Se
+    guarda la base de las últimas resoluciones usadas, de modo que cambiar los
+    modos seleccionados sólo cuesta un producto matriz-vector.
+    """
+
+    def __init__(self, coeffs, R_out, R_in=0.0, center=None, transform=None):
+        """
+        Parámetros:
+        - coeffs: coeficientes de Zernike circulares (orden de la aplicación)
+        - R_out: radio exterior de la pupila en píxeles del recorte
+        - R_in: radio de la obstrucción central en los mismos píxeles
+        - center: centro de la pupila en el recorte (sólo informativo)
+        - transform: matriz de `annular_zernike_basis` si el ajuste se hizo en
+          la base anular; los pesos de `render` se convierten con ella
+        """
+        self.coeffs = np.asarray(coeffs, dtype=float)
+        self.R_out = float(R_out)
+        self.R_in = float(R_in)
+        self.center = center
+        self.transform = None if transform is None else np.asarray(transform)
+        self._bases = OrderedDict()
+
+    @classmethod
+    def from_mask(cls, coeffs, annular_mask, R_out, center, transform=None):
+        """
+        Crea el frente de onda a partir de la máscara anular de `preprocess_roddier`.
+
+        El radio de la obstrucción se toma de la propia máscara. Si se pasa la
+        matriz `transform`, los coeficientes están en la base anular ortonormal.
+        """
+        if transform is not None:
+            coeffs = circular_coefficients(coeffs, transform)
+        cx, cy = center
+        y, x = np.nonzero(annular_mask)
+        R_in = np.min(np.hypot(x - cx, y - cy)) if x.size else 0.0
+        return cls(coeffs, R_out, R_in, center, transform)
+
+    @property
+    def obstruction(self):
+        """Fracción de obstrucción central R_in / R_out."""
+        return self.R_in / self.R_out if self.R_out > 0 else 0.0
+
+    def _basis(self, shape):
+        basis = self._bases.get(shape)
+        if basis is not None:
+            self._bases.move_to_end(shape)
+            return basis
+
+        # La pupila ocupa el lado menor de la rejilla, centrada
+        height, width = shape
+        scale = 2.0 / min(height, width)
+        y = (np.arange(height) - (height - 1) / 2) * scale
+        x = (np.arange(width) - (width - 1) / 2) * scale
+        r = np.hypot(x[np.newaxis, :], y[:, np.newaxis])
+        pupil = (r >= self.obstruction) & (r <= 1.0)
+        index = np.flatnonzero(pupil)
+        yy, xx = np.unravel_index(index, shape)
+
+        values = _zernike_values(len(self.coeffs), r.reshape(-1)[index],
+                                 np.arctan2(y[yy], x[xx]))
+        basis = PackedBasis(values, index, shape)
+        self._bases[shape] = basis
+        if len(self._bases) > MAX_CACHED_RESOLUTIONS:
+            self._bases.popitem(last=False)
+        return basis
+
+    def render(self, size, weights=None):
+        """
+        Evalúa el frente de onda en una rejilla del tamaño indicado.
+
+        Parámetros:
+        - size: lado de la rejilla cuadrada, o (alto, ancho)
+        - weights: coeficientes a usar en lugar de los propios (p. ej. sólo
+          los modos seleccionados), en la base del ajuste: con `transform`
+          son coeficientes anulares y se pasan a circulares
+
+        Retorna:
+        - array enmascarado (alto, ancho); fuera de la pupila queda enmascarado
+        """
+        shape = (int(size), int(size)) if np.isscalar(size) else tuple(int(s) for s in size)
+        basis = self._basis(shape)
+        if weights is None:
+            coeffs = self.coeffs
+        elif self.transform is not None:
+            coeffs = circular_coefficients(weights, self.transform)
+        else:
+            coeffs = np.asarray(weights, dtype=float)
+        data = basis.synthesize(coeffs)
+        return np.ma.masked_array(data, mask=~basis.mask)
+
+    def clear_cache(self):
+        """Olvida las bases de las resoluciones ya evaluadas."""
+        self._bases.clear()
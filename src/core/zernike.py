@@ -1,8 +1,17 @@
 # Copyright (c) 2025 Adrián Hernández Padrón
 # Licensed under the MIT License. See LICENSE file in the project root for full license information.
 
+from collections import OrderedDict
+from dataclasses import dataclass
 import numpy as np
 from scipy.special import factorial as fact
+from src.common.utils import mask_digest
+from src.common.tracing import traced
+
+# Número de bases anulares ortonormalizadas que se mantienen en memoria
+MAX_CACHED_BASES = 8
+
+_annular_bases = OrderedDict()
 
 def zernike_radial(n, m, rho):
     """
@@ -18,28 +27,116 @@ def zernike_radial(n, m, rho):
         R += coeff * rho ** (n - 2 * k)
     return R
 
-def zernike_polynomials(shape, mask, R_out, center, max_terms=23):
+# Orden de Noll de los 23 primeros modos (como WinRoddier)
+NOLL_INDICES = [
+    (0, 0), (1, 1), (1, -1), (2, 0), (2, -2), (2, 2),
+    (3, -1), (3, 1), (3, -3), (3, 3), (4, 0),
+    (4, -2), (4, 2), (5, -1), (5, 1), (5, -3), (5, 3),
+    (5, -5), (5, 5), (6, 0), (6, -2), (6, 2), (6, -4)
+]
+
+def noll_indices(n_terms):
     """
-    Parámetros:
-    - shape: (alto, ancho) de la imagen
-    - mask: máscara binaria de la pupila (anular)
-    - center: (cx, cy) centro de la pupila
-    - max_order: orden máximo de los polinomios (por defecto 23)
+    Índices (n, m) de los primeros `n_terms` modos.
 
-    Retorna:
-    - base: lista de arrays 2D con los polinomios ortonormalizados
+    Los 23 primeros son los de `NOLL_INDICES`. A partir de ahí se añaden, por
+    orden radial n creciente, los modos que aún no aparecen, recorriendo |m|
+    creciente y el negativo (seno) antes que el positivo (coseno).
     """
-    y, x = np.indices(shape)
-    cy, cx = center
-    x = x - cx
-    y = y - cy
-    r = np.sqrt(x**2 + y**2)
-    theta = np.arctan2(y, x)
+    indices = list(NOLL_INDICES[:n_terms])
+    seen = set(indices)
+    n = 0
+    while len(indices) < n_terms:
+        ms = [0] if n % 2 == 0 else []
+        for k in range(2 - n % 2, n + 1, 2):
+            ms += [-k, k]
+        for m in ms:
+            if (n, m) not in seen and len(indices) < n_terms:
+                indices.append((n, m))
+                seen.add((n, m))
+        n += 1
+    return indices
+
+
+@dataclass
+class PackedBasis:
+    """
+    Base de modos almacenada sólo sobre los píxeles de la pupila.
 
-    r /= R_out
-    r[mask == 0] = 0
-    theta[mask == 0] = 0
+    La base densa (n_modos, alto, ancho) es casi toda ceros fuera del anillo;
+    aquí se guardan los valores (n_modos, n_píxeles) junto con el índice plano
+    de cada píxel, y sólo se dispersa a 2D al representar.
+    """
+    values: np.ndarray  # (n_modos, n_píxeles de la pupila)
+    index: np.ndarray  # índices planos (en frame_shape) de los píxeles de la pupila
+    frame_shape: tuple  # (alto, ancho) de la imagen
+
+    @classmethod
+    def from_dense(cls, base, mask=None):
+        """Empaqueta una base densa; sin máscara se usa el soporte de los modos."""
+        base = np.asarray(base)
+        if mask is None:
+            mask = np.any(base != 0, axis=0)
+        index = np.flatnonzero(mask)
+        values = base.reshape(base.shape[0], -1)[:, index]
+        return cls(values, index, tuple(base.shape[1:]))
+
+    @property
+    def n_modes(self):
+        return self.values.shape[0]
+
+    @property
+    def shape(self):
+        """Forma de la base densa equivalente (n_modos, alto, ancho)."""
+        return (self.n_modes,) + tuple(self.frame_shape)
+
+    @property
+    def mask(self):
+        """Máscara booleana 2D de los píxeles de la pupila."""
+        mask = np.zeros(self.frame_shape, dtype=bool)
+        mask.flat[self.index] = True
+        return mask
+
+    def __len__(self):
+        return self.n_modes
+
+    def __getitem__(self, item):
+        """Un entero devuelve el modo como imagen 2D; un slice, otra base empaquetada."""
+        if isinstance(item, slice):
+            return PackedBasis(self.values[item], self.index, self.frame_shape)
+        return self.scatter(self.values[item])
+
+    def sample(self, image):
+        """Valores de una imagen 2D en los píxeles de la pupila."""
+        return np.asarray(image).reshape(-1)[self.index]
+
+    def scatter(self, pupil_values, fill=0.0):
+        """Dispersa valores de la pupila (..., n_píxeles) a imágenes (..., alto, ancho)."""
+        pupil_values = np.asarray(pupil_values)
+        leading = pupil_values.shape[:-1]
+        out = np.full(leading + (int(np.prod(self.frame_shape)),), fill, dtype=pupil_values.dtype)
+        out[..., self.index] = pupil_values
+        return out.reshape(leading + tuple(self.frame_shape))
 
+    def synthesize(self, coeffs):
+        """Frente de onda 2D suma de los modos ponderados por `coeffs`."""
+        coeffs = np.asarray(coeffs, dtype=float)
+        return self.scatter(coeffs @ self.values[:len(coeffs)])
+
+    def to_dense(self):
+        """Base densa (n_modos, alto, ancho)."""
+        return self.scatter(self.values)
+
+
+def as_packed_basis(base, mask=None):
+    """Devuelve `base` como PackedBasis, empaquetándola si es densa."""
+    if isinstance(base, PackedBasis):
+        return base
+    return PackedBasis.from_dense(base, mask)
+
+
+def _zernike_values(n_terms, r, theta):
+    """Evalúa los modos normalizados sobre coordenadas polares ya escaladas a R_out."""
     def R(n, m, r):
         Rnm = np.zeros_like(r)
         for k in range((n - abs(m)) // 2 + 1):
@@ -56,30 +153,99 @@ def zernike_polynomials(shape, mask, R_out, center, max_terms=23):
         else:
             return R(n, -m, r) * np.sin(-m * theta)
 
-    # Orden de Noll
-    noll_indices = [
-        (0, 0), (1, 1), (1, -1), (2, 0), (2, -2), (2, 2),
-        (3, -1), (3, 1), (3, -3), (3, 3), (4, 0),
-        (4, -2), (4, 2), (5, -1), (5, 1), (5, -3), (5, 3),
-        (5, -5), (5, 5), (6, 0), (6, -2), (6, 2), (6, -4)
-    ]
-
-    base = []
-    for idx, (n, m) in enumerate(noll_indices[:max_terms]):
-        Znm = Z(n, m, r, theta)
-
+    values = np.empty((n_terms,) + r.shape)
+    for idx, (n, m) in enumerate(noll_indices(n_terms)):
         # Normalización analítica (como hace WinRoddier)
         norm_factor = np.sqrt(2 * (n + 1)) if m != 0 else np.sqrt(n + 1)
-        Znm *= norm_factor
+        values[idx] = Z(n, m, r, theta) * norm_factor
+    return values
+
+
+@traced()
+def zernike_polynomials_packed(shape, mask, R_out, center, max_terms=23):
+    """
+    Igual que `zernike_polynomials`, pero evaluando sólo los píxeles de la pupila.
+
+    Retorna:
+    - PackedBasis con `max_terms` modos
+    """
+    index = np.flatnonzero(mask)
+    y, x = np.unravel_index(index, shape)
+    cy, cx = center
+    x = x - cx
+    y = y - cy
+    r = np.sqrt(x**2 + y**2) / R_out
+    theta = np.arctan2(y, x)
+
+    values = _zernike_values(max_terms, r, theta)
+    # Máscaras no binarias ponderan los modos como en la versión densa
+    values *= np.asarray(mask).reshape(-1)[index]
+    return PackedBasis(values, index, tuple(shape))
+
+
+@traced()
+def zernike_polynomials(shape, mask, R_out, center, max_terms=23):
+    """
+    Parámetros:
+    - shape: (alto, ancho) de la imagen
+    - mask: máscara binaria de la pupila (anular)
+    - center: (cx, cy) centro de la pupila
+    - max_order: orden máximo de los polinomios (por defecto 23)
+
+    Retorna:
+    - base: array (n_modos, alto, ancho) con los polinomios, nulos fuera de la máscara
+    """
+    return zernike_polynomials_packed(shape, mask, R_out, center, max_terms).to_dense()
+
+@traced()
+def annular_zernike_basis(shape, mask, R_out, center, max_terms=23):
+    """
+    Base de Zernike anular ortonormal sobre los píxeles de la máscara.
+
+    Los polinomios circulares dejan de ser ortogonales al restringirlos a un
+    anillo (obstrucción del secundario, R_in). Se ortonormalizan numéricamente
+    (Gram-Schmidt mediante QR, en orden de Noll) sobre la máscara real, de modo
+    que la obstrucción queda implícita en los píxeles de la pupila. Cada modo
+    tiene RMS unidad sobre la pupila, como los Zernike normalizados.
+
+    Parámetros:
+    - shape, mask, R_out, center, max_terms: como en `zernike_polynomials`
+
+    Retorna:
+    - base: PackedBasis con los modos ortonormales
+    - transform: matriz triangular superior T tal que Z_circulares = T^T · base
+      en la pupila (coeficientes circulares = T^-1 · coeficientes anulares)
+    """
+    mask = np.asarray(mask, dtype=bool)
+    key = (mask_digest(mask), float(R_out), tuple(float(c) for c in center), int(max_terms))
+    cached = _annular_bases.get(key)
+    if cached is not None:
+        _annular_bases.move_to_end(key)
+        return cached
+
+    circular = zernike_polynomials_packed(shape, mask, R_out, center, max_terms)
+    n_pupil = circular.index.size
+
+    q, r = np.linalg.qr(circular.values.T)
+    # Signo positivo en la diagonal: cada modo conserva el signo de su Zernike circular
+    signs = np.sign(np.diag(r))
+    signs[signs == 0] = 1
+    q *= signs * np.sqrt(n_pupil)
+    transform = (r * signs[:, np.newaxis]) / np.sqrt(n_pupil)
+
+    base = PackedBasis(np.ascontiguousarray(q.T), circular.index, circular.frame_shape)
 
-        # Aplicar máscara para limitar el dominio
-        Znm *= mask
-        #Znm /= np.sqrt(np.sum(Znm**2 * mask))
-        base.append(Znm)
+    _annular_bases[key] = (base, transform)
+    if len(_annular_bases) > MAX_CACHED_BASES:
+        _annular_bases.popitem(last=False)
+    return base, transform
 
-    return np.array(base)
+def wavefront_rms(coeffs):
+    """RMS del frente de onda (sin pistón) a partir de coeficientes en una base ortonormal."""
+    return float(np.sqrt(np.sum(np.asarray(coeffs)[1:]**2)))
 
-def fit_zernike(wavefront, mask, R_out, center, max_order=23):
+@traced()
+def fit_zernike(wavefront, mask, R_out, center, max_order=23, orthonormal=False):
     """Ajusta los coeficientes de Zernike al frente de onda.
 
     Args:
@@ -88,16 +254,20 @@ def fit_zernike(wavefront, mask, R_out, center, max_order=23):
         R_out: radio exterior de la pupila
         center: centro de la pupila (y, x)
         max_order: orden máximo de los polinomios (por defecto 23)
+        orthonormal: si True usa la base anular ortonormal y los coeficientes
+            son una simple proyección (sin mínimos cuadrados)
 
     Returns:
-        tuple: (coeficientes, base)
+        tuple: (coeficientes, base como PackedBasis)
     """
-    # Calcular la base de Zernike
-    base = zernike_polynomials(wavefront.shape, mask, R_out, center, max_order)
+    if orthonormal:
+        base, _ = annular_zernike_basis(wavefront.shape, mask, R_out, center, max_order)
+        coeffs = base.values @ base.sample(wavefront) / base.index.size
+        return coeffs, base
 
-    masked_wavefront = wavefront[mask]
-    masked_base = base[:, mask]
+    # Calcular la base de Zernike sólo sobre la pupila
+    base = zernike_polynomials_packed(wavefront.shape, mask, R_out, center, max_order)
 
     # Mínimos cuadrados para obtener coeficientes
-    coeffs, *_ = np.linalg.lstsq(masked_base.T, masked_wavefront, rcond=None)
+    coeffs, *_ = np.linalg.lstsq(base.values.T, base.sample(wavefront), rcond=None)
     return coeffs, base
\ No newline at end of file
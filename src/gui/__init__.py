@@ -1,5 +1,24 @@
-from .main_window import FitsViewer
-from .dialogs.roddiertestresults import RoddierTestResultsWindow
-from .dialogs.roddiertest import RoddierTestDialog
+from importlib import import_module
 
-__all__ = ['FitsViewer', 'ResultsWindow', 'ImageCropDialog']
+# Importación perezosa: los diálogos de resultados cargan matplotlib y el
+# pipeline completo, que no hacen falta para mostrar la ventana principal.
+_EXPORTS = {
+    'FitsViewer': '.main_window',
+    'RoddierTestResultsWindow': '.dialogs.roddiertestresults',
+    'RoddierTestDialog': '.dialogs.roddiertest',
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(import_module(module, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
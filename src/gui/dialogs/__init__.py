@@ -1,4 +1,22 @@
-from .roddiertestresults import RoddierTestResultsWindow
-from .roddiertest import RoddierTestDialog
+from importlib import import_module
 
-__all__ = ['RoddierTestResultsWindow', 'RoddierTestDialog']
+# Importación perezosa (ver src/gui/__init__.py)
+_EXPORTS = {
+    'RoddierTestResultsWindow': '.roddiertestresults',
+    'RoddierTestDialog': '.roddiertest',
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(import_module(module, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -7,6 +7,7 @@ import json
 import os
 from pathlib import Path
 from src.common.config import get_config_paths
+from src.common.utils import parse_binning
 
 class ConfigDialog(QDialog):
     def __init__(self, parent=None):
@@ -166,6 +167,9 @@ class ConfigDialog(QDialog):
                         self.image_path_edit.setText(config['image_path'])
                     if 'results_path' in config:
                         self.results_path_edit.setText(config['results_path'])
+                    if 'binning' in config:
+                        binning = parse_binning(config['binning'])
+                        self.binning_edit.setText(f"{binning}x{binning}")
         except Exception as e:
             QMessageBox.warning(self, "Error", f"Error al cargar las rutas: {str(e)}")
 
@@ -296,6 +300,13 @@ class ConfigDialog(QDialog):
             QMessageBox.warning(self, "Error", "Por favor, introduce valores numéricos válidos para los parámetros del telescopio.")
             return None
 
+    def get_binning(self):
+        """Retorna el factor de binning por software (1 si el campo no es válido)."""
+        try:
+            return parse_binning(self.binning_edit.text())
+        except ValueError:
+            return 1
+
     def get_config(self):
         """Retorna la configuración actual."""
         # Guardar las rutas en config.json
@@ -307,6 +318,7 @@ class ConfigDialog(QDialog):
 
             config['image_path'] = self.image_path_edit.text()
             config['results_path'] = self.results_path_edit.text()
+            config['binning'] = self.get_binning()
 
             # Crear el directorio si no existe
             self.config_file.parent.mkdir(parents=True, exist_ok=True)
@@ -319,5 +331,6 @@ class ConfigDialog(QDialog):
         return {
             'image_path': self.image_path_edit.text(),
             'results_path': self.results_path_edit.text(),
+            'binning': self.get_binning(),
             'config_path': self.config_path
         }
\ No newline at end of file
@@ -1,15 +1,53 @@
 from PyQt5.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QPushButton, QLabel,
-                          QFrame, QFormLayout, QGroupBox, QLineEdit, QMessageBox, QComboBox, )
-from PyQt5.QtCore import Qt
-from PyQt5.QtGui import QPixmap, QImage
+                          QFrame, QFormLayout, QGroupBox, QLineEdit, QMessageBox, QComboBox, QCheckBox,
+                          QSpinBox, )
+from PyQt5.QtCore import Qt, QTimer, QPointF
+from PyQt5.QtGui import QPixmap, QImage, QPainter, QPen, QColor
 import numpy as np
 import os
 from src.common.config import get_config_paths
-from src.common.utils import calculate_center_of_mass
+from src.common.utils import crop_around_center
 import json
 
+# Espera tras el último cambio de parámetros antes de repetir la vista previa (ms)
+PREVIEW_DELAY_MS = 40
+
+# Lado en pantalla de las imágenes de la vista previa
+PREVIEW_PIXELS = 150
+
+# Color de fondo del diálogo (fuera de la pupila en la vista previa)
+BACKGROUND_RGB = (43, 43, 43)
+
+def _rgb_pixmap(rgb, size=PREVIEW_PIXELS):
+    """QPixmap de un array (alto, ancho, 3) uint8 escalado a `size` píxeles."""
+    rgb = np.ascontiguousarray(rgb)
+    height, width, _ = rgb.shape
+    q_image = QImage(rgb.data, width, height, 3 * width, QImage.Format_RGB888).copy()
+    return QPixmap.fromImage(q_image).scaled(size, size, Qt.KeepAspectRatio, Qt.FastTransformation)
+
+def mask_overlay(image, mask):
+    """Imagen en grises con la máscara de la pupila teñida de azul (array uint8 RGB)."""
+    normalized = image - np.min(image)
+    peak = np.max(normalized)
+    gray = normalized / peak if peak > 0 else normalized
+    rgb = np.repeat(gray[..., np.newaxis], 3, axis=2)
+    inside = np.asarray(mask) != 0
+    rgb[inside] = 0.6 * rgb[inside] + 0.4 * np.array([0.1, 0.45, 0.9])
+    return (rgb * 255).astype(np.uint8)
+
+def wavefront_colors(wavefront):
+    """Mapa divergente azul-blanco-rojo de un frente de onda enmascarado (array uint8 RGB)."""
+    data = np.ma.getdata(wavefront)
+    outside = np.ma.getmaskarray(wavefront)
+    limit = np.max(np.abs(data[~outside])) if np.any(~outside) else 0.0
+    v = np.clip(data / limit, -1, 1) if limit > 0 else np.zeros_like(data)
+    rgb = np.stack([1 + np.minimum(v, 0), 1 - np.abs(v), 1 - np.maximum(v, 0)], axis=-1)
+    rgb = (rgb * 255).astype(np.uint8)
+    rgb[outside] = BACKGROUND_RGB
+    return rgb
+
 class RoddierTestDialog(QDialog):
-    def __init__(self, intra_image, extra_image, crop_size=250, parent=None):
+    def __init__(self, intra_image, extra_image, crop_size=250, parent=None, binning=None):
         super().__init__(parent)
         self.setWindowTitle("Test de Roddier")
         self.setModal(True)
@@ -22,6 +60,8 @@ class RoddierTestDialog(QDialog):
         self.intra_image = intra_image
         self.extra_image = extra_image
         self.crop_size = crop_size
+        # Binning ya aplicado al cargar las imágenes (None si no se conoce)
+        self.binning = binning
         self.crop_center = None
         self.cropped_intra = None
         self.cropped_extra = None
@@ -40,7 +80,10 @@ class RoddierTestDialog(QDialog):
         self.roddier_params = {
             'max_order': 23,  # orden máximo de Zernike
             'threshold': 0.5,  # threshold para la máscara
-            'crop_size': crop_size  # tamaño del recorte
+            'crop_size': crop_size,  # tamaño del recorte
+            'solver': 'zonal',  # método de reconstrucción
+            'annular_basis': False,  # base de Zernike anular ortonormal
+            'uncertainty_replicas': 0  # réplicas Monte Carlo para los errores (0: sin errores)
         }
 
         # Interferogram parameters
@@ -85,6 +128,37 @@ class RoddierTestDialog(QDialog):
         self.extra_layout.addWidget(self.extra_label)
         self.image_layout.addWidget(self.extra_container)
 
+        # Vista previa sobre un proxy de baja resolución (máscara, radios y bajo orden)
+        self.preview_container = QFrame()
+        self.preview_container.setFrameStyle(QFrame.StyledPanel)
+        self.preview_layout = QVBoxLayout(self.preview_container)
+        self.preview_title = QLabel("Vista previa")
+        self.preview_title.setAlignment(Qt.AlignCenter)
+        self.preview_layout.addWidget(self.preview_title)
+        preview_images = QHBoxLayout()
+        self.preview_mask_label = QLabel(self)
+        self.preview_mask_label.setAlignment(Qt.AlignCenter)
+        self.preview_mask_label.setToolTip("Máscara de la pupila y radios exterior e interior")
+        preview_images.addWidget(self.preview_mask_label)
+        self.preview_wavefront_label = QLabel(self)
+        self.preview_wavefront_label.setAlignment(Qt.AlignCenter)
+        self.preview_wavefront_label.setToolTip("Frente de onda de bajo orden (tilt, defocus, astigmatismo y coma)")
+        preview_images.addWidget(self.preview_wavefront_label)
+        self.preview_layout.addLayout(preview_images)
+        self.preview_info = QLabel(self)
+        self.preview_info.setAlignment(Qt.AlignCenter)
+        self.preview_info.setWordWrap(True)
+        self.preview_layout.addWidget(self.preview_info)
+        self.image_layout.addWidget(self.preview_container)
+
+        # La vista previa se repite cuando los parámetros dejan de cambiar
+        self.preview_runner = None
+        self.preview = None
+        self.preview_timer = QTimer(self)
+        self.preview_timer.setSingleShot(True)
+        self.preview_timer.setInterval(PREVIEW_DELAY_MS)
+        self.preview_timer.timeout.connect(self.update_preview)
+
         layout.addWidget(self.image_container)
 
         # Grupo para los parámetros del telescopio
@@ -114,6 +188,11 @@ class RoddierTestDialog(QDialog):
         # Campo para binning
         self.binning_edit = QLineEdit()
         self.binning_edit.setText("1x1")
+        if self.binning is not None:
+            # El binning se aplica al cargar: aquí sólo se informa
+            self.binning_edit.setText(f"{self.binning}x{self.binning}")
+            self.binning_edit.setReadOnly(True)
+            self.binning_edit.setToolTip("Binning aplicado al cargar las imágenes (se cambia en Configuración)")
         telescope_layout.addRow("Binning:", self.binning_edit)
 
         # ComboBox para cargar configuraciones
@@ -138,6 +217,29 @@ class RoddierTestDialog(QDialog):
         self.threshold_edit.setText("0.5")
         roddier_layout.addRow("Threshold:", self.threshold_edit)
 
+        # Tamaño del recorte alrededor del centro de masa
+        self.crop_size_spin = QSpinBox()
+        self.crop_size_spin.setRange(32, max(4096, crop_size))
+        self.crop_size_spin.setSingleStep(2)
+        self.crop_size_spin.setValue(crop_size)
+        self.crop_size_spin.valueChanged.connect(self.set_crop_size)
+        roddier_layout.addRow("Tamaño del recorte (px):", self.crop_size_spin)
+
+        # Método de reconstrucción del frente de onda
+        self.solver_combo = QComboBox()
+        self.solver_combo.addItem("Zonal (ecuación de Poisson)", 'zonal')
+        self.solver_combo.addItem("Modal (directo desde ΔI/I)", 'modal')
+        self.solver_combo.addItem("Iterativo (refinamiento con propagación)", 'iterative')
+        roddier_layout.addRow("Método de reconstrucción:", self.solver_combo)
+
+        # Base ortonormal sobre la pupila anular (proyección en lugar de mínimos cuadrados)
+        self.annular_basis_check = QCheckBox("Base de Zernike anular ortonormal")
+        roddier_layout.addRow("", self.annular_basis_check)
+
+        # Errores de los coeficientes por Monte Carlo sobre el ruido de las imágenes
+        self.uncertainty_check = QCheckBox("Estimar la incertidumbre de los coeficientes")
+        roddier_layout.addRow("", self.uncertainty_check)
+
         roddier_group.setLayout(roddier_layout)
         layout.addWidget(roddier_group)
 
@@ -242,36 +344,17 @@ class RoddierTestDialog(QDialog):
             }
         """)
 
+        # Los cambios de umbral y telescopio repiten la vista previa
+        for edit in (self.threshold_edit, self.focal_edit, self.apertura_edit, self.tamano_pixel_edit):
+            edit.textChanged.connect(self.schedule_preview)
+
         # Mostrar los recortes iniciales
         self.update_images()
+        self.schedule_preview()
 
     def crop_image(self, image):
         """Recorta la imagen al tamaño especificado centrada en el centro de masa."""
-        if image is None:
-            return None
-
-        # Calcular el centro de masa
-        com_y, com_x = calculate_center_of_mass(image)
-        # Calcular los límites del recorte
-        half_size = self.crop_size // 2
-        y_start = max(0, com_y - half_size)
-        y_end = min(image.shape[0], com_y + half_size)
-        x_start = max(0, com_x - half_size)
-        x_end = min(image.shape[1], com_x + half_size)
-
-        # Asegurarse de que el recorte tenga el tamaño correcto
-        cropped = image[y_start:y_end, x_start:x_end]
-
-        # Si el recorte es más pequeño que crop_size, rellenar con ceros
-        if cropped.shape[0] < self.crop_size or cropped.shape[1] < self.crop_size:
-            padded = np.zeros((self.crop_size, self.crop_size))
-            y_offset = (self.crop_size - cropped.shape[0]) // 2
-            x_offset = (self.crop_size - cropped.shape[1]) // 2
-            padded[y_offset:y_offset+cropped.shape[0],
-                   x_offset:x_offset+cropped.shape[1]] = cropped
-            return padded
-
-        return cropped
+        return crop_around_center(image, self.crop_size)
 
     def update_images(self):
         """Actualiza las imágenes recortadas."""
@@ -285,6 +368,77 @@ class RoddierTestDialog(QDialog):
             if self.cropped_extra is not None:
                 self.extra_label.setPixmap(self.create_pixmap(self.cropped_extra))
 
+    def set_crop_size(self, crop_size):
+        """Cambia el tamaño del recorte y actualiza los recortes y la vista previa."""
+        self.crop_size = crop_size
+        self.roddier_params['crop_size'] = crop_size
+        self.update_images()
+        self.schedule_preview()
+
+    def schedule_preview(self):
+        """Repite la vista previa tras PREVIEW_DELAY_MS sin nuevos cambios."""
+        self.preview_timer.start()
+
+    def _preview_telescope_params(self):
+        """Parámetros del telescopio para la vista previa, sin avisos; None si no son válidos."""
+        try:
+            params = {'apertura': float(self.apertura_edit.text()), 'focal': float(self.focal_edit.text()),
+                      'tamano_pixel': float(self.tamano_pixel_edit.text()) * (self.binning or 1)}
+        except ValueError:
+            return None
+        return params if all(value > 0 for value in params.values()) else None
+
+    def update_preview(self):
+        """Repite el test sobre el proxy de baja resolución y muestra máscara, radios y bajo orden."""
+        try:
+            threshold = float(self.threshold_edit.text())
+        except ValueError:
+            self.preview_info.setText("Threshold no válido")
+            return
+        if self.cropped_intra is None or self.cropped_extra is None:
+            return
+
+        from src.core.preview import PreviewRunner
+        if self.preview_runner is None:
+            self.preview_runner = PreviewRunner()
+        try:
+            with np.errstate(all='ignore'):
+                preview = self.preview_runner.update(self.cropped_intra, self.cropped_extra, threshold,
+                                                     self._preview_telescope_params())
+        except Exception as e:
+            # Un umbral extremo puede dejar la máscara vacía: se informa sin cerrar el diálogo
+            self.preview = None
+            self.preview_mask_label.clear()
+            self.preview_wavefront_label.clear()
+            self.preview_info.setText(f"Sin vista previa: {e}")
+            return
+
+        self.preview = preview
+        self.preview_mask_label.setPixmap(self._radii_pixmap(preview))
+        self.preview_wavefront_label.setPixmap(
+            _rgb_pixmap(wavefront_colors(preview.wavefront.render(PREVIEW_PIXELS))))
+        factor = preview.factor
+        text = (f"R ext. {preview.R_out * factor:.0f} px, R int. {preview.R_in * factor:.0f} px · "
+                f"proxy {factor}x, {preview.elapsed * 1000:.0f} ms")
+        if preview.calibrated:
+            text += f"\nRMS astigmatismo + coma: {preview.rms:.4f}"
+        self.preview_info.setText(text)
+
+    def _radii_pixmap(self, preview):
+        """Proxy con la máscara y las circunferencias de los radios exterior e interior."""
+        pixmap = _rgb_pixmap(mask_overlay(preview.image, preview.annular_mask))
+        scale = pixmap.width() / preview.image.shape[1]
+        cx, cy = preview.center
+        center = QPointF((cx + 0.5) * scale, (cy + 0.5) * scale)
+        painter = QPainter(pixmap)
+        painter.setRenderHint(QPainter.Antialiasing)
+        for radius, color in ((preview.R_out, QColor(255, 140, 0)), (preview.R_in, QColor(255, 235, 59))):
+            if radius > 0:
+                painter.setPen(QPen(color, 1.5))
+                painter.drawEllipse(center, radius * scale, radius * scale)
+        painter.end()
+        return pixmap
+
     def create_pixmap(self, image_data):
         """Converts image data into a QPixmap for display in QLabel."""
         if image_data is not None and np.any(image_data):
@@ -378,10 +532,14 @@ class RoddierTestDialog(QDialog):
             if not self.threshold_edit.text():
                 self.threshold_edit.setText("0.5")
 
+            from src.core.uncertainty import REPLICAS
             return {
                 'max_order': int(self.max_order_edit.text()),
                 'threshold': float(self.threshold_edit.text()),
-                'crop_size': self.crop_size
+                'crop_size': self.crop_size,
+                'solver': self.solver_combo.currentData(),
+                'annular_basis': self.annular_basis_check.isChecked(),
+                'uncertainty_replicas': REPLICAS if self.uncertainty_check.isChecked() else 0
             }
         except ValueError:
             QMessageBox.warning(self, "Error", "Por favor, introduce valores numéricos válidos para los parámetros del test de Roddier.")
@@ -416,7 +574,8 @@ class RoddierTestDialog(QDialog):
             self.focal_edit.clear()
             self.apertura_edit.clear()
             self.tamano_pixel_edit.clear()
-            self.binning_edit.setText("1x1")
+            if self.binning is None:
+                self.binning_edit.setText("1x1")
             return
 
         config_name = self.config_combo.currentText()
@@ -433,7 +592,8 @@ class RoddierTestDialog(QDialog):
                 self.focal_edit.setText(str(params.get('focal', '')))
                 self.apertura_edit.setText(str(params.get('apertura', '')))
                 self.tamano_pixel_edit.setText(str(params.get('tamano_pixel', '')))
-                self.binning_edit.setText(str(params.get('binning', '1x1')))
+                if self.binning is None:
+                    self.binning_edit.setText(str(params.get('binning', '1x1')))
         except Exception as e:
             QMessageBox.warning(self, "Error", f"Error al cargar la configuración: {str(e)}")
 
@@ -1,3 +1,4 @@
+import os
 import numpy as np
 from PyQt5.QtWidgets import (QDialog, QVBoxLayout, QCheckBox, QScrollArea,
                              QWidget, QHBoxLayout, QPushButton, QFileDialog)
@@ -6,8 +7,11 @@ from PyQt5.QtGui import QColor, QPalette
 from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
 from matplotlib.figure import Figure
 import matplotlib.pyplot as plt
+from astropy.io import fits
 from src.core.interferometry import calculate_interferogram
 from src.core.psf import calculate_psf
+from src.core.zernike import as_packed_basis
+from src.common.tracing import traced
 
 ZERN_NAMES = [
     "Piston", "Tilt X", "Tilt Y", "Defocus",
@@ -28,10 +32,17 @@ class RoddierTestResultsWindow(QDialog):
 
         self.zernike_coeffs = None
         self.zernike_base = None
+        self._packed_base = None
+        self.wavefront = None
         self.zernike_checks = []
         self.annular_mask = None
         self.interferogram_params = None
         self.telescope_params = None
+        self.fft_shape = None
+        self.frame_scores = {}  # 'intra'/'extra' -> FrameScore de los vídeos apilados
+        self.coeff_errors = None  # error típico de cada coeficiente, si se estimó
+        self._error_bars = None
+        self._images = {}  # figura -> (imagen, barra de color) dibujadas, para actualizarlas en sitio
 
         # Layout principal
         layout = QVBoxLayout(self)
@@ -110,15 +121,32 @@ class RoddierTestResultsWindow(QDialog):
         button_layout = QHBoxLayout()
         export_button = QPushButton("Exportar Resultados")
         export_button.clicked.connect(self.export_results)
+        export_map_button = QPushButton("Exportar mapa del frente de onda")
+        export_map_button.clicked.connect(self.export_wavefront_map)
         close_button = QPushButton("Cerrar")
         close_button.clicked.connect(self.accept)
         button_layout.addWidget(export_button)
+        button_layout.addWidget(export_map_button)
         button_layout.addWidget(close_button)
         layout.addLayout(button_layout)
 
-    def update_plots(self, zernike_coeffs, zernike_base, annular_mask, interferogram_params, telescope_params):
+    def update_plots(self, zernike_coeffs, zernike_base, annular_mask, interferogram_params, telescope_params,
+                     fft_shape=None, wavefront=None, coeff_errors=None):
+        """
+        Actualiza todos los gráficos con un nuevo resultado.
+
+        `wavefront` (LazyWavefront, opcional) permite mostrar el frente de onda
+        a la resolución del lienzo y exportarlo a cualquier tamaño; sin él se
+        muestra a la resolución del recorte. Con `coeff_errors` se dibujan
+        barras de error en el histograma.
+        """
+        self.fft_shape = fft_shape
+        self.coeff_errors = coeff_errors
+        self.wavefront = wavefront
         self.zernike_coeffs = zernike_coeffs
         self.zernike_base = zernike_base
+        # Base empaquetada sobre la pupila: los modos sólo se dispersan a 2D al dibujar
+        self._packed_base = as_packed_basis(zernike_base)
         self.annular_mask = annular_mask
         self.interferogram_params = interferogram_params
         self.telescope_params = telescope_params
@@ -127,47 +155,78 @@ class RoddierTestResultsWindow(QDialog):
         self._update_wavefront_plot()
         self._update_histogram()
 
+    def show_result(self, result, settings):
+        """Muestra un RoddierResult con los parámetros (RoddierSettings) con que se obtuvo."""
+        self.update_plots(
+            zernike_coeffs=result.zernike_coeffs,
+            zernike_base=result.zernike_base,
+            annular_mask=result.annular_mask,
+            interferogram_params=settings.interferogram_params,
+            telescope_params=settings.telescope_params,
+            fft_shape=result.fft_shape,
+            wavefront=result.wavefront,
+            coeff_errors=result.coeff_errors
+        )
+
+    def set_frame_scores(self, frame_scores):
+        """Puntuaciones de calidad de los fotogramas ('intra'/'extra') que se exportan con los resultados."""
+        self.frame_scores = {label: scores for label, scores in frame_scores.items() if scores}
+
     def _create_checkboxes(self):
+        # Limitar a máximo 23 elementos (0-22)
+        max_terms = min(len(self.zernike_coeffs), 23)
+
+        if len(self.zernike_checks) == max_terms:
+            # Mismos modos (p. ej. un nuevo par en modo en vivo): se actualizan las
+            # etiquetas y se conserva la selección del usuario
+            for i, cb in enumerate(self.zernike_checks):
+                self._style_checkbox(cb, i, self.zernike_coeffs[i])
+            return
+
         for cb in self.zernike_checks:
             self.checkbox_layout.removeWidget(cb)
             cb.deleteLater()
         self.zernike_checks = []
 
-        # Limitar a máximo 23 elementos (0-22)
-        max_terms = min(len(self.zernike_coeffs), 23)
-
         for i, coeff in enumerate(self.zernike_coeffs[:max_terms]):
-            name = ZERN_NAMES[i] if i < len(ZERN_NAMES) else f"Z{i+1}"
-            label = f"Z{i+1} – {name} ({coeff:.3f})"
-            cb = QCheckBox(label)
+            cb = QCheckBox()
+            self._style_checkbox(cb, i, coeff)
             cb.setChecked(i != 0)
-            cb.stateChanged.connect(self._update_wavefront_plot)
-
-            magnitude = abs(coeff)
-            color = QColor("lightgray")
-            if magnitude > 0.01:
-                color = QColor("#FFCC66")
-            if magnitude > 0.05:
-                color = QColor("#FF9966")
-            if magnitude > 0.1:
-                color = QColor("#FF6666")
-
-            palette = cb.palette()
-            palette.setColor(QPalette.Base, color)
-            palette.setColor(QPalette.Window, color)
-            cb.setAutoFillBackground(True)
-            cb.setPalette(palette)
-
+            # La señal pasa el estado, que el método (decorado con `traced`) no admite
+            cb.stateChanged.connect(lambda _state: self._update_wavefront_plot())
             self.checkbox_layout.addWidget(cb)
             self.zernike_checks.append(cb)
 
+    def _style_checkbox(self, cb, i, coeff):
+        """Etiqueta y color de fondo (según la magnitud del coeficiente) del modo i."""
+        name = ZERN_NAMES[i] if i < len(ZERN_NAMES) else f"Z{i+1}"
+        if self.coeff_errors is not None and i < len(self.coeff_errors):
+            cb.setText(f"Z{i+1} – {name} ({coeff:.3f} ± {self.coeff_errors[i]:.3f})")
+        else:
+            cb.setText(f"Z{i+1} – {name} ({coeff:.3f})")
+
+        magnitude = abs(coeff)
+        color = QColor("lightgray")
+        if magnitude > 0.01:
+            color = QColor("#FFCC66")
+        if magnitude > 0.05:
+            color = QColor("#FF9966")
+        if magnitude > 0.1:
+            color = QColor("#FF6666")
+
+        palette = cb.palette()
+        palette.setColor(QPalette.Base, color)
+        palette.setColor(QPalette.Window, color)
+        cb.setAutoFillBackground(True)
+        cb.setPalette(palette)
+
+    @traced('results.wavefront_plot', category='gui')
     def _update_wavefront_plot(self):
         if self.zernike_base is None or self.zernike_coeffs is None:
             return
 
-        active_contrib = np.zeros_like(self.zernike_base[0])
-
-        higher_order_sum = 0
+        # Pesos de los modos seleccionados
+        weights = np.zeros(len(self.zernike_coeffs))
 
         # Limitar a máximo 23 elementos (0-22)
         max_terms = min(len(self.zernike_checks), 23)
@@ -175,12 +234,12 @@ class RoddierTestResultsWindow(QDialog):
         for i, cb in enumerate(self.zernike_checks[:max_terms]):
             if cb.isChecked():
                 if i == 22:  # Último término (22) es la suma de los superiores
-                    # Sumar todos los coeficientes por encima del término 22
-                    for j in range(22, len(self.zernike_coeffs)):
-                        higher_order_sum += self.zernike_coeffs[j] * self.zernike_base[j]
-                    active_contrib += higher_order_sum
+                    weights[22:] = self.zernike_coeffs[22:]
                 else:
-                    active_contrib += self.zernike_coeffs[i] * self.zernike_base[i]
+                    weights[i] = self.zernike_coeffs[i]
+
+        active_contrib = self._packed_base.synthesize(weights)
+        self._active_weights = weights
 
         # Aplicar máscara anular si existe
         if hasattr(self, 'annular_mask') and self.annular_mask is not None:
@@ -190,34 +249,65 @@ class RoddierTestResultsWindow(QDialog):
             active_contrib = np.ma.masked_array(active_contrib, mask=mask)
 
 
-        # Limpiar figura y ejes anteriores
-        self.wavefront_ax.clear()
-        self.wavefront_fig.clf()
-        self.wavefront_ax = self.wavefront_fig.add_subplot(111)
-
-        # Crear un mapa de colores personalizado que tenga blanco para valores enmascarados
-        cmap = plt.cm.nipy_spectral
-        cmap.set_bad('white')  # Establecer el color para valores enmascarados como blanco
-
         # Rotar la imagen 180 grados antes de mostrarla
         wavefront_for_calc = np.ma.getdata(active_contrib)  # sin máscara, sin rotación
+        if self.wavefront is not None:
+            # Evaluar a la resolución del lienzo en lugar de la del recorte
+            active_contrib = self.wavefront.render(self._display_size(), weights)
         wavefront_for_display = np.flipud(active_contrib)   # solo para mostrar
-        # Visualizar con escalas fijas simétricas
-        im = self.wavefront_ax.imshow(
-            wavefront_for_display,
-            origin='lower',
-            cmap=cmap,
-            aspect='equal'
-        )
 
-        self.wavefront_fig.colorbar(im, ax=self.wavefront_ax)
-        self.wavefront_ax.set_title("Suma de modos Zernike seleccionados")
-        self.wavefront_canvas.draw()
+        if not self._update_image('wavefront', wavefront_for_display):
+            # Limpiar figura y ejes anteriores
+            self.wavefront_ax.clear()
+            self.wavefront_fig.clf()
+            self.wavefront_ax = self.wavefront_fig.add_subplot(111)
+
+            # Crear un mapa de colores personalizado que tenga blanco para valores enmascarados
+            cmap = plt.cm.nipy_spectral
+            cmap.set_bad('white')  # Establecer el color para valores enmascarados como blanco
+
+            # Visualizar con escalas fijas simétricas
+            im = self.wavefront_ax.imshow(
+                wavefront_for_display,
+                origin='lower',
+                cmap=cmap,
+                aspect='equal'
+            )
+
+            colorbar = self.wavefront_fig.colorbar(im, ax=self.wavefront_ax)
+            self.wavefront_ax.set_title("Suma de modos Zernike seleccionados")
+            self.wavefront_canvas.draw()
+            self._images['wavefront'] = (im, colorbar)
 
         # Actualizar el interferograma y la PSF
         self._update_interferogram_plot(wavefront_for_calc)
         self._update_psf_plot(wavefront_for_calc)
 
+    def _update_image(self, key, data):
+        """
+        Sustituye los datos de la imagen ya dibujada en una figura, sin rehacer
+        los ejes, si tiene la misma forma. Rehacer los ejes (marcas, textos) es
+        lo que más cuesta al redibujar cada par en modo en vivo.
+
+        Retorna:
+        - True si se ha actualizado; False si hay que dibujar la figura de nuevo
+        """
+        image, colorbar = self._images.get(key, (None, None))
+        if image is None or image.get_array().shape != np.shape(data):
+            return False
+        image.set_data(data)
+        image.autoscale()
+        if colorbar is not None:
+            colorbar.update_normal(image)
+        image.axes.figure.canvas.draw_idle()
+        return True
+
+    def _display_size(self):
+        """Lado en píxeles de pantalla disponible para el mapa del frente de onda."""
+        width, height = self.wavefront_canvas.get_width_height()
+        return int(np.clip(min(width, height), 64, 1024))
+
+    @traced('results.interferogram_plot', category='gui')
     def _update_interferogram_plot(self, wavefront):
         if wavefront is None or self.annular_mask is None or self.interferogram_params is None:
             return
@@ -230,6 +320,9 @@ class RoddierTestResultsWindow(QDialog):
             self.annular_mask
         )
 
+        if self._update_image('interferogram', interferogram):
+            return
+
         # Limpiar figura y ejes anteriores
         self.interferogram_ax.clear()
         self.interferogram_fig.clf()
@@ -244,7 +337,9 @@ class RoddierTestResultsWindow(QDialog):
 
         self.interferogram_ax.set_title("Interferograma")
         self.interferogram_canvas.draw()
+        self._images['interferogram'] = (im, None)
 
+    @traced('results.psf_plot', category='gui')
     def _update_psf_plot(self, wavefront):
         if wavefront is None or self.annular_mask is None or self.telescope_params is None:
             return
@@ -252,9 +347,14 @@ class RoddierTestResultsWindow(QDialog):
         # Calcular la PSF
         psf, psf_log = calculate_psf(
             wavefront,  # Aplicar la máscara al frente de onda
-            self.annular_mask  # Usar la máscara anular como pupila
+            self.annular_mask,  # Usar la máscara anular como pupila
+            fft_shape=self.fft_shape
         )
 
+        # Se conserva el zoom del usuario si sólo cambian los datos
+        if self._update_image('psf', psf_log):
+            return
+
         # Limpiar figura y ejes anteriores
         self.psf_ax.clear()
         self.psf_fig.clf()
@@ -268,8 +368,9 @@ class RoddierTestResultsWindow(QDialog):
         )
 
         self.psf_ax.set_title("PSF (escala logarítmica)")
-        self.psf_fig.colorbar(im, ax=self.psf_ax)
+        colorbar = self.psf_fig.colorbar(im, ax=self.psf_ax)
         self.psf_canvas.draw()
+        self._images['psf'] = (im, colorbar)
 
     def _on_psf_scroll(self, event):
         """Manejador del evento de scroll para hacer zoom en la PSF."""
@@ -306,7 +407,37 @@ class RoddierTestResultsWindow(QDialog):
         with open(path, 'w') as f:
             for i, coeff in enumerate(self.zernike_coeffs):
                 name = ZERN_NAMES[i] if i < len(ZERN_NAMES) else f"Z{i+1}"
-                f.write(f"Z{i+1} - {name}: {coeff:.6f}\n")
+                if self.coeff_errors is not None:
+                    f.write(f"Z{i+1} - {name}: {coeff:.6f} ± {self.coeff_errors[i]:.6f}\n")
+                else:
+                    f.write(f"Z{i+1} - {name}: {coeff:.6f}\n")
+        if self.frame_scores:
+            self.export_frame_scores(os.path.splitext(path)[0] + '_frames.csv')
+
+    def export_frame_scores(self, path):
+        """Guarda en CSV la calidad de los fotogramas de los vídeos apilados, con una columna 'video'."""
+        from src.core.quality import append_scores_csv, save_scores_csv
+        for i, (label, scores) in enumerate(self.frame_scores.items()):
+            (save_scores_csv if i == 0 else append_scores_csv)(scores, path, label)
+
+    def export_wavefront_map(self, path=None, size=2048):
+        """Guarda en FITS el frente de onda de los modos seleccionados a `size` x `size` píxeles."""
+        if self.zernike_coeffs is None:
+            return
+        if path is None:
+            path, _ = QFileDialog.getSaveFileName(self, "Guardar mapa del frente de onda",
+                                                  "wavefront.fits", "FITS Files (*.fits)")
+            if not path:
+                return
+
+        weights = getattr(self, '_active_weights', None)
+        if self.wavefront is not None:
+            data = self.wavefront.render(size, weights).filled(np.nan)
+        else:
+            # Sin geometría sólo se puede exportar a la resolución del recorte
+            data = self._packed_base.synthesize(self.zernike_coeffs if weights is None else weights)
+            data[~self._packed_base.mask] = np.nan
+        fits.writeto(path, data.astype(np.float32), overwrite=True)
 
     def _select_all_modes(self):
         """Marca todos los modos de Zernike de manera eficiente."""
@@ -328,6 +459,7 @@ class RoddierTestResultsWindow(QDialog):
         # Actualizar el plot una sola vez
         self._update_wavefront_plot()
 
+    @traced('results.histogram', category='gui')
     def _update_histogram(self):
         if self.zernike_coeffs is None:
             return
@@ -337,21 +469,26 @@ class RoddierTestResultsWindow(QDialog):
         coeffs = self.zernike_coeffs[:max_terms]
         names = [ZERN_NAMES[i] if i < len(ZERN_NAMES) else f"Z{i+1}" for i in range(max_terms)]
 
+        bars = self.histogram_ax.patches
+        if len(bars) == max_terms:
+            # Mismos modos: se actualizan las barras sin rehacer los ejes
+            for bar, coeff in zip(bars, coeffs):
+                bar.set_height(coeff)
+            self._color_bars(bars)
+            self._draw_error_bars(coeffs)
+            self.histogram_ax.relim()
+            self.histogram_ax.autoscale_view()
+            self.histogram_canvas.draw_idle()
+            return
+
         # Limpiar el histograma anterior
         self.histogram_ax.clear()
+        self._error_bars = None
 
         # Crear el histograma
         bars = self.histogram_ax.bar(range(max_terms), coeffs, color='skyblue')
-
-        # Colorear las barras según la magnitud
-        for bar in bars:
-            magnitude = abs(bar.get_height())
-            if magnitude > 0.1:
-                bar.set_color('#FF6666')
-            elif magnitude > 0.05:
-                bar.set_color('#FF9966')
-            elif magnitude > 0.01:
-                bar.set_color('#FFCC66')
+        self._color_bars(bars)
+        self._draw_error_bars(coeffs)
 
         # Configurar el histograma
         self.histogram_ax.set_xticks(range(max_terms))
@@ -363,3 +500,27 @@ class RoddierTestResultsWindow(QDialog):
         # Ajustar el layout para acomodar las etiquetas largas
         self.histogram_fig.subplots_adjust(bottom=0.3)  # Aumentar espacio para las etiquetas
         self.histogram_canvas.draw()
+
+    def _draw_error_bars(self, coeffs):
+        """Dibuja (o quita) las barras de error de los coeficientes mostrados."""
+        if self._error_bars is not None:
+            self._error_bars.remove()
+            self._error_bars = None
+        if self.coeff_errors is None:
+            return
+        errors = np.asarray(self.coeff_errors)[:len(coeffs)]
+        self._error_bars = self.histogram_ax.errorbar(range(len(coeffs)), coeffs, yerr=errors, fmt='none',
+                                                      ecolor='black', elinewidth=1, capsize=3)
+
+    def _color_bars(self, bars):
+        """Colorea las barras según la magnitud del coeficiente."""
+        for bar in bars:
+            magnitude = abs(bar.get_height())
+            if magnitude > 0.1:
+                bar.set_color('#FF6666')
+            elif magnitude > 0.05:
+                bar.set_color('#FF9966')
+            elif magnitude > 0.01:
+                bar.set_color('#FFCC66')
+            else:
+                bar.set_color('skyblue')
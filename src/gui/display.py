@@ -0,0 +1,174 @@
+# Copyright (c) 2025 Adrián Hernández Padrón
+# Licensed under the MIT License. See LICENSE file in the project root for full license information.
+
+import numpy as np
+from PyQt5.QtGui import QImage
+
+STRETCH_MODES = ('linear', 'percentile', 'asinh', 'log')
+
+# Número de niveles de la tabla para datos que no son enteros de 8/16 bits
+LUT_LEVELS = 65536
+
+
+def sample_pixels(image, max_samples=65536, seed=0):
+    """
+    Extrae una submuestra aleatoria (reproducible) de los píxeles de la imagen.
+
+    Parámetros:
+    - image: array 2D
+    - max_samples: número máximo de píxeles a muestrear
+    - seed: semilla del generador aleatorio
+
+    Retorna:
+    - array 1D con los valores muestreados
+    """
+    flat = image.reshape(-1)
+    if flat.size <= max_samples:
+        return flat
+    rng = np.random.default_rng(seed)
+    idx = rng.integers(0, flat.size, size=max_samples)
+    return flat[idx]
+
+
+def _histogram_limits(image, low, high):
+    """Percentiles exactos a partir del histograma de una imagen entera sin signo."""
+    counts = np.bincount(image.reshape(-1), minlength=np.iinfo(image.dtype).max + 1)
+    cdf = np.cumsum(counts)
+    total = cdf[-1]
+    vmin = int(np.searchsorted(cdf, total * low / 100.0, side='left'))
+    vmax = int(np.searchsorted(cdf, total * high / 100.0, side='left'))
+    # Con low=0 el primer nivel no vacío es el mínimo real
+    if low <= 0:
+        vmin = int(np.argmax(counts > 0))
+    return vmin, vmax
+
+
+def compute_stretch_limits(image, mode='linear', low_percentile=0.5, high_percentile=99.5,
+                           max_samples=65536):
+    """
+    Calcula los límites (vmin, vmax) del estiramiento de visualización.
+
+    Para imágenes uint8/uint16 los límites se obtienen del histograma completo
+    (una sola pasada sin copias en coma flotante). Para el resto se usa una
+    submuestra aleatoria; en modo 'linear' se añaden el mínimo y el máximo
+    globales para no saturar estrellas pequeñas.
+
+    Parámetros:
+    - image: array 2D
+    - mode: 'linear', 'percentile', 'asinh' o 'log'
+    - low_percentile, high_percentile: percentiles usados salvo en modo 'linear'
+    - max_samples: tamaño de la submuestra para datos no enteros
+
+    Retorna:
+    - (vmin, vmax)
+    """
+    if mode not in STRETCH_MODES:
+        raise ValueError(f"Modo de estiramiento desconocido: {mode}")
+
+    low, high = (0.0, 100.0) if mode == 'linear' else (low_percentile, high_percentile)
+
+    if image.dtype in (np.uint8, np.uint16):
+        vmin, vmax = _histogram_limits(image, low, high)
+    elif mode == 'linear':
+        vmin, vmax = float(np.nanmin(image)), float(np.nanmax(image))
+    else:
+        sample = sample_pixels(image, max_samples)
+        sample = sample[np.isfinite(sample)]
+        if sample.size == 0:
+            return 0.0, 1.0
+        vmin, vmax = np.percentile(sample, [low, high])
+
+    if vmax <= vmin:
+        vmax = vmin + 1
+    return vmin, vmax
+
+
+def build_lut(vmin, vmax, mode='linear', levels=LUT_LEVELS, level_min=0, level_max=None):
+    """
+    Construye la tabla de consulta que transforma niveles de entrada en uint8.
+
+    Parámetros:
+    - vmin, vmax: límites del estiramiento en unidades de los niveles
+    - mode: función de estiramiento
+    - levels: número de entradas de la tabla
+    - level_min, level_max: valor representado por la primera y la última entrada
+
+    Retorna:
+    - array uint8 de tamaño `levels`
+    """
+    if level_max is None:
+        level_max = levels - 1
+    values = np.linspace(level_min, level_max, levels)
+    t = np.clip((values - vmin) / (vmax - vmin), 0.0, 1.0)
+
+    if mode == 'asinh':
+        a = 10.0
+        t = np.arcsinh(a * t) / np.arcsinh(a)
+    elif mode == 'log':
+        a = 1000.0
+        t = np.log1p(a * t) / np.log1p(a)
+
+    return np.round(t * 255).astype(np.uint8)
+
+
+class DisplayStretch:
+    """
+    Convierte imágenes a QImage de 8 bits mediante una tabla de consulta.
+
+    Los buffers de salida (y el de trabajo para datos en coma flotante) se
+    reutilizan entre llamadas mientras no cambie el tamaño de la imagen.
+    """
+
+    def __init__(self, mode='linear', low_percentile=0.5, high_percentile=99.5):
+        self.mode = mode
+        self.low_percentile = low_percentile
+        self.high_percentile = high_percentile
+        self.limits = None
+        self._buffer = None
+        self._scratch = None
+        self._index = None
+
+    def _ensure_buffers(self, shape, need_scratch):
+        if self._buffer is None or self._buffer.shape != shape:
+            self._buffer = np.empty(shape, dtype=np.uint8)
+            self._scratch = None
+            self._index = None
+        if need_scratch and self._scratch is None:
+            self._scratch = np.empty(shape, dtype=np.float32)
+            self._index = np.empty(shape, dtype=np.uint16)
+
+    def to_uint8(self, image):
+        """
+        Aplica el estiramiento y devuelve la imagen en uint8.
+
+        El array devuelto es el buffer interno: se sobrescribe en la siguiente llamada.
+        """
+        vmin, vmax = compute_stretch_limits(image, self.mode,
+                                            self.low_percentile, self.high_percentile)
+        self.limits = (vmin, vmax)
+
+        if image.dtype in (np.uint8, np.uint16):
+            self._ensure_buffers(image.shape, need_scratch=False)
+            levels = np.iinfo(image.dtype).max + 1
+            lut = build_lut(vmin, vmax, self.mode, levels=levels)
+            np.take(lut, image, out=self._buffer)
+            return self._buffer
+
+        # Datos en coma flotante (o enteros con signo): cuantizar a 16 bits en el
+        # buffer de trabajo y pasar por la misma tabla
+        self._ensure_buffers(image.shape, need_scratch=True)
+        scratch = self._scratch
+        np.subtract(image, vmin, out=scratch, casting='unsafe')
+        np.multiply(scratch, (LUT_LEVELS - 1) / (vmax - vmin), out=scratch)
+        np.clip(scratch, 0, LUT_LEVELS - 1, out=scratch)
+        np.nan_to_num(scratch, copy=False)
+        self._index[...] = scratch
+        lut = build_lut(0, LUT_LEVELS - 1, self.mode)
+        np.take(lut, self._index, out=self._buffer)
+        return self._buffer
+
+    def to_qimage(self, image):
+        """Aplica el estiramiento y devuelve un QImage en escala de grises (sin copia)."""
+        data = self.to_uint8(image)
+        height, width = data.shape
+        return QImage(data.data, width, height, width, QImage.Format_Grayscale8)
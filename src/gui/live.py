@@ -0,0 +1,342 @@
+# Copyright (c) 2025 Adrián Hernández Padrón
+# Licensed under the MIT License. See LICENSE file in the project root for full license information.
+
+"""
+Modo en vivo: vigila el directorio donde el programa de captura escribe las
+imágenes, empareja las intra/extra-focales según su nombre y repite el test
+de Roddier sobre cada par nuevo en segundo plano.
+
+Sólo se analiza un par a la vez; si llegan pares mientras tanto se conserva
+el más reciente y se descartan los anteriores, de modo que los resultados
+nunca se retrasan respecto a la captura. Los resultados se acumulan en
+`LiveSession.statistics` para promediar el seeing sobre muchos pares.
+"""
+
+from dataclasses import dataclass
+import os
+import time
+from PyQt5.QtCore import QObject, QRunnable, QThreadPool, QTimer, QFileSystemWatcher, pyqtSignal
+from src.common.utils import FITS_EXTENSIONS, pair_key
+from src.core.pipeline import RoddierResult, run_fast_path, run_roddier_pair
+from src.core.statistics import ResultStatistics
+from src.gui.workers import load_and_prepare_image
+
+# Intervalo de sondeo cuando no se puede vigilar el directorio (ms)
+POLL_INTERVAL_MS = 500
+
+# Espera para comprobar que un fichero nuevo ha terminado de escribirse (ms)
+SETTLE_MS = 100
+
+
+@dataclass
+class LiveFrame:
+    """Resultado del análisis de un par en modo en vivo."""
+    intra_path: str
+    extra_path: str
+    result: object  # RoddierResult
+    latency: float  # segundos desde que se detectó el par hasta tener el resultado
+    index: int  # número de par analizado en la sesión
+    dropped: int  # pares descartados hasta ahora por llegar más rápido de lo que se analizan
+    statistics: object = None  # ResultStatistics de los pares analizados en la serie actual
+
+
+class DirectoryScanner:
+    """
+    Detecta ficheros FITS nuevos o reescritos en un directorio.
+
+    Un fichero se da por completo cuando su tamaño y fecha de modificación no
+    cambian entre dos exploraciones consecutivas.
+    """
+
+    def __init__(self, directory, extensions=FITS_EXTENSIONS):
+        self.directory = directory
+        self.extensions = tuple(e.lower() for e in extensions)
+        self._known = {}  # ruta -> firma ya entregada
+        self._pending = {}  # ruta -> firma vista en la última exploración
+
+    def _signatures(self):
+        signatures = {}
+        try:
+            entries = list(os.scandir(self.directory))
+        except OSError:
+            return signatures
+        for entry in entries:
+            if not entry.name.lower().endswith(self.extensions):
+                continue
+            try:
+                stat = entry.stat()
+            except OSError:
+                continue  # borrado entre el listado y la consulta
+            if entry.is_file() and stat.st_size > 0:
+                signatures[entry.path] = (stat.st_mtime_ns, stat.st_size)
+        return signatures
+
+    def prime(self):
+        """Marca como conocidos los ficheros que ya existen (no se analizan)."""
+        self._known = self._signatures()
+        self._pending.clear()
+
+    def scan(self):
+        """
+        Explora el directorio.
+
+        Retorna:
+        - rutas que han terminado de escribirse desde la última exploración,
+          ordenadas por fecha de modificación
+        """
+        ready = []
+        for path, signature in self._signatures().items():
+            if self._known.get(path) == signature:
+                continue
+            if self._pending.get(path) == signature:
+                ready.append((signature[0], path))
+                self._known[path] = signature
+                del self._pending[path]
+            else:
+                self._pending[path] = signature
+        return [path for _, path in sorted(ready)]
+
+    @property
+    def has_pending(self):
+        """Hay ficheros que aún no se han dado por completos."""
+        return bool(self._pending)
+
+
+class FramePairer:
+    """
+    Empareja imágenes intra y extra-focales por nombre (ver `pair_key`).
+
+    Se guarda la última imagen de cada lado por clave; el par se entrega en
+    cuanto están las dos y se olvida, de modo que la siguiente pareja vuelve a
+    necesitar ambas imágenes.
+    """
+
+    def __init__(self):
+        self._waiting = {}  # clave -> {es_intrafocal: ruta}
+
+    def add(self, path):
+        """
+        Añade una imagen.
+
+        Retorna:
+        - (ruta_intra, ruta_extra) si completa un par, o None
+        """
+        key = pair_key(path)
+        if key is None:
+            return None
+        key, is_intrafocal = key
+        sides = self._waiting.setdefault(key, {})
+        sides[is_intrafocal] = path
+        if True in sides and False in sides:
+            del self._waiting[key]
+            return sides[True], sides[False]
+        return None
+
+    def clear(self):
+        self._waiting.clear()
+
+
+class DirectoryWatcher(QObject):
+    """
+    Emite `frame_ready` con cada FITS nuevo del directorio.
+
+    Usa las notificaciones del sistema (QFileSystemWatcher: inotify, FSEvents...)
+    y, si no están disponibles o `polling=True`, explora el directorio
+    periódicamente.
+    """
+    frame_ready = pyqtSignal(str)
+
+    def __init__(self, directory, poll_interval_ms=POLL_INTERVAL_MS, settle_ms=SETTLE_MS,
+                 polling=False, parent=None):
+        super().__init__(parent)
+        self.scanner = DirectoryScanner(directory)
+        self.polling = polling
+
+        self._watcher = None
+        self._poll_timer = QTimer(self)
+        self._poll_timer.setInterval(poll_interval_ms)
+        self._poll_timer.timeout.connect(self.scan)
+        self._settle_timer = QTimer(self)
+        self._settle_timer.setSingleShot(True)
+        self._settle_timer.setInterval(settle_ms)
+        self._settle_timer.timeout.connect(self.scan)
+
+    @property
+    def directory(self):
+        return self.scanner.directory
+
+    def start(self):
+        self.scanner.prime()
+        if not self.polling:
+            self._watcher = QFileSystemWatcher(self)
+            if self._watcher.addPath(self.directory):
+                self._watcher.directoryChanged.connect(self._on_directory_changed)
+            else:
+                self._watcher = None
+                self.polling = True
+        if self.polling:
+            self._poll_timer.start()
+
+    def stop(self):
+        self._poll_timer.stop()
+        self._settle_timer.stop()
+        if self._watcher is not None:
+            self._watcher.removePath(self.directory)
+            self._watcher = None
+
+    def _on_directory_changed(self, _):
+        # Esperar a que el fichero termine de escribirse antes de explorar
+        self._settle_timer.start()
+
+    def scan(self):
+        for path in self.scanner.scan():
+            self.frame_ready.emit(path)
+        # Con notificaciones no llega otro aviso cuando termina la escritura
+        if self.scanner.has_pending and not self.polling:
+            self._settle_timer.start()
+
+
+def process_pair(intra_path, extra_path, settings):
+    """Carga un par (girando la extra-focal, con el binning de `settings`) y ejecuta el test."""
+    intra = load_and_prepare_image(intra_path, True, settings.binning)
+    extra = load_and_prepare_image(extra_path, False, settings.binning)
+    return run_roddier_pair(intra.image_data, extra.image_data, settings)
+
+
+def process_pair_fast(intra_path, extra_path, settings):
+    """Como `process_pair`, pero sólo con los modos de bajo orden (`run_fast_path`)."""
+    intra = load_and_prepare_image(intra_path, True, settings.binning)
+    extra = load_and_prepare_image(extra_path, False, settings.binning)
+    return run_fast_path(intra.image_data, extra.image_data, settings)
+
+
+class LiveWorkerSignals(QObject):
+    finished = pyqtSignal(object)
+    error = pyqtSignal(str)
+
+
+class LiveWorker(QRunnable):
+    """Analiza un par en un hilo del pool."""
+
+    def __init__(self, process, intra_path, extra_path, settings):
+        super().__init__()
+        self.process = process
+        self.intra_path = intra_path
+        self.extra_path = extra_path
+        self.settings = settings
+        self.signals = LiveWorkerSignals()
+
+    def run(self):
+        try:
+            result = self.process(self.intra_path, self.extra_path, self.settings)
+        except Exception as e:
+            self.signals.error.emit(f"{os.path.basename(self.intra_path)}: {e}")
+            return
+        self.signals.finished.emit(result)
+
+
+class LiveSession(QObject):
+    """
+    Sesión del modo en vivo sobre un directorio.
+
+    Emite `result_ready` con un LiveFrame por cada par analizado y `error`
+    con un mensaje si el análisis de un par falla.
+    """
+    result_ready = pyqtSignal(object)
+    error = pyqtSignal(str)
+
+    def __init__(self, directory, settings, process=process_pair, parent=None, **watcher_options):
+        """
+        Parámetros:
+        - directory: directorio donde escribe el programa de captura
+        - settings: RoddierSettings del último test (recorte, FFT, telescopio...)
+        - process: función (ruta_intra, ruta_extra, settings) -> resultado
+        - watcher_options: opciones de DirectoryWatcher (polling, poll_interval_ms, settle_ms)
+        """
+        super().__init__(parent)
+        self.settings = settings
+        self.process = process
+        self.watcher = DirectoryWatcher(directory, parent=self, **watcher_options)
+        self.watcher.frame_ready.connect(self._on_frame)
+        self.pairer = FramePairer()
+        self.thread_pool = QThreadPool(self)
+        self.thread_pool.setMaxThreadCount(1)
+
+        self.processed = 0
+        self.dropped = 0
+        self.statistics = ResultStatistics()
+        self.running = False
+        self._busy = None  # (ruta_intra, ruta_extra, detectado) en análisis
+        self._pending = None  # par más reciente a la espera
+
+    def start(self):
+        self.running = True
+        self.watcher.start()
+
+    def stop(self):
+        self.running = False
+        self.watcher.stop()
+        self.pairer.clear()
+        self._pending = None
+
+    def wait(self, msecs=-1):
+        """Espera a que termine el análisis en curso."""
+        return self.thread_pool.waitForDone(msecs)
+
+    def reset_statistics(self):
+        """Empieza una serie nueva de estadísticas (p. ej. al cambiar el análisis)."""
+        self.statistics = ResultStatistics()
+
+    def _on_frame(self, path):
+        pair = self.pairer.add(path)
+        if pair is not None:
+            self.submit(*pair)
+
+    def submit(self, intra_path, extra_path):
+        """Encola un par; si ya hay uno esperando, se descarta en favor del nuevo."""
+        if not self.running:
+            return
+        job = (intra_path, extra_path, time.perf_counter())
+        if self._busy is None:
+            self._start(job)
+            return
+        if self._pending is not None:
+            self.dropped += 1
+        self._pending = job
+
+    def _start(self, job):
+        self._busy = job
+        worker = LiveWorker(self.process, job[0], job[1], self.settings)
+        worker.signals.finished.connect(self._on_finished)
+        worker.signals.error.connect(self._on_error)
+        self.thread_pool.start(worker)
+
+    def _next(self):
+        self._busy = None
+        if self._pending is not None and self.running:
+            job, self._pending = self._pending, None
+            self._start(job)
+
+    def _on_finished(self, result):
+        intra_path, extra_path, detected = self._busy
+        self.processed += 1
+        self._accumulate(result)
+        frame = LiveFrame(intra_path, extra_path, result, time.perf_counter() - detected,
+                          self.processed, self.dropped, self.statistics)
+        self._next()
+        if self.running:
+            self.result_ready.emit(frame)
+
+    def _accumulate(self, result):
+        """Añade un resultado a las estadísticas; si tiene otros modos que la serie, empieza una nueva."""
+        if not isinstance(result, RoddierResult):
+            return
+        try:
+            self.statistics.update(result)
+        except ValueError:
+            self.statistics = ResultStatistics().update(result)
+
+    def _on_error(self, message):
+        self._next()
+        if self.running:
+            self.error.emit(message)
@@ -1,21 +1,20 @@
 # Copyright (c) 2025 Adrián Hernández Padrón
 # Licensed under the MIT License. See LICENSE file in the project root for full license information.
 
-from PyQt5.QtWidgets import (QMainWindow, QVBoxLayout, QHBoxLayout, QPushButton, QLabel, QFileDialog, QWidget, QMessageBox, QDialog, QFrame, QScrollArea, QToolBar, QAction)
-from PyQt5.QtCore import Qt, QTimer
-from PyQt5.QtGui import QPixmap, QImage, QIcon
-from matplotlib.colors import Normalize
+from PyQt5.QtWidgets import (QMainWindow, QVBoxLayout, QHBoxLayout, QPushButton, QLabel, QFileDialog, QWidget, QMessageBox, QDialog, QFrame, QScrollArea, QToolBar, QAction, QComboBox, QProgressBar)
+from PyQt5.QtCore import Qt, QTimer, QThreadPool
+from PyQt5.QtGui import QIcon
 import numpy as np
 import os
 import json
 from pathlib import Path
-from src.core.roddier import calculate_wavefront
-from src.core.zernike import fit_zernike
-from src.common.utils import load_fits_image, calculate_center_of_mass, find_center
-from src.core.optical_preprocessing import preprocess_roddier
-from src.gui.dialogs.roddiertestresults import RoddierTestResultsWindow
-from src.gui.dialogs.roddiertest import RoddierTestDialog
+from src.common.utils import calculate_center_of_mass, guess_pair_path, parse_binning
+from src.common.centroid import cached_spot_radius
+from src.common.tracing import StageSummary, collecting, enable_memory_tracking, set_memory_budget, traced
 from src.gui.dialogs.config_dialog import ConfigDialog
+from src.gui.display import DisplayStretch, STRETCH_MODES
+from src.gui.pyramid import PyramidImageView
+from src.gui.workers import ImageLoadWorker
 from src.common.config import get_config_paths
 import sys
 
@@ -43,6 +42,9 @@ class FitsViewer(QMainWindow):
         # Variables de configuración
         self.image_path = None
         self.results_path = None
+        self.binning = 1  # binning por software aplicado al cargar las imágenes
+        self.result_cache = None  # caché en disco de las etapas del test (opción cache_dir)
+        self.roddier_graph = None  # etapas del último test, reutilizadas al repetirlo con otros parámetros
 
         # Cargar rutas por defecto
         self.load_default_paths()
@@ -82,6 +84,20 @@ class FitsViewer(QMainWindow):
         self.roddier_action.triggered.connect(self.run_roddier_test)
         self.toolbar.addAction(self.roddier_action)
 
+        # Modo en vivo: repite el test sobre los pares que aparecen en un directorio
+        self.live_action = QAction('En vivo', self)
+        self.live_action.setCheckable(True)
+        self.live_action.setStatusTip('Analizar continuamente los pares que escribe el programa de captura')
+        self.live_action.toggled.connect(self.toggle_live_mode)
+        self.toolbar.addAction(self.live_action)
+
+        # En vivo sólo con los modos de bajo orden, a la cadencia de captura
+        self.live_fast_action = QAction('Rápido', self)
+        self.live_fast_action.setCheckable(True)
+        self.live_fast_action.setStatusTip('En vivo: estimar sólo tilt, defocus, astigmatismo y coma')
+        self.live_fast_action.toggled.connect(self.set_live_fast_path)
+        self.toolbar.addAction(self.live_fast_action)
+
         # Separador
         self.toolbar.addSeparator()
 
@@ -109,6 +125,16 @@ class FitsViewer(QMainWindow):
         self.config_action.triggered.connect(self.run_config_dialog)
         self.toolbar.addAction(self.config_action)
 
+        # Separador
+        self.toolbar.addSeparator()
+
+        # Selector del estiramiento de visualización
+        self.stretch_combo = QComboBox()
+        self.stretch_combo.addItems(STRETCH_MODES)
+        self.stretch_combo.setToolTip('Estiramiento de visualización')
+        self.stretch_combo.currentTextChanged.connect(self.set_stretch_mode)
+        self.toolbar.addWidget(self.stretch_combo)
+
         self.setStyleSheet("""
             QMainWindow {
                 background-color: #2b2b2b;
@@ -206,11 +232,11 @@ class FitsViewer(QMainWindow):
         self.intra_container.setFrameStyle(QFrame.StyledPanel)
         self.intra_layout = QVBoxLayout(self.intra_container)
         self.intra_scroll = QScrollArea()
-        self.intra_scroll.setWidgetResizable(True)
+        self.intra_scroll.setWidgetResizable(False)
+        self.intra_scroll.setAlignment(Qt.AlignCenter)
         self.intra_scroll.setHorizontalScrollBarPolicy(Qt.ScrollBarAsNeeded)
         self.intra_scroll.setVerticalScrollBarPolicy(Qt.ScrollBarAsNeeded)
-        self.intra_label = QLabel()
-        self.intra_label.setAlignment(Qt.AlignCenter)
+        self.intra_label = PyramidImageView()
         self.intra_scroll.setWidget(self.intra_label)
         self.intra_layout.addWidget(self.intra_scroll)
         self.images_layout.addWidget(self.intra_container)
@@ -220,19 +246,17 @@ class FitsViewer(QMainWindow):
         self.extra_container.setFrameStyle(QFrame.StyledPanel)
         self.extra_layout = QVBoxLayout(self.extra_container)
         self.extra_scroll = QScrollArea()
-        self.extra_scroll.setWidgetResizable(True)
+        self.extra_scroll.setWidgetResizable(False)
+        self.extra_scroll.setAlignment(Qt.AlignCenter)
         self.extra_scroll.setHorizontalScrollBarPolicy(Qt.ScrollBarAsNeeded)
         self.extra_scroll.setVerticalScrollBarPolicy(Qt.ScrollBarAsNeeded)
-        self.extra_label = QLabel()
-        self.extra_label.setAlignment(Qt.AlignCenter)
+        self.extra_label = PyramidImageView()
         self.extra_scroll.setWidget(self.extra_label)
         self.extra_layout.addWidget(self.extra_scroll)
         self.images_layout.addWidget(self.extra_container)
 
         # Variables para el zoom
         self.zoom_factor = 1.0
-        self.intra_label.setScaledContents(True)
-        self.extra_label.setScaledContents(True)
 
         # Conectar eventos de rueda del ratón para zoom
         self.intra_scroll.wheelEvent = lambda event: self.handle_wheel_event(event, self.intra_label)
@@ -243,8 +267,39 @@ class FitsViewer(QMainWindow):
         self.extra_image_path = None
         self.intra_image_data = None
         self.extra_image_data = None
-        self.intra_pixmap = None
-        self.extra_pixmap = None
+        self.intra_display_data = None
+        self.extra_display_data = None
+        self.intra_binning = None
+        self.extra_binning = None
+        # Puntuaciones de calidad de los fotogramas de los vídeos apilados (None para imágenes)
+        self.intra_frame_scores = None
+        self.extra_frame_scores = None
+
+        # Estiramiento de visualización (un buffer reutilizable por panel)
+        self.intra_stretch = DisplayStretch()
+        self.extra_stretch = DisplayStretch()
+
+        # Carga asíncrona de imágenes
+        self.thread_pool = QThreadPool()
+        self._pending_loads = {}  # (ruta, es_intra) -> mostrar al terminar
+        self._prefetched = {}  # (ruta, es_intra) -> LoadedImage
+        self._requested_paths = {True: None, False: None}
+        self._suggested_extra_path = None
+
+        # Indicador de carga en la barra de estado
+        self.loading_bar = QProgressBar()
+        self.loading_bar.setRange(0, 0)
+        self.loading_bar.setMaximumWidth(150)
+        self.loading_bar.setVisible(False)
+        self.statusBar().addPermanentWidget(self.loading_bar)
+
+        # Tiempos por etapa del último análisis (ver src.common.tracing)
+        self.stage_summary = StageSummary(max_depth=1)
+
+        # Parámetros del último test (los reutiliza el modo en vivo)
+        self.last_roddier_settings = None
+        self.live_session = None
+        self.live_results_window = None
 
     def handle_wheel_event(self, event, label):
         """Maneja el evento de la rueda del ratón para hacer zoom."""
@@ -257,23 +312,20 @@ class FitsViewer(QMainWindow):
 
             self.zoom_factor = max(0.1, min(self.zoom_factor, 5.0))  # Limitar zoom entre 0.1x y 5x
 
-            if label == self.intra_label and self.intra_pixmap:
-                self.update_zoom(self.intra_label, self.intra_pixmap)
-            elif label == self.extra_label and self.extra_pixmap:
-                self.update_zoom(self.extra_label, self.extra_pixmap)
+            if label.has_image():
+                self.update_zoom(label)
 
             event.accept()
         else:
             event.ignore()
 
-    def update_zoom(self, label, original_pixmap):
-        """Actualiza el zoom de una imagen."""
-        new_width = int(original_pixmap.width() * self.zoom_factor)
-        new_height = int(original_pixmap.height() * self.zoom_factor)
-        scaled_pixmap = original_pixmap.scaled(new_width, new_height,
-                                             Qt.KeepAspectRatio,
-                                             Qt.SmoothTransformation)
-        label.setPixmap(scaled_pixmap)
+    def update_zoom(self, label):
+        """Actualiza el zoom de una imagen.
+
+        El visor sólo redibuja las teselas visibles del nivel de la pirámide
+        más cercano al zoom, sin reescalar la imagen completa.
+        """
+        label.set_zoom(self.zoom_factor)
 
         # Mantener el centro después del zoom
         if label == self.intra_label:
@@ -286,6 +338,9 @@ class FitsViewer(QMainWindow):
     def process_and_display_image(self, file_path, is_intrafocal=True):
         """Método común para procesar y mostrar imágenes intra y extra-focales.
 
+        La carga, el giro y el centro de masa se calculan en el pool de hilos;
+        la imagen se muestra cuando llega el resultado (ver `_on_image_loaded`).
+
         Args:
             file_path: Ruta del archivo FITS
             is_intrafocal: True si es imagen intra-focal, False si es extra-focal
@@ -293,32 +348,96 @@ class FitsViewer(QMainWindow):
         if not file_path:
             return
 
-        # Cargar y almacenar la imagen
-        image_data = load_fits_image(file_path)
-        if image_data is None:
+        self._requested_paths[is_intrafocal] = file_path
+        self.start_image_load(file_path, is_intrafocal, display=True)
+
+    def start_image_load(self, file_path, is_intrafocal, display=True):
+        """Lanza la carga de una imagen en segundo plano.
+
+        Si la imagen ya se precargó se muestra inmediatamente; si ya se está
+        cargando no se lanza una segunda carga.
+
+        Args:
+            file_path: Ruta del archivo FITS
+            is_intrafocal: True si es imagen intra-focal, False si es extra-focal
+            display: False para sólo precargarla
+        """
+        key = (file_path, is_intrafocal)
+        if key in self._prefetched:
+            if display:
+                self._show_loaded_image(self._prefetched.pop(key))
+            return
+        if key in self._pending_loads:
+            self._pending_loads[key] = self._pending_loads[key] or display
             return
 
-        # Aplicar transformaciones necesarias para imagen extra-focal
-        if not is_intrafocal:
-            image_data = np.rot90(image_data, k=2)
-        # Calcular el centro de masa
-        com_y, com_x = calculate_center_of_mass(image_data)
+        self._pending_loads[key] = display
+        worker = ImageLoadWorker(file_path, is_intrafocal, self.binning)
+        worker.signals.finished.connect(self._on_image_loaded)
+        worker.signals.error.connect(self._on_image_load_error)
+        self.thread_pool.start(worker)
+        self._update_loading_indicator()
+
+    def prefetch_image(self, file_path, is_intrafocal):
+        """Precarga una imagen sin mostrarla."""
+        self.start_image_load(file_path, is_intrafocal, display=False)
+
+    def _on_image_loaded(self, result):
+        """Recibe en el hilo de la interfaz una imagen cargada por un worker."""
+        key = (result.path, result.is_intrafocal)
+        display = self._pending_loads.pop(key, False)
+        self._update_loading_indicator()
+
+        # Descartar cargas que el usuario ya ha reemplazado por otra imagen
+        if display and self._requested_paths[result.is_intrafocal] == result.path:
+            self._show_loaded_image(result)
+        elif not display:
+            # Sólo se conserva la última precarga de cada tipo
+            for other in [k for k in self._prefetched if k[1] == result.is_intrafocal]:
+                del self._prefetched[other]
+            self._prefetched[key] = result
+
+    def _on_image_load_error(self, file_path, is_intrafocal, message):
+        key = (file_path, is_intrafocal)
+        display = self._pending_loads.pop(key, False)
+        self._update_loading_indicator()
+        if display:
+            QMessageBox.warning(self, "Error", f"Error al cargar la imagen {os.path.basename(file_path)}: {message}")
+
+    def _update_loading_indicator(self):
+        """Muestra el indicador de carga mientras haya imágenes pendientes de mostrar."""
+        waiting = [path for (path, _), display in self._pending_loads.items() if display]
+        self.loading_bar.setVisible(bool(waiting))
+        if waiting:
+            self.statusBar().showMessage(f"Cargando {os.path.basename(waiting[0])}...")
+        else:
+            self.statusBar().clearMessage()
+
+    @traced('show_loaded_image', category='gui')
+    def _show_loaded_image(self, result):
+        """Almacena y muestra una imagen ya cargada."""
+        com_y, com_x = result.center
 
         # Almacenar datos según el tipo de imagen
-        if is_intrafocal:
-            self.intra_image_path = file_path
-            self.intra_image_data = image_data
+        if result.is_intrafocal:
+            self.intra_image_path = result.path
+            self.intra_image_data = result.image_data
+            self.intra_display_data = result.display_data
+            self.intra_binning = result.binning
+            self.intra_frame_scores = result.frame_scores
             label = self.intra_label
             scroll = self.intra_scroll
         else:
-            self.extra_image_path = file_path
-            self.extra_image_data = image_data
+            self.extra_image_path = result.path
+            self.extra_image_data = result.image_data
+            self.extra_display_data = result.display_data
+            self.extra_binning = result.binning
+            self.extra_frame_scores = result.frame_scores
             label = self.extra_label
             scroll = self.extra_scroll
 
         # Mostrar la imagen y centrarla
-        self.display_image(image_data, label)
-        label.adjustSize()
+        self.display_image(result.display_data, label)
         self.center_scroll_on_point(scroll, com_x, com_y)
 
     def load_intra_image(self):
@@ -327,40 +446,50 @@ class FitsViewer(QMainWindow):
             self,
             "Seleccionar imagen intra-focal",
             self.image_path if self.image_path else "",
-            "FITS Files (*.fits *.fit)"
+            "FITS/SER Files (*.fits *.fit *.ser)"
         )
         if file_path:
             self.process_and_display_image(file_path, is_intrafocal=True)
 
+            # Precargar la extra-focal que corresponde por nombre
+            self._suggested_extra_path = guess_pair_path(file_path)
+            if self._suggested_extra_path and self._suggested_extra_path != self.extra_image_path:
+                self.prefetch_image(self._suggested_extra_path, is_intrafocal=False)
+
     def load_extra_image(self):
         """Carga una imagen extra-focal."""
+        # Proponer la pareja de la intra-focal si se encontró por el nombre
+        start_path = self._suggested_extra_path or (self.image_path if self.image_path else "")
         file_path, _ = QFileDialog.getOpenFileName(
             self,
             "Seleccionar imagen extra-focal",
-            self.image_path if self.image_path else "",
-            "FITS Files (*.fits *.fit)"
+            start_path,
+            "FITS/SER Files (*.fits *.fit *.ser)"
         )
         if file_path:
             self.process_and_display_image(file_path, is_intrafocal=False)
 
     def display_image(self, image_data, label):
-        if image_data is not None:
-            norm = Normalize(vmin=np.min(image_data), vmax=np.max(image_data))
-            normalized_image = norm(image_data) * 255
-            normalized_image = normalized_image.astype(np.uint8)
+        """Muestra la imagen aplicando el estiramiento por tabla de consulta.
 
-            height, width = normalized_image.shape
-            q_image = QImage(normalized_image.data, width, height, width, QImage.Format_Grayscale8)
-            pixmap = QPixmap.fromImage(q_image)
-
-            # Store the original pixmap
-            if label == self.intra_label:
-                self.intra_pixmap = pixmap
-            else:
-                self.extra_pixmap = pixmap
+        Acepta los datos en su tipo original: uint8/uint16 se transforman
+        directamente a 8 bits sin pasar por coma flotante.
+        """
+        if image_data is not None:
+            stretch = self.intra_stretch if label == self.intra_label else self.extra_stretch
+            label.set_image(stretch.to_uint8(image_data))
 
             # Apply current zoom
-            self.update_zoom(label, pixmap)
+            self.update_zoom(label)
+
+    def set_stretch_mode(self, mode):
+        """Cambia el estiramiento de visualización y redibuja las imágenes cargadas."""
+        self.intra_stretch.mode = mode
+        self.extra_stretch.mode = mode
+        if self.intra_display_data is not None:
+            self.display_image(self.intra_display_data, self.intra_label)
+        if self.extra_display_data is not None:
+            self.display_image(self.extra_display_data, self.extra_label)
 
     def run_roddier_test(self):
         """Ejecuta el test de Roddier para analizar el frente de onda."""
@@ -368,44 +497,122 @@ class FitsViewer(QMainWindow):
             QMessageBox.warning(self, "Error", "Por favor, carga las imágenes intra y extra-focal primero.")
             return
 
-        roddier_dialog = RoddierTestDialog(self.intra_image_data, self.extra_image_data, crop_size=250)
+        if self.intra_binning != self.extra_binning:
+            QMessageBox.warning(self, "Error", "Las imágenes intra y extra-focal se cargaron con distinto binning. Vuelve a cargarlas.")
+            return
+
+        # El pipeline (scipy) y los diálogos (matplotlib) se importan con el
+        # primer test, no al arrancar la aplicación
+        from src.core.fft_plan import plan_fft
+        from src.gui.dialogs.roddiertest import RoddierTestDialog
+
+        # Recorte y tamaño de FFT según el radio estimado de los donuts
+        radius = max(cached_spot_radius(self.intra_image_data), cached_spot_radius(self.extra_image_data))
+        fft_plan = plan_fft(radius)
+        self.statusBar().showMessage(fft_plan.describe())
+
+        roddier_dialog = RoddierTestDialog(self.intra_image_data, self.extra_image_data,
+                                           crop_size=fft_plan.crop_size, binning=self.intra_binning)
         if roddier_dialog.exec_() == QDialog.Accepted:
-            cropped_intra, cropped_extra = roddier_dialog.get_cropped_images()
-            telescope_params = roddier_dialog.get_telescope_params()
-            roddier_params = roddier_dialog.get_roddier_params()
-            interferogram_params = roddier_dialog.get_interferogram_params()
-
-            apertura = telescope_params['apertura']
-            focal = telescope_params['focal']
-            pixel_scale = telescope_params['tamano_pixel']
-            max_order = roddier_params['max_order']
-            threshold = roddier_params['threshold']
-
-            delta_I_norm, annular_mask, center, R_out, dz_mm = preprocess_roddier(
-                cropped_intra,
-                cropped_extra,
-                apertura=apertura,
-                focal=focal,
-                pixel_scale=pixel_scale,
-                threshold=threshold
-            )
-
-            wavefront = calculate_wavefront(delta_I_norm, annular_mask, dz_mm=dz_mm)
-
-            zernike_coeffs, zernike_base = fit_zernike(
-                    wavefront, annular_mask, R_out, center, max_order
-                )
-
-            # Mostrar resultados en una única ventana
-            results_window = RoddierTestResultsWindow("Resultados del Test de Roddier", self)
-            results_window.update_plots(
-                zernike_coeffs=zernike_coeffs,
-                zernike_base=zernike_base,
-                annular_mask=annular_mask,
-                interferogram_params=interferogram_params,
-                telescope_params=telescope_params
-            )
-            results_window.show()
+            if roddier_dialog.crop_size != fft_plan.crop_size:
+                # Recorte cambiado en el diálogo: la transformada se adapta a él
+                fft_plan = fft_plan.with_crop(roddier_dialog.crop_size)
+            # Resumen de tiempos del análisis y sus etapas directas en la barra de estado
+            self.stage_summary.reset()
+            with collecting(self.stage_summary):
+                self._analyze_roddier(roddier_dialog, fft_plan)
+            self.statusBar().showMessage(f"Tiempos: {self.stage_summary.text()}")
+
+    @traced('roddier_test', category='gui')
+    def _analyze_roddier(self, roddier_dialog, fft_plan):
+        """Preprocesa el recorte aceptado en el diálogo, reconstruye el frente de onda y muestra los resultados."""
+        from src.core.pipeline import RoddierGraph, RoddierSettings
+        from src.gui.dialogs.roddiertestresults import RoddierTestResultsWindow
+
+        cropped_intra, cropped_extra = roddier_dialog.get_cropped_images()
+        settings = RoddierSettings(
+            telescope_params=roddier_dialog.get_telescope_params(),
+            roddier_params=roddier_dialog.get_roddier_params(),
+            interferogram_params=roddier_dialog.get_interferogram_params(),
+            crop_size=fft_plan.crop_size,
+            fft_shape=fft_plan.fft_shape,
+            binning=self.intra_binning
+        )
+        if self.roddier_graph is None or self.roddier_graph.cache is not self.result_cache:
+            self.roddier_graph = RoddierGraph(self.result_cache)
+        # Sólo se recalculan las etapas afectadas por los parámetros que han cambiado
+        self.roddier_graph.configure(settings)
+        self.roddier_graph.set_cropped(cropped_intra, cropped_extra)
+        result = self.roddier_graph.result()
+        # El modo en vivo repite el análisis con los parámetros del último test
+        self.last_roddier_settings = settings
+
+        # Mostrar resultados en una única ventana
+        results_window = RoddierTestResultsWindow("Resultados del Test de Roddier", self)
+        results_window.show_result(result, settings)
+        results_window.set_frame_scores({'intra': self.intra_frame_scores, 'extra': self.extra_frame_scores})
+        results_window.show()
+
+    def toggle_live_mode(self, enabled):
+        """Inicia o detiene el modo en vivo sobre un directorio de capturas."""
+        if not enabled:
+            if self.live_session is not None:
+                self.live_session.stop()
+                self.live_session = None
+                self.statusBar().showMessage("Modo en vivo detenido", 5000)
+            return
+
+        directory = None
+        if self.last_roddier_settings is None:
+            QMessageBox.warning(self, "Modo en vivo",
+                                "Ejecuta primero un test de Roddier: el modo en vivo usa sus parámetros.")
+        else:
+            directory = QFileDialog.getExistingDirectory(self, "Directorio de capturas", self.image_path or "")
+        if not directory:
+            self.live_action.blockSignals(True)
+            self.live_action.setChecked(False)
+            self.live_action.blockSignals(False)
+            return
+
+        from src.gui.live import LiveSession
+        self.live_session = LiveSession(directory, self.last_roddier_settings, process=self._live_process(),
+                                        parent=self)
+        self.live_session.result_ready.connect(self._on_live_result)
+        self.live_session.error.connect(lambda message: self.statusBar().showMessage(f"En vivo: {message}"))
+        self.live_session.start()
+        self.statusBar().showMessage(f"En vivo: esperando pares en {directory}")
+
+    def _live_process(self):
+        """Análisis que aplica el modo en vivo: completo o sólo bajo orden."""
+        from src.gui.live import process_pair, process_pair_fast
+        return process_pair_fast if self.live_fast_action.isChecked() else process_pair
+
+    def set_live_fast_path(self, enabled):
+        """Cambia el análisis de la sesión en vivo; se aplica desde el siguiente par."""
+        if self.live_session is not None:
+            self.live_session.process = self._live_process()
+            self.live_session.reset_statistics()
+
+    def _on_live_result(self, frame):
+        """Actualiza la ventana de resultados del modo en vivo con un par recién analizado."""
+        from src.gui.dialogs.roddiertestresults import RoddierTestResultsWindow
+
+        if self.live_results_window is None:
+            self.live_results_window = RoddierTestResultsWindow("Test de Roddier en vivo", self)
+        self.live_results_window.show_result(frame.result, self.live_session.settings)
+        if not self.live_results_window.isVisible():
+            self.live_results_window.show()
+        self.statusBar().showMessage(
+            f"En vivo: {os.path.basename(frame.intra_path)} · {frame.latency * 1000:.0f} ms · "
+            f"{frame.index} analizados, {frame.dropped} descartados{self._live_statistics_text(frame)}")
+
+    def _live_statistics_text(self, frame):
+        """Media e intervalo de confianza del RMS del frente de onda en la serie en vivo."""
+        rms = frame.statistics.rms if frame.statistics is not None else None
+        if rms is None or rms.n < 2:
+            return ""
+        _, high = rms.confidence_interval()
+        return f" · RMS medio de {rms.n}: {float(rms.mean):.4f} ± {float(high - rms.mean):.4f}"
 
     def reset_state(self):
         """Resetea el estado de la aplicación a su estado inicial."""
@@ -414,8 +621,20 @@ class FitsViewer(QMainWindow):
         self.extra_image_path = None
         self.intra_image_data = None
         self.extra_image_data = None
-        self.intra_pixmap = None
-        self.extra_pixmap = None
+        self.intra_display_data = None
+        self.extra_display_data = None
+        self.intra_binning = None
+        self.extra_binning = None
+        self.intra_frame_scores = None
+        self.extra_frame_scores = None
+        self.roddier_graph = None
+
+        # Olvidar cargas pendientes y precargas
+        self._pending_loads.clear()
+        self._prefetched.clear()
+        self._requested_paths = {True: None, False: None}
+        self._suggested_extra_path = None
+        self._update_loading_indicator()
 
         # Limpiar las etiquetas de imagen
         self.intra_label.clear()
@@ -483,7 +702,7 @@ class FitsViewer(QMainWindow):
         """Centra el scroll en un punto específico de la imagen."""
         # Obtener el widget contenido en el scroll area
         content_widget = scroll_area.widget()
-        if content_widget is None or not content_widget.pixmap():
+        if content_widget is None or not content_widget.has_image():
             return
 
         # Obtener las dimensiones del contenido y del viewport
@@ -500,8 +719,8 @@ class FitsViewer(QMainWindow):
             content_size.height() - viewport_size.height()
         ))
 
-        # Aplicar el scroll después de un pequeño retraso para asegurar que la imagen está cargada
-        QTimer.singleShot(100, lambda: self._apply_scroll(scroll_area, scroll_x, scroll_y))
+        # Aplicar el scroll cuando la zona de scroll haya procesado el nuevo tamaño
+        QTimer.singleShot(0, lambda: self._apply_scroll(scroll_area, scroll_x, scroll_y))
 
     def _apply_scroll(self, scroll_area, x, y):
         """Aplica el scroll a las coordenadas especificadas."""
@@ -528,6 +747,19 @@ class FitsViewer(QMainWindow):
                         self.image_path = config['image_path']
                     if 'results_path' in config:
                         self.results_path = config['results_path']
+                    if 'binning' in config:
+                        self.binning = parse_binning(config['binning'])
+                    # Medida opcional de memoria por etapa y presupuestos en MB
+                    if config.get('memory_tracking'):
+                        enable_memory_tracking()
+                    for stage, megabytes in config.get('memory_budgets_mb', {}).items():
+                        set_memory_budget(None if stage == '*' else stage, megabytes)
+                    # Caché opcional de resultados intermedios para repetir tests sobre los mismos datos
+                    if config.get('cache_dir'):
+                        from src.common.cache import DEFAULT_CACHE_MB, ResultCache
+                        megabytes = config.get('cache_size_mb', DEFAULT_CACHE_MB)
+                        self.result_cache = ResultCache(os.path.expanduser(config['cache_dir']),
+                                                        megabytes * 1024 * 1024)
         except Exception as e:
             print(f"Error al cargar las rutas por defecto: {str(e)}")
 
@@ -538,3 +770,9 @@ class FitsViewer(QMainWindow):
             config = dialog.get_config()
             self.image_path = config['image_path']
             self.results_path = config['results_path']
+            if config.get('binning', self.binning) != self.binning:
+                # Las precargas se hicieron con el binning anterior
+                self.binning = config['binning']
+                self._prefetched.clear()
+                self.statusBar().showMessage(
+                    f"Binning {self.binning}x{self.binning}: se aplicará a las próximas imágenes cargadas", 5000)
@@ -0,0 +1,191 @@
+# Copyright (c) 2025 Adrián Hernández Padrón
+# Licensed under the MIT License. See LICENSE file in the project root for full license information.
+
+from collections import OrderedDict
+import math
+import numpy as np
+from PyQt5.QtWidgets import QWidget
+from PyQt5.QtCore import QObject, QRunnable, QThreadPool, QRectF, QSize, pyqtSignal
+from PyQt5.QtGui import QImage, QPixmap, QPainter
+
+# Lado de las teselas en píxeles del nivel correspondiente
+TILE_SIZE = 256
+
+# Número máximo de teselas (QPixmap) que se mantienen en memoria
+MAX_CACHED_TILES = 512
+
+
+def downsample_2x(image):
+    """Reduce una imagen uint8 a la mitad promediando bloques de 2x2 (descarta la fila/columna impar)."""
+    h, w = image.shape[0] // 2 * 2, image.shape[1] // 2 * 2
+    blocks = image[:h, :w].reshape(h // 2, 2, w // 2, 2)
+    return (blocks.sum(axis=(1, 3), dtype=np.uint16) // 4).astype(np.uint8)
+
+
+def build_pyramid_levels(image, min_size=TILE_SIZE):
+    """
+    Construye la pirámide multirresolución de una imagen de 8 bits.
+
+    Parámetros:
+    - image: array 2D uint8 (nivel 0, resolución completa)
+    - min_size: se deja de reducir cuando el lado mayor es menor que este valor
+
+    Retorna:
+    - lista de arrays uint8, cada uno a la mitad de resolución que el anterior
+    """
+    levels = [image]
+    while max(levels[-1].shape) > min_size and min(levels[-1].shape) >= 2:
+        levels.append(downsample_2x(levels[-1]))
+    return levels
+
+
+class PyramidSignals(QObject):
+    finished = pyqtSignal(int, object)
+
+
+class PyramidBuilder(QRunnable):
+    """Tarea en segundo plano que construye los niveles reducidos de la pirámide."""
+
+    def __init__(self, image, generation):
+        super().__init__()
+        self.image = image
+        self.generation = generation
+        self.signals = PyramidSignals()
+
+    def run(self):
+        levels = build_pyramid_levels(self.image)
+        self.signals.finished.emit(self.generation, levels)
+
+
+class PyramidImageView(QWidget):
+    """
+    Visor de imágenes grandes basado en una pirámide de teselas.
+
+    Sólo se dibujan las teselas visibles del nivel de la pirámide más cercano
+    al zoom actual, por lo que el coste de hacer zoom o desplazarse no depende
+    del tamaño del sensor.
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._levels = None
+        self._zoom = 1.0
+        self._generation = 0
+        self._builder = None
+        self._tiles = OrderedDict()
+
+    def has_image(self):
+        """Indica si hay una imagen cargada."""
+        return self._levels is not None
+
+    def image_size(self):
+        """Tamaño (alto, ancho) de la imagen a resolución completa."""
+        if self._levels is None:
+            return 0, 0
+        return self._levels[0].shape
+
+    def level_count(self):
+        """Número de niveles disponibles (1 mientras la pirámide se construye)."""
+        return 0 if self._levels is None else len(self._levels)
+
+    def set_image(self, image):
+        """
+        Muestra una imagen uint8 y lanza la construcción de la pirámide en segundo plano.
+
+        La imagen se copia: el llamador puede reutilizar su buffer.
+        """
+        base = np.ascontiguousarray(image, dtype=np.uint8).copy()
+        self._generation += 1
+        self._levels = [base]
+        self._tiles.clear()
+        self._update_size()
+        self.update()
+
+        self._builder = PyramidBuilder(base, self._generation)
+        self._builder.signals.finished.connect(self._on_pyramid_ready)
+        QThreadPool.globalInstance().start(self._builder)
+
+    def _on_pyramid_ready(self, generation, levels):
+        # Ignorar pirámides de imágenes ya reemplazadas
+        if generation != self._generation or self._levels is None:
+            return
+        self._levels = levels
+        self._builder = None
+        self.update()
+
+    def clear(self):
+        """Elimina la imagen mostrada."""
+        self._generation += 1
+        self._levels = None
+        self._builder = None
+        self._tiles.clear()
+        self.resize(0, 0)
+        self.update()
+
+    def set_zoom(self, zoom):
+        """Establece el factor de zoom (píxeles de pantalla por píxel de imagen)."""
+        self._zoom = zoom
+        self._update_size()
+        self.update()
+
+    def _update_size(self):
+        self.resize(self.sizeHint())
+
+    def sizeHint(self):
+        if self._levels is None:
+            return QSize(0, 0)
+        h, w = self._levels[0].shape
+        return QSize(max(1, int(w * self._zoom)), max(1, int(h * self._zoom)))
+
+    def level_for_zoom(self, zoom):
+        """Nivel más reducido cuya resolución sigue siendo mayor o igual que la mostrada."""
+        if self._levels is None or zoom >= 1.0:
+            return 0
+        level = int(math.floor(math.log2(1.0 / zoom)))
+        return min(level, len(self._levels) - 1)
+
+    def _tile(self, level, ty, tx):
+        key = (level, ty, tx)
+        pixmap = self._tiles.get(key)
+        if pixmap is not None:
+            self._tiles.move_to_end(key)
+            return pixmap
+
+        data = self._levels[level]
+        tile = np.ascontiguousarray(data[ty * TILE_SIZE:(ty + 1) * TILE_SIZE,
+                                         tx * TILE_SIZE:(tx + 1) * TILE_SIZE])
+        height, width = tile.shape
+        q_image = QImage(tile.data, width, height, width, QImage.Format_Grayscale8)
+        pixmap = QPixmap.fromImage(q_image)
+
+        self._tiles[key] = pixmap
+        if len(self._tiles) > MAX_CACHED_TILES:
+            self._tiles.popitem(last=False)
+        return pixmap
+
+    def paintEvent(self, event):
+        if self._levels is None:
+            return
+
+        level = self.level_for_zoom(self._zoom)
+        data = self._levels[level]
+        # Escala de píxeles del nivel a píxeles del widget
+        scale = self._zoom * (self._levels[0].shape[1] / data.shape[1])
+
+        rect = event.rect()
+        n_ty = (data.shape[0] + TILE_SIZE - 1) // TILE_SIZE
+        n_tx = (data.shape[1] + TILE_SIZE - 1) // TILE_SIZE
+        tx0 = max(0, int(rect.left() / scale) // TILE_SIZE)
+        ty0 = max(0, int(rect.top() / scale) // TILE_SIZE)
+        tx1 = min(n_tx - 1, int((rect.right() + 1) / scale) // TILE_SIZE)
+        ty1 = min(n_ty - 1, int((rect.bottom() + 1) / scale) // TILE_SIZE)
+
+        painter = QPainter(self)
+        painter.setRenderHint(QPainter.SmoothPixmapTransform, True)
+        for ty in range(ty0, ty1 + 1):
+            for tx in range(tx0, tx1 + 1):
+                pixmap = self._tile(level, ty, tx)
+                target = QRectF(tx * TILE_SIZE * scale, ty * TILE_SIZE * scale,
+                                pixmap.width() * scale, pixmap.height() * scale)
+                painter.drawPixmap(target, pixmap, QRectF(pixmap.rect()))
+        painter.end()
@@ -0,0 +1,81 @@
+# Copyright (c) 2025 Adrián Hernández Padrón
+# Licensed under the MIT License. See LICENSE file in the project root for full license information.
+
+from dataclasses import dataclass
+import numpy as np
+from PyQt5.QtCore import QObject, QRunnable, pyqtSignal
+from src.common.frames import is_frame_sequence
+from src.common.utils import bin_image, load_fits_raw, load_fits_image, calculate_center_of_mass
+
+
+@dataclass
+class LoadedImage:
+    """Imagen FITS cargada y preparada para mostrarse en el visor."""
+    path: str
+    is_intrafocal: bool
+    display_data: np.ndarray  # datos en su tipo original (para la visualización)
+    image_data: np.ndarray  # datos en float64 (para el análisis)
+    center: tuple  # (com_y, com_x)
+    binning: int = 1  # binning por software aplicado al cargar
+    frame_scores: list = None  # FrameScore de cada fotograma si el fichero era un vídeo
+
+
+def load_and_prepare_image(file_path, is_intrafocal=True, binning=1):
+    """
+    Carga una imagen FITS y la prepara para el visor.
+
+    Las imágenes extra-focales se giran 180 grados para que coincidan con la
+    orientación de la intra-focal. Con binning > 1 la imagen se binea durante
+    la lectura y se muestra la versión bineada. Los vídeos SER y los cubos
+    FITS se apilan (ver `stack_file`) con los mejores fotogramas según su
+    calidad (ver `src.core.quality`) y se muestra la imagen apilada.
+    """
+    frame_scores = None
+    if is_frame_sequence(file_path):
+        from src.core.quality import KEEP_FRACTION
+        from src.core.stacking import stack_file
+        stacked = stack_file(file_path, keep_fraction=KEEP_FRACTION)
+        frame_scores = stacked.scores
+        image_data = bin_image(stacked.image, binning)
+        if not is_intrafocal:
+            image_data = np.rot90(image_data, k=2)
+        raw_data = image_data
+    elif binning == 1:
+        raw_data = load_fits_raw(file_path)
+        if raw_data is None:
+            raise ValueError(f"El archivo {file_path} no contiene datos de imagen.")
+        if not is_intrafocal:
+            raw_data = np.rot90(raw_data, k=2)
+        image_data = raw_data.astype(np.float64)
+    else:
+        image_data = load_fits_image(file_path, binning=binning)
+        if not is_intrafocal:
+            image_data = np.rot90(image_data, k=2)
+        raw_data = image_data
+    center = calculate_center_of_mass(image_data)
+
+    return LoadedImage(file_path, is_intrafocal, raw_data, image_data, center, binning, frame_scores)
+
+
+class WorkerSignals(QObject):
+    finished = pyqtSignal(object)
+    error = pyqtSignal(str, bool, str)
+
+
+class ImageLoadWorker(QRunnable):
+    """Carga una imagen en un hilo del pool y entrega el resultado mediante señales."""
+
+    def __init__(self, file_path, is_intrafocal=True, binning=1):
+        super().__init__()
+        self.file_path = file_path
+        self.is_intrafocal = is_intrafocal
+        self.binning = binning
+        self.signals = WorkerSignals()
+
+    def run(self):
+        try:
+            result = load_and_prepare_image(self.file_path, self.is_intrafocal, self.binning)
+        except Exception as e:
+            self.signals.error.emit(self.file_path, self.is_intrafocal, str(e))
+            return
+        self.signals.finished.emit(result)
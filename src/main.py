@@ -4,8 +4,11 @@
 import sys
 from PyQt5.QtWidgets import QApplication
 from src.gui.main_window import FitsViewer
+from src.common.tracing import install_from_environment
 
 def main():
+    # PYRODDIER_TRACE=traza.json guarda una traza Chrome de la sesión
+    install_from_environment()
     app = QApplication(sys.argv)
     viewer = FitsViewer()
     viewer.show()
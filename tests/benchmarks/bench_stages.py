@@ -0,0 +1,232 @@
+# Copyright (c) 2025 Adrián Hernández Padrón
+# Licensed under the MIT License. See LICENSE file in the project root for full license information.
+
+"""
+Benchmarks por etapa del pipeline de Roddier.
+
+Mide el tiempo (mínimo de varias repeticiones) y el pico de memoria
+(tracemalloc, en una ejecución aparte) de cada etapa para distintos
+tamaños de recorte y números de modos, guarda los resultados en JSON y
+los compara con una línea base para detectar regresiones.
+
+Uso:
+    python -m tests.benchmarks.bench_stages --output bench.json
+    python -m tests.benchmarks.bench_stages --sizes 128 256 --baseline tests/benchmarks/baseline.json
+    python -m tests.benchmarks.bench_stages --save-baseline tests/benchmarks/baseline.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+import numpy as np
+from astropy.io import fits
+from scipy.ndimage import zoom
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '../..'))
+
+from src.common.utils import load_fits_image
+from src.core.fft_plan import plan_fft
+from src.core.interferometry import calculate_interferogram
+from src.core.optical_preprocessing import align_images, preprocess_roddier
+from src.core.psf import calculate_psf
+from src.core.roddier import calculate_wavefront
+from src.core.simulation import simulate_donuts
+from src.core.telescope import TelescopeParams
+from src.core.zernike import fit_zernike, zernike_polynomials
+
+DEFAULT_SIZES = (128, 256, 512, 1024, 2048)
+DEFAULT_MODES = (23, 45)
+
+# Etapas cuyo coste depende del número de modos
+MODAL_STAGES = ('zernike_polynomials', 'fit_zernike')
+
+# Tamaño máximo que se simula directamente; por encima se amplía el par simulado
+MAX_SIMULATED_SIZE = 512
+
+TELESCOPE = TelescopeParams(apertura=200.0, focal=1000.0, pixel_scale=5.0)
+
+
+class Workload:
+    """Par de donuts simulado de un tamaño dado y los productos intermedios del pipeline."""
+
+    def __init__(self, size, workdir):
+        self.size = size
+        sim_size = min(size, MAX_SIMULATED_SIZE)
+        # Radio del patrón: un 35 % del recorte
+        pixel_mm = TELESCOPE.effective_pixel_scale / 1000
+        dz_mm = 0.35 * sim_size * pixel_mm * TELESCOPE.focal / (TELESCOPE.apertura / 2)
+        coeffs = np.zeros(11)
+        coeffs[[4, 6, 10]] = [2e-5, -1e-5, 1e-5]
+        batch = simulate_donuts(TELESCOPE, dz_mm, coeffs, size=sim_size, rng=0)
+
+        intra, extra = batch.intra[0], batch.extra[0]
+        if size != sim_size:
+            scale = size / sim_size
+            intra = np.clip(zoom(intra.astype(float), scale, order=1), 0, 65535).astype(np.uint16)
+            extra = np.clip(zoom(extra.astype(float), scale, order=1), 0, 65535).astype(np.uint16)
+        self.intra = intra.astype(np.float64)
+        self.extra = extra.astype(np.float64)
+
+        self.fits_path = os.path.join(workdir, f"intra_{size}.fits")
+        fits.writeto(self.fits_path, intra, overwrite=True)
+
+        self.delta_I_norm, self.mask, self.center, self.R_out, self.dz_mm = preprocess_roddier(
+            self.intra, self.extra, apertura=TELESCOPE.apertura, focal=TELESCOPE.focal,
+            pixel_scale=TELESCOPE.pixel_scale)
+        self.fft_shape = plan_fft(self.R_out).fft_shape
+        self.wavefront = calculate_wavefront(self.delta_I_norm, self.mask, dz_mm=self.dz_mm,
+                                             fft_shape=self.fft_shape)
+
+
+def stage_callables(workload, n_modes):
+    """Funciones sin argumentos que ejecutan cada etapa sobre la carga de trabajo."""
+    w = workload
+    return {
+        'load_fits_image': lambda: load_fits_image(w.fits_path),
+        'align_images': lambda: align_images(w.intra, w.extra),
+        'preprocess_roddier': lambda: preprocess_roddier(
+            w.intra, w.extra, apertura=TELESCOPE.apertura, focal=TELESCOPE.focal,
+            pixel_scale=TELESCOPE.pixel_scale),
+        'calculate_wavefront': lambda: calculate_wavefront(w.delta_I_norm, w.mask, dz_mm=w.dz_mm,
+                                                           fft_shape=w.fft_shape),
+        'zernike_polynomials': lambda: zernike_polynomials(w.mask.shape, w.mask, w.R_out, w.center, n_modes),
+        'fit_zernike': lambda: fit_zernike(w.wavefront, w.mask, w.R_out, w.center, n_modes),
+        'calculate_psf': lambda: calculate_psf(w.wavefront, w.mask, fft_shape=w.fft_shape),
+        'calculate_interferogram': lambda: calculate_interferogram(w.wavefront, 1.0, 0.5, w.mask),
+    }
+
+
+STAGES = (
+    'load_fits_image', 'align_images', 'preprocess_roddier', 'calculate_wavefront',
+    'zernike_polynomials', 'fit_zernike', 'calculate_psf', 'calculate_interferogram')
+
+
+def measure(func, repeats=3):
+    """
+    Mide una etapa.
+
+    Retorna:
+    - (tiempo mínimo en segundos, pico de memoria en MB)
+    """
+    func()  # calentamiento (cachés, importaciones perezosas)
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+
+    # La memoria se mide aparte: tracemalloc ralentiza la ejecución
+    tracemalloc.start()
+    try:
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return min(times), peak / 2**20
+
+
+def run_benchmarks(sizes=DEFAULT_SIZES, modes=DEFAULT_MODES, stages=STAGES, repeats=3, log=print):
+    """
+    Ejecuta los benchmarks.
+
+    Retorna:
+    - dict con metadatos y una lista de resultados {stage, size, n_modes, time_s, peak_mb}
+    """
+    results = []
+    with tempfile.TemporaryDirectory() as workdir:
+        for size in sizes:
+            workload = Workload(size, workdir)
+            for stage in stages:
+                stage_modes = modes if stage in MODAL_STAGES else (None,)
+                for n_modes in stage_modes:
+                    func = stage_callables(workload, n_modes or DEFAULT_MODES[0])[stage]
+                    time_s, peak_mb = measure(func, repeats)
+                    results.append({'stage': stage, 'size': size, 'n_modes': n_modes,
+                                    'time_s': time_s, 'peak_mb': peak_mb})
+                    if log:
+                        label = f"{stage}[{n_modes}]" if n_modes else stage
+                        log(f"{label:<28} {size:>5}²  {time_s * 1000:9.2f} ms  {peak_mb:9.1f} MB")
+            del workload
+
+    return {
+        'meta': {
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'machine': platform.machine(),
+            'platform': platform.platform(),
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        },
+        'results': results,
+    }
+
+
+def _key(entry):
+    return entry['stage'], entry['size'], entry['n_modes']
+
+
+def compare_results(current, baseline, time_tolerance=0.25, memory_tolerance=0.10, min_time_s=1e-3):
+    """
+    Compara unos resultados con la línea base.
+
+    Una etapa es una regresión si tarda más de (1 + time_tolerance) veces lo
+    registrado (ignorando etapas por debajo de `min_time_s`, dominadas por el
+    ruido) o si su pico de memoria crece más de `memory_tolerance`.
+
+    Retorna:
+    - lista de cadenas describiendo cada regresión
+    """
+    reference = {_key(entry): entry for entry in baseline['results']}
+    regressions = []
+    for entry in current['results']:
+        base = reference.get(_key(entry))
+        if base is None:
+            continue
+        stage, size, n_modes = _key(entry)
+        label = f"{stage}[{n_modes}] {size}²" if n_modes else f"{stage} {size}²"
+        if entry['time_s'] > max(base['time_s'], min_time_s) * (1 + time_tolerance):
+            regressions.append(f"{label}: tiempo {base['time_s'] * 1000:.2f} -> {entry['time_s'] * 1000:.2f} ms")
+        if entry['peak_mb'] > base['peak_mb'] * (1 + memory_tolerance) + 0.5:
+            regressions.append(f"{label}: memoria {base['peak_mb']:.1f} -> {entry['peak_mb']:.1f} MB")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks por etapa del test de Roddier")
+    parser.add_argument('--sizes', type=int, nargs='+', default=list(DEFAULT_SIZES))
+    parser.add_argument('--modes', type=int, nargs='+', default=list(DEFAULT_MODES))
+    parser.add_argument('--stages', nargs='+', default=list(STAGES), choices=STAGES)
+    parser.add_argument('--repeats', type=int, default=3)
+    parser.add_argument('--output', help="fichero JSON donde guardar los resultados")
+    parser.add_argument('--baseline', help="línea base JSON con la que comparar")
+    parser.add_argument('--save-baseline', help="guardar los resultados como nueva línea base")
+    parser.add_argument('--time-tolerance', type=float, default=0.25)
+    parser.add_argument('--memory-tolerance', type=float, default=0.10)
+    args = parser.parse_args(argv)
+
+    current = run_benchmarks(args.sizes, args.modes, args.stages, args.repeats)
+
+    for path in (args.output, args.save_baseline):
+        if path:
+            with open(path, 'w') as f:
+                json.dump(current, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare_results(current, baseline, args.time_tolerance, args.memory_tolerance)
+        if regressions:
+            print("Regresiones respecto a la línea base:")
+            for line in regressions:
+                print(f"  {line}")
+            return 1
+        print("Sin regresiones respecto a la línea base.")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
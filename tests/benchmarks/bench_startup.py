@@ -0,0 +1,153 @@
+# Copyright (c) 2025 Adrián Hernández Padrón
+# Licensed under the MIT License. See LICENSE file in the project root for full license information.
+
+"""
+Benchmark del arranque de la aplicación.
+
+Cada medida se hace en un intérprete nuevo (subproceso), de modo que no
+influyen los módulos ya importados por quien lanza el benchmark:
+
+- tiempo de importación de un módulo según `python -X importtime`, con los
+  módulos que más tardan;
+- tiempo hasta la ventana: importar `src.gui.main_window`, crear la
+  QApplication y el FitsViewer y mostrarlo;
+- módulos pesados (matplotlib, astropy, scipy) cargados al arrancar, que
+  deberían importarse sólo con el primer test, carga FITS o ventana de resultados.
+
+Uso:
+    python -m tests.benchmarks.bench_startup
+    python -m tests.benchmarks.bench_startup --repeats 5 --max-seconds 1.0
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '../..'))
+
+# Paquetes que no deben importarse para mostrar la ventana principal
+HEAVY_MODULES = ('matplotlib', 'astropy', 'scipy')
+
+# Guion que mide el tiempo hasta mostrar la ventana principal
+_WINDOW_SCRIPT = """
+import json, sys, time
+start = time.perf_counter()
+from PyQt5.QtWidgets import QApplication
+from src.gui.main_window import FitsViewer
+imported = time.perf_counter()
+app = QApplication(sys.argv)
+viewer = FitsViewer()
+viewer.show()
+app.processEvents()
+shown = time.perf_counter()
+heavy = sorted({name.split('.')[0] for name in sys.modules} & set(%r))
+viewer.close()
+print(json.dumps({'import_s': imported - start, 'window_s': shown - start, 'heavy_modules': heavy}))
+"""
+
+
+def _run(args, env=None):
+    environment = dict(os.environ)
+    environment.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    environment.update(env or {})
+    completed = subprocess.run([sys.executable] + args, cwd=PROJECT_ROOT, env=environment,
+                               capture_output=True, text=True, check=True)
+    return completed
+
+
+def parse_importtime(output):
+    """
+    Interpreta la salida de `python -X importtime`.
+
+    Retorna:
+    - dict módulo -> (tiempo propio, tiempo acumulado) en segundos
+    """
+    times = {}
+    for line in output.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        fields = line[len('import time:'):].split('|')
+        if len(fields) != 3 or not fields[0].strip().isdigit():
+            continue  # cabecera
+        times[fields[2].strip()] = (int(fields[0]) / 1e6, int(fields[1]) / 1e6)
+    return times
+
+
+def measure_import(module='src.gui.main_window', top=10):
+    """
+    Importa `module` en un intérprete nuevo con -X importtime.
+
+    Retorna:
+    - (tiempo acumulado del módulo en segundos, lista de (módulo, segundos) más lentos)
+    """
+    completed = _run(['-X', 'importtime', '-c', f'import {module}'])
+    times = parse_importtime(completed.stderr)
+    slowest = sorted(((name, cumulative) for name, (_, cumulative) in times.items()),
+                     key=lambda item: item[1], reverse=True)
+    return times.get(module, (0.0, 0.0))[1], slowest[:top]
+
+
+def measure_time_to_window():
+    """
+    Tiempo desde el inicio del guion hasta mostrar el FitsViewer (sin contar el
+    arranque del propio intérprete).
+
+    Retorna:
+    - dict {import_s, window_s, heavy_modules}
+    """
+    completed = _run(['-c', _WINDOW_SCRIPT % (HEAVY_MODULES,)])
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def run_benchmarks(repeats=3, log=print):
+    """
+    Mide el arranque `repeats` veces y se queda con el mínimo.
+
+    Retorna:
+    - dict {import_s, window_s, heavy_modules, slowest_imports}
+    """
+    runs = [measure_time_to_window() for _ in range(repeats)]
+    _, slowest = measure_import()
+    result = {
+        'import_s': min(run['import_s'] for run in runs),
+        'window_s': min(run['window_s'] for run in runs),
+        'heavy_modules': sorted({name for run in runs for name in run['heavy_modules']}),
+        'slowest_imports': slowest,
+    }
+    if log:
+        log(f"importación de src.gui.main_window  {result['import_s'] * 1000:8.1f} ms")
+        log(f"tiempo hasta la ventana              {result['window_s'] * 1000:8.1f} ms")
+        log(f"módulos pesados cargados: {', '.join(result['heavy_modules']) or 'ninguno'}")
+        log("importaciones más lentas:")
+        for name, seconds in slowest:
+            log(f"  {name:<40} {seconds * 1000:8.1f} ms")
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark del arranque de PyRoddier")
+    parser.add_argument('--repeats', type=int, default=3)
+    parser.add_argument('--max-seconds', type=float,
+                        help="fallar si el tiempo hasta la ventana supera este valor")
+    parser.add_argument('--output', help="fichero JSON donde guardar los resultados")
+    args = parser.parse_args(argv)
+
+    result = run_benchmarks(args.repeats)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(result, f, indent=2)
+
+    failed = False
+    if result['heavy_modules']:
+        print(f"Módulos pesados importados al arrancar: {', '.join(result['heavy_modules'])}")
+        failed = True
+    if args.max_seconds is not None and result['window_s'] > args.max_seconds:
+        print(f"El tiempo hasta la ventana supera {args.max_seconds:.2f} s")
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
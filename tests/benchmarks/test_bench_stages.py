@@ -0,0 +1,37 @@
+# Copyright (c) 2025 Adrián Hernández Padrón
+# Licensed under the MIT License. See LICENSE file in the project root for full license information.
+
+import copy
+import unittest
+
+# Add the src directory to the Python path
+import sys
+import os
+sys.path.append(os.path.join(os.path.dirname(__file__), '../..'))
+
+from tests.benchmarks.bench_stages import STAGES, compare_results, run_benchmarks
+
+class TestStageBenchmarks(unittest.TestCase):
+    def test_run_and_compare(self):
+        """A small run records every stage and flags slower or larger stages"""
+        current = run_benchmarks(sizes=(64,), modes=(5,), repeats=1, log=None)
+        self.assertEqual({entry['stage'] for entry in current['results']}, set(STAGES))
+        self.assertTrue(all(entry['time_s'] > 0 for entry in current['results']))
+        self.assertEqual(compare_results(current, current), [])
+
+        baseline = copy.deepcopy(current)
+        for entry in baseline['results']:
+            entry['time_s'] /= 2
+        regressions = compare_results(current, baseline, min_time_s=0)
+        self.assertEqual(len(regressions), len(current['results']))
+        self.assertTrue(all('tiempo' in line for line in regressions))
+
+        baseline = copy.deepcopy(current)
+        entry = baseline['results'][0]
+        entry['peak_mb'] = (current['results'][0]['peak_mb'] - 1) / 2
+        regressions = compare_results(current, baseline)
+        self.assertEqual(len(regressions), 1)
+        self.assertTrue(regressions[0].startswith(entry['stage']) and 'memoria' in regressions[0])
+
+if __name__ == '__main__':
+    unittest.main()
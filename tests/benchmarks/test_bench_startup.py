@@ -0,0 +1,31 @@
+# Copyright (c) 2025 Adrián Hernández Padrón
+# Licensed under the MIT License. See LICENSE file in the project root for full license information.
+
+import unittest
+
+# Add the src directory to the Python path
+import sys
+import os
+sys.path.append(os.path.join(os.path.dirname(__file__), '../..'))
+
+from tests.benchmarks.bench_startup import measure_time_to_window, parse_importtime
+
+class TestStartupBenchmark(unittest.TestCase):
+    def test_parse_importtime(self):
+        """Self and cumulative times are read per module and the header is skipped"""
+        output = ("import time: self [us] | cumulative | imported package\n"
+                  "import time:       120 |        120 |   numpy.version\n"
+                  "import time:      2000 |      90000 | numpy\n")
+        times = parse_importtime(output)
+        self.assertEqual(set(times), {'numpy.version', 'numpy'})
+        self.assertAlmostEqual(times['numpy'][0], 0.002)
+        self.assertAlmostEqual(times['numpy'][1], 0.09)
+
+    def test_window_without_heavy_modules(self):
+        """The main window is shown without importing matplotlib, astropy or scipy"""
+        result = measure_time_to_window()
+        self.assertEqual(result['heavy_modules'], [])
+        self.assertGreater(result['window_s'], result['import_s'])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,94 @@
+# Copyright (c) 2025 Adrián Hernández Padrón
+# Licensed under the MIT License. See LICENSE file in the project root for full license information.
+
+import numpy as np
+import time
+import unittest
+
+# Add the src directory to the Python path
+import sys
+import os
+sys.path.append(os.path.join(os.path.dirname(__file__), '../..'))
+
+from src.core.fast_path import (FAST_PATH_MODES, build_fast_reconstructor, clear_fast_path_cache,
+                                donut_moments, estimate_low_order)
+from src.core.fft_plan import plan_fft
+from src.core.pipeline import RoddierSettings, run_fast_path, run_roddier
+from src.core.simulation import simulate_donuts
+from src.core.telescope import TelescopeParams
+
+class TestFastPath(unittest.TestCase):
+    def setUp(self):
+        self.telescope = TelescopeParams(apertura=200.0, focal=1000.0, pixel_scale=5.0)
+        self.telescope_params = {'apertura': 200.0, 'focal': 1000.0, 'tamano_pixel': 5.0}
+        self.coeffs = np.zeros(FAST_PATH_MODES)
+        self.coeffs[[4, 5, 6, 7]] = [2e-4, -1e-4, 1.5e-4, -2e-4]
+        clear_fast_path_cache()
+
+    def test_donut_moments(self):
+        """The outer edge, obstruction and hole offset are measured from the lit pixels"""
+        y, x = np.indices((128, 128))
+        image = ((x - 60)**2 + (y - 70)**2 <= 40**2).astype(float)
+        image[(x - 64)**2 + (y - 70)**2 <= 12**2] = 0.0
+        image[0, 0] = 1.0  # un píxel de ruido no cambia la geometría
+
+        moments = donut_moments(image)
+        self.assertEqual(moments.center, (60.0, 70.0))
+        self.assertAlmostEqual(moments.R_out, 40.5)
+        self.assertAlmostEqual(moments.R_in, 12.0, delta=1.0)
+        self.assertAlmostEqual(moments.hole_offset[0], 4.0, delta=0.5)
+        self.assertAlmostEqual(moments.hole_offset[1], 0.0, delta=0.5)
+
+    def test_matches_zonal_pipeline(self):
+        """Tilt, defocus, astigmatism and coma agree with the full zonal reconstruction of the same pair"""
+        batch = simulate_donuts(self.telescope, 3.0, self.coeffs, flux=1e8, rng=0)
+        settings = RoddierSettings(
+            telescope_params=self.telescope_params,
+            roddier_params={'max_order': FAST_PATH_MODES, 'threshold': 0.5, 'solver': 'zonal'},
+            fft_shape=plan_fft(batch.R_out).fft_shape)
+        intra, extra = batch.intra[0].astype(float), batch.extra[0].astype(float)
+
+        full = run_roddier(intra, extra, settings)
+        fast = estimate_low_order(intra, extra, 200.0, 1000.0, 5.0)
+        np.testing.assert_allclose(fast.zernike_coeffs[1:], full.zernike_coeffs[1:], atol=1e-5)
+        self.assertAlmostEqual(fast.dz_mm, 3.0, delta=0.1)
+
+    def test_reconstructor_is_reused(self):
+        """Pairs with the same donut size share the precomputed matrix"""
+        batch = simulate_donuts(self.telescope, 2.0, np.tile(self.coeffs, (2, 1)), flux=1e8, rng=1)
+        first = estimate_low_order(batch.intra[0], batch.extra[0], 200.0, 1000.0, 5.0)
+        second = estimate_low_order(np.roll(batch.intra[1], 3, axis=1), np.roll(batch.extra[1], 3, axis=1),
+                                    200.0, 1000.0, 5.0)
+        self.assertIs(first.reconstructor, second.reconstructor)
+        self.assertEqual(second.offset[0], first.offset[0] + 3)
+        self.assertIs(build_fast_reconstructor(first.reconstructor.size, first.reconstructor.R_out,
+                                               first.reconstructor.R_in,
+                                               plan_fft(first.reconstructor.R_out).fft_shape,
+                                               offset=(0.5, 0.5)),
+                      first.reconstructor)
+
+    def test_run_fast_path_result(self):
+        """The fast path returns a RoddierResult that the results window can show"""
+        batch = simulate_donuts(self.telescope, 2.0, self.coeffs, flux=1e8, rng=2)
+        settings = RoddierSettings(self.telescope_params, {'max_order': 23, 'threshold': 0.5})
+        result = run_fast_path(batch.intra[0], batch.extra[0], settings)
+        self.assertEqual(len(result.zernike_coeffs), FAST_PATH_MODES)
+        self.assertEqual(result.zernike_base.n_modes, FAST_PATH_MODES)
+        self.assertEqual(result.annular_mask.shape, result.zernike_base.frame_shape)
+        self.assertEqual(result.wavefront.render(64).shape, (64, 64))
+
+    def test_video_rate_at_512(self):
+        """A 512x512 pair is analysed well above 30 frames per second"""
+        batch = simulate_donuts(self.telescope, 8.0, self.coeffs, size=512, flux=1e8, rng=3)
+        intra, extra = batch.intra[0], batch.extra[0]
+        estimate_low_order(intra, extra, 200.0, 1000.0, 5.0)  # construye la matriz
+
+        times = []
+        for _ in range(10):
+            start = time.perf_counter()
+            estimate_low_order(intra, extra, 200.0, 1000.0, 5.0)
+            times.append(time.perf_counter() - start)
+        self.assertLess(np.median(times), 1 / 30)
+
+if __name__ == '__main__':
+    unittest.main()
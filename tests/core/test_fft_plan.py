@@ -0,0 +1,64 @@
+# Copyright (c) 2025 Adrián Hernández Padrón
+# Licensed under the MIT License. See LICENSE file in the project root for full license information.
+
+import numpy as np
+from scipy.fft import next_fast_len
+import unittest
+
+# Add the src directory to the Python path
+import sys
+import os
+sys.path.append(os.path.join(os.path.dirname(__file__), '../..'))
+
+from src.core.fft_plan import plan_fft, pad_to_shape
+from src.core.roddier import calculate_wavefront
+from src.core.psf import calculate_psf
+from src.common.centroid import compute_spot_radius
+
+class TestFFTPlan(unittest.TestCase):
+    def test_plan_sizes(self):
+        """Crop covers the donut and both sizes are fast FFT lengths"""
+        for radius in (10, 37.5, 98, 410):
+            plan = plan_fft(radius)
+            self.assertGreaterEqual(plan.crop_size, 2 * radius)
+            self.assertEqual(plan.crop_size % 2, 0)
+            self.assertEqual(next_fast_len(plan.crop_size), plan.crop_size)
+            self.assertGreaterEqual(plan.fft_size, 2 * plan.crop_size)
+            self.assertEqual(next_fast_len(plan.fft_size), plan.fft_size)
+
+    def test_pad_to_shape(self):
+        """Padding keeps the data at the corner or at the center"""
+        image = np.ones((4, 6))
+        padded = pad_to_shape(image, (8, 10))
+        self.assertEqual(padded[:4, :6].sum(), 24)
+        centered = pad_to_shape(image, (8, 10), centered=True)
+        self.assertEqual(centered[2:6, 2:8].sum(), 24)
+        with self.assertRaises(ValueError):
+            pad_to_shape(image, (2, 2))
+
+    def test_padded_solver_and_psf(self):
+        """The solver returns the crop shape and the PSF the transform shape"""
+        plan = plan_fft(20)
+        y, x = np.indices((plan.crop_size, plan.crop_size))
+        r = np.hypot(y - plan.crop_size / 2, x - plan.crop_size / 2)
+        mask = (r > 5) & (r < 20)
+        delta_I_norm = np.where(mask, np.cos(x / 5.0), 0.0)
+
+        wavefront = calculate_wavefront(delta_I_norm, mask, dz_mm=1.0, fft_shape=plan.fft_shape)
+        self.assertEqual(wavefront.shape, delta_I_norm.shape)
+        self.assertTrue(np.all(np.isfinite(wavefront)))
+        self.assertTrue(np.allclose(wavefront[~mask], 0))
+
+        psf, psf_log = calculate_psf(wavefront, mask, fft_shape=plan.fft_shape)
+        self.assertEqual(psf.shape, plan.fft_shape)
+        self.assertAlmostEqual(psf.max(), 1.0)
+
+    def test_spot_radius(self):
+        """The spot radius estimate follows the donut size"""
+        y, x = np.indices((400, 600))
+        r = np.hypot(y - 200, x - 250)
+        image = ((r > 20) & (r < 60)).astype(float)
+        self.assertAlmostEqual(compute_spot_radius(image, (200, 250)), 60, delta=3)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,59 @@
+# Copyright (c) 2025 Adrián Hernández Padrón
+# Licensed under the MIT License. See LICENSE file in the project root for full license information.
+
+import numpy as np
+import unittest
+
+# Add the src directory to the Python path
+import sys
+import os
+sys.path.append(os.path.join(os.path.dirname(__file__), '../..'))
+
+from src.core.fft_plan import plan_fft
+from src.core.modal import build_modal_reconstructor, clear_modal_cache
+from src.core.pipeline import RoddierSettings, run_roddier
+from src.core.roddier import reconstruct_zernike
+from src.core.simulation import simulate_donuts
+from src.core.telescope import TelescopeParams
+
+class TestModalReconstruction(unittest.TestCase):
+    def setUp(self):
+        self.telescope = TelescopeParams(apertura=200.0, focal=1000.0, pixel_scale=5.0)
+        self.coeffs = np.zeros(11)
+        self.coeffs[[4, 6, 10]] = [2e-5, -1e-5, 1e-5]
+        size = 96
+        y, x = np.indices((size, size))
+        r = np.hypot(x - 48, y - 48)
+        self.mask = (r >= 10) & (r <= 38)
+        clear_modal_cache()
+
+    def _run(self, batch, solver, annular_basis=False):
+        settings = RoddierSettings(
+            telescope_params={'apertura': 200.0, 'focal': 1000.0, 'tamano_pixel': 5.0},
+            roddier_params={'max_order': 11, 'threshold': 0.5, 'solver': solver,
+                            'annular_basis': annular_basis},
+            fft_shape=plan_fft(batch.R_out).fft_shape)
+        return run_roddier(batch.intra[0].astype(float), batch.extra[0].astype(float), settings).zernike_coeffs
+
+    def test_modal_matches_zonal_on_simulated_pairs(self):
+        """Modal and zonal solvers give the same coefficients on simulated donut pairs"""
+        for dz_mm in (1.0, 1.5):
+            batch = simulate_donuts(self.telescope, dz_mm, self.coeffs, flux=1e8, noise=False)
+            for annular_basis in (False, True):
+                zonal = self._run(batch, 'zonal', annular_basis)
+                modal = self._run(batch, 'modal', annular_basis)
+                np.testing.assert_allclose(modal, zonal, rtol=1e-9, atol=1e-9 * np.abs(zonal).max())
+
+    def test_reconstructor_is_cached(self):
+        """The reconstructor is reused for the same geometry"""
+        first = build_modal_reconstructor(self.mask, 38, (48, 48), 2.0, max_order=15)
+        second = build_modal_reconstructor(self.mask.copy(), 38, (48, 48), 2.0, max_order=15)
+        self.assertIs(first, second)
+
+    def test_unknown_solver(self):
+        """Unknown solvers raise ValueError"""
+        with self.assertRaises(ValueError):
+            reconstruct_zernike(np.zeros(self.mask.shape), self.mask, 38, (48, 48), solver='foo')
+
+if __name__ == '__main__':
+    unittest.main()
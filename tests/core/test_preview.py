@@ -0,0 +1,57 @@
+# Copyright (c) 2025 Adrián Hernández Padrón
+# Licensed under the MIT License. See LICENSE file in the project root for full license information.
+
+import numpy as np
+import os
+import time
+import unittest
+
+# Add the src directory to the Python path
+import sys
+sys.path.append(os.path.join(os.path.dirname(__file__), '../..'))
+
+from src.core.fft_plan import plan_fft
+from src.core.pipeline import RoddierSettings, run_roddier
+from src.core.preview import PreviewRunner, proxy_factor
+from src.core.simulation import simulate_donuts
+from src.core.telescope import TelescopeParams
+
+TELESCOPE = {'apertura': 200.0, 'focal': 1000.0, 'tamano_pixel': 5.0}
+
+class TestPreview(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        coeffs = np.zeros(11)
+        coeffs[[4, 6]] = [2e-4, -1e-4]
+        batch = simulate_donuts(TelescopeParams(apertura=200.0, focal=1000.0, pixel_scale=5.0), 8.0, coeffs,
+                                size=512, flux=1e8, rng=0)
+        cls.intra, cls.extra = batch.intra[0].astype(float), batch.extra[0].astype(float)
+        cls.fft_shape = plan_fft(batch.R_out).fft_shape
+
+    def test_proxy_factor(self):
+        self.assertEqual([proxy_factor(size) for size in (100, 256, 384, 512, 2048)], [2, 2, 3, 4, 4])
+
+    def test_preview_matches_full_resolution(self):
+        """The binned proxy gives the same geometry and low-order modes as the full run, much faster"""
+        settings = RoddierSettings(telescope_params=TELESCOPE,
+                                   roddier_params={'max_order': 8, 'threshold': 0.5, 'solver': 'zonal'},
+                                   fft_shape=self.fft_shape)
+        start = time.perf_counter()
+        full = run_roddier(self.intra, self.extra, settings)
+        full_time = time.perf_counter() - start
+
+        runner = PreviewRunner()
+        preview = runner.update(self.intra, self.extra, 0.5, TELESCOPE)
+        self.assertEqual(preview.factor, 4)
+        self.assertAlmostEqual(preview.R_out * preview.factor, full.R_out, delta=2 * preview.factor)
+        low_order = full.zernike_coeffs[4:8]
+        np.testing.assert_allclose(preview.zernike_coeffs[4:8], low_order, atol=0.15 * np.abs(low_order).max())
+        self.assertLess(preview.elapsed, 0.5 * full_time)
+
+        # Sólo cambia el umbral: se reutiliza el alineado del proxy
+        runner.update(self.intra, self.extra, 0.4, TELESCOPE)
+        self.assertEqual((runner.graph.runs['align'], runner.graph.runs['preprocess']), (1, 2))
+        self.assertFalse(runner.update(self.intra, self.extra, 0.4, None).calibrated)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,125 @@
+# Copyright (c) 2025 Adrián Hernández Padrón
+# Licensed under the MIT License. See LICENSE file in the project root for full license information.
+
+import csv
+import numpy as np
+import os
+import tempfile
+import time
+import unittest
+from scipy.ndimage import gaussian_filter
+
+# Add the src directory to the Python path
+import sys
+sys.path.append(os.path.join(os.path.dirname(__file__), '../..'))
+
+from src.common.ser import SerReader, write_ser
+from src.core.fft_plan import plan_fft
+from src.core.pipeline import RoddierSettings, run_roddier
+from src.core.quality import append_scores_csv, save_scores_csv, score_source, select_frames
+from src.core.simulation import simulate_donuts
+from src.core.stacking import stack_file
+from src.core.telescope import TelescopeParams
+
+def donut(size=256, cx=128, cy=128, blur=1.0, stretch=1.0, amplitude=1000.0):
+    y, x = np.indices((size, size))
+    r = np.hypot((x - cx) / stretch, y - cy)
+    return gaussian_filter(np.where((r <= 80) & (r >= 25), amplitude, 0.0), blur) + 100.0
+
+class TestQuality(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        rng = np.random.default_rng(0)
+        # Nítido, dos con mal seeing, deformado, desplazado y saturado
+        frames = np.stack([donut(blur=1), donut(blur=4), donut(blur=8), donut(stretch=1.5),
+                           donut(cx=160), donut(amplitude=5000)])
+        frames += rng.normal(0, 5, frames.shape)
+        self.frames = np.clip(frames, 0, 4095).astype(np.uint16)
+        self.path = os.path.join(self.temp_dir.name, 'capture.ser')
+        write_ser(self.path, self.frames, pixel_depth=12)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_scores_and_selection(self):
+        """Blurred, elongated, displaced and clipped frames are ranked down or rejected"""
+        with SerReader(self.path) as reader:
+            scores = score_source(reader, chunk_frames=4)
+        self.assertEqual([s.index for s in scores], list(range(6)))
+        self.assertGreater(scores[0].sharpness, scores[1].sharpness)
+        self.assertGreater(scores[1].sharpness, scores[2].sharpness)
+        self.assertLess(scores[3].circularity, 0.8)
+        self.assertAlmostEqual(scores[4].jitter, 32.0, delta=1.0)
+        self.assertGreater(scores[5].saturation, 0.5)
+        self.assertGreater(scores[0].snr, 100)
+
+        selection = select_frames(scores, keep_fraction=0.3)
+        np.testing.assert_array_equal(selection, [True, False, False, False, False, False])
+        self.assertEqual([s.reason for s in scores[3:]], ['deformado', 'desplazado', 'saturado'])
+        self.assertEqual([s.rank for s in scores[:3]], [0, 1, 2])
+
+    def test_stack_best_frames_and_export(self):
+        """Only the selected frames are stacked and the scores are written to CSV"""
+        result = stack_file(self.path, keep_fraction=0.3)
+        self.assertEqual(result.n_frames, 1)
+        np.testing.assert_allclose(result.image, self.frames[0])
+
+        path = os.path.join(self.temp_dir.name, 'frames.csv')
+        save_scores_csv(result.scores, path, 'intra')
+        append_scores_csv(result.scores, path, 'extra')
+        with open(path, newline='') as f:
+            rows = list(csv.DictReader(f))
+        self.assertEqual(len(rows), 12)
+        self.assertEqual(rows[0]['video'], 'intra')
+        self.assertEqual(rows[0]['selected'], 'True')
+        self.assertEqual(rows[11]['reason'], 'saturado')
+
+    def test_all_frames_slightly_clipped(self):
+        """When every frame fails a criterion the best ones are still stacked and flagged"""
+        frames = np.stack([donut(blur=blur, amplitude=3000.0) for blur in (1, 2, 3, 4)])
+        frames[:, 60:70, 123:133] = 4095  # unos pocos píxeles saturados en el anillo de cada fotograma
+        path = os.path.join(self.temp_dir.name, 'clipped.ser')
+        write_ser(path, frames.astype(np.uint16), pixel_depth=12)
+
+        result = stack_file(path, keep_fraction=0.5)
+        self.assertEqual(result.n_frames, 2)
+        self.assertEqual([s.selected for s in result.scores], [True, True, False, False])
+        self.assertEqual([s.reason for s in result.scores],
+                         ['saturado (sin alternativa)'] * 2 + ['saturado'] * 2)
+
+    def test_hot_pixels_do_not_saturate(self):
+        """Clipped pixels outside the donut (hot pixels, background) do not count as saturation"""
+        frames = np.stack([donut(blur=blur) for blur in (1, 2, 3, 4)])
+        frames[:, 5:7, 5:7] = 4095  # píxeles calientes en el fondo
+        frames[:, 128, 128] = 4095  # y uno en el hueco del donut
+        path = os.path.join(self.temp_dir.name, 'hot.ser')
+        write_ser(path, frames.astype(np.uint16), pixel_depth=12)
+
+        result = stack_file(path, keep_fraction=0.5)
+        self.assertEqual([s.saturation for s in result.scores], [0.0] * 4)
+        self.assertEqual([s.selected for s in result.scores], [True, True, False, False])
+        self.assertEqual([s.reason for s in result.scores], [''] * 2 + ['descartado por calidad'] * 2)
+
+    def test_cost_is_small_next_to_pipeline(self):
+        """Scoring a pair of frames costs a small fraction of a full reconstruction"""
+        batch = simulate_donuts(TelescopeParams(apertura=200.0, focal=1000.0, pixel_scale=5.0), 8.0,
+                                np.zeros(8), size=512, flux=1e8, rng=0)
+        intra, extra = batch.intra[0].astype(float), batch.extra[0].astype(float)
+        settings = RoddierSettings(
+            telescope_params={'apertura': 200.0, 'focal': 1000.0, 'tamano_pixel': 5.0},
+            roddier_params={'max_order': 8, 'threshold': 0.5, 'solver': 'zonal'},
+            fft_shape=plan_fft(batch.R_out).fft_shape)
+        start = time.perf_counter()
+        run_roddier(intra, extra, settings)
+        pipeline = time.perf_counter() - start
+
+        path = os.path.join(self.temp_dir.name, 'pair.ser')
+        write_ser(path, np.stack([batch.intra[0], batch.extra[0]]).astype(np.uint16))
+        with SerReader(path) as reader:
+            start = time.perf_counter()
+            score_source(reader)
+            scoring = time.perf_counter() - start
+        self.assertLess(scoring, 0.25 * pipeline)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,61 @@
+# Copyright (c) 2025 Adrián Hernández Padrón
+# Licensed under the MIT License. See LICENSE file in the project root for full license information.
+
+import numpy as np
+import unittest
+
+# Add the src directory to the Python path
+import sys
+import os
+sys.path.append(os.path.join(os.path.dirname(__file__), '../..'))
+
+from src.core.refinement import RoddierPropagator, refine_wavefront
+from src.core.roddier import calculate_wavefront, reconstruct_zernike
+from src.core.zernike import fit_zernike, zernike_polynomials
+
+class TestIterativeRefinement(unittest.TestCase):
+    def setUp(self):
+        size = 96
+        y, x = np.indices((size, size))
+        r = np.hypot(x - 48, y - 48)
+        self.mask = (r >= 9) & (r <= 36)
+        self.R_out = 36
+        self.center = (48, 48)
+        self.dz_mm = 3.0
+        self.fft_shape = (192, 192)
+        self.coeffs = np.zeros(15)
+        self.coeffs[[3, 4, 6, 10]] = [0.3e-4, 0.2e-4, -0.15e-4, 0.1e-4]
+        base = zernike_polynomials(self.mask.shape, self.mask, self.R_out, self.center, 15)
+        self.wavefront = np.tensordot(self.coeffs, base, axes=1)
+        self.propagator = RoddierPropagator(self.mask, self.dz_mm, fft_shape=self.fft_shape)
+        self.delta_I_norm = self.propagator.simulate(self.wavefront)
+
+    def test_solve_matches_zonal(self):
+        """The correction step is the zonal solver"""
+        expected = calculate_wavefront(self.delta_I_norm, self.mask, dz_mm=self.dz_mm, fft_shape=self.fft_shape)
+        np.testing.assert_allclose(self.propagator.solve(self.delta_I_norm), expected, atol=1e-15)
+
+    def test_refinement_converges(self):
+        """Iterating reduces the residual and recovers the simulated modes"""
+        result = refine_wavefront(self.delta_I_norm, self.mask, self.dz_mm, fft_shape=self.fft_shape,
+                                  tol=1e-3)
+        self.assertTrue(result.converged)
+        self.assertEqual(len(result.residuals), len(result.timings))
+        self.assertLess(result.residuals[-1], 1e-3)
+        self.assertTrue(np.all(np.diff(result.residuals) < 0))
+
+        coeffs, _ = fit_zernike(result.wavefront, self.mask, self.R_out, self.center, 15)
+        # El pistón no se observa en ΔI/I₀
+        np.testing.assert_allclose(coeffs[1:], self.coeffs[1:], atol=2e-7)
+
+        zonal, _ = reconstruct_zernike(self.delta_I_norm, self.mask, self.R_out, self.center,
+                                       dz_mm=self.dz_mm, max_order=15, fft_shape=self.fft_shape)
+        self.assertGreater(np.abs(zonal[1:] - self.coeffs[1:]).max(), 1e-6)
+
+    def test_requires_defocus(self):
+        """The forward model needs the physical defocus distance"""
+        with self.assertRaises(ValueError):
+            refine_wavefront(self.delta_I_norm, self.mask, None)
+
+if __name__ == '__main__':
+    unittest.main()
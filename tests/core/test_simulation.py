@@ -0,0 +1,68 @@
+# Copyright (c) 2025 Adrián Hernández Padrón
+# Licensed under the MIT License. See LICENSE file in the project root for full license information.
+
+import numpy as np
+import tempfile
+import unittest
+
+# Add the src directory to the Python path
+import sys
+import os
+sys.path.append(os.path.join(os.path.dirname(__file__), '../..'))
+
+from src.common.utils import guess_pair_path, load_fits_raw
+from src.core.optical_preprocessing import estimate_defocus_mm
+from src.core.refinement import refine_wavefront
+from src.core.simulation import donut_radius_px, simulate_donuts, write_fits_pairs
+from src.core.telescope import TelescopeParams
+from src.core.zernike import fit_zernike
+
+class TestDonutSimulation(unittest.TestCase):
+    def setUp(self):
+        self.telescope = TelescopeParams(apertura=200.0, focal=1000.0, pixel_scale=5.0)
+        self.coeffs = np.zeros(11)
+        self.coeffs[[4, 6, 10]] = [2e-5, -1e-5, 1e-5]
+
+    def test_geometry_matches_defocus_estimate(self):
+        """The donut radius is consistent with the defocus estimate of the pipeline"""
+        radius = donut_radius_px(self.telescope, 1.5)
+        self.assertAlmostEqual(estimate_defocus_mm(radius, 5.0, 1000.0, 200.0), 1.5)
+
+    def test_noise_free_pair_recovers_coefficients(self):
+        """Without noise, sky or seeing the reconstruction returns the input modes"""
+        batch = simulate_donuts(self.telescope, 1.0, self.coeffs, sky=0.0, seeing_arcsec=0.0,
+                                noise=False, quantize=False)
+        intra, extra = batch.intra[0], batch.extra[0]
+        I0 = 0.5 * (intra + extra)
+        delta_I_norm = np.divide(extra - intra, I0, out=np.zeros_like(I0), where=I0 > 1e-12) * batch.mask
+
+        result = refine_wavefront(delta_I_norm, batch.mask, batch.dz_mm, fft_shape=(2 * intra.shape[0],) * 2,
+                                  tol=1e-5)
+        coeffs, _ = fit_zernike(result.wavefront, batch.mask, batch.R_out, batch.center, 11)
+        np.testing.assert_allclose(coeffs[1:], self.coeffs[1:], atol=1e-8)
+
+    def test_batch_is_reproducible(self):
+        """Noisy batches are reproducible from the seed and look like camera frames"""
+        coeffs = np.random.default_rng(0).normal(scale=1e-5, size=(6, 11))
+        first = simulate_donuts(self.telescope, 1.0, coeffs, rng=3, batch_size=4)
+        second = simulate_donuts(self.telescope, 1.0, coeffs, rng=3)
+        self.assertEqual(first.intra.shape, (6,) + first.mask.shape)
+        self.assertEqual(first.intra.dtype, np.uint16)
+        np.testing.assert_array_equal(first.intra, second.intra)
+        np.testing.assert_array_equal(first.extra, second.extra)
+
+        # Dentro del anillo hay señal por encima del cielo
+        self.assertGreater(first.intra[0][first.mask].mean(), 2 * first.intra[0][~first.mask].mean())
+
+    def test_write_fits_pairs(self):
+        """Pairs are written with the extra-focal frame rotated like the camera output"""
+        batch = simulate_donuts(self.telescope, 1.0, np.tile(self.coeffs, (2, 1)), rng=0)
+        with tempfile.TemporaryDirectory() as tmp:
+            paths = write_fits_pairs(batch, tmp)
+            self.assertEqual([os.path.basename(p) for p in paths[1]], ['intra_0001.fits', 'extra_0001.fits'])
+            self.assertEqual(guess_pair_path(paths[0][0]), paths[0][1])
+            np.testing.assert_array_equal(load_fits_raw(paths[0][0]), batch.intra[0])
+            np.testing.assert_array_equal(np.rot90(load_fits_raw(paths[0][1]), k=2), batch.extra[0])
+
+if __name__ == '__main__':
+    unittest.main()
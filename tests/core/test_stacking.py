@@ -0,0 +1,89 @@
+# Copyright (c) 2025 Adrián Hernández Padrón
+# Licensed under the MIT License. See LICENSE file in the project root for full license information.
+
+import numpy as np
+import os
+import tempfile
+import unittest
+from astropy.io import fits
+
+# Add the src directory to the Python path
+import sys
+sys.path.append(os.path.join(os.path.dirname(__file__), '../..'))
+
+from src.common.ser import write_ser
+from src.core.stacking import chunk_frames_for, frame_centroids, stack_file, stack_frames
+
+class ArrayFrames:
+    """Fuente de fotogramas en memoria que cuenta cuántos se leen a la vez."""
+
+    def __init__(self, frames):
+        self.frames = frames
+        self.largest_read = 0
+
+    def __len__(self):
+        return len(self.frames)
+
+    @property
+    def frame_shape(self):
+        return self.frames.shape[1:]
+
+    def read(self, start, stop):
+        self.largest_read = max(self.largest_read, stop - start)
+        return self.frames[start:stop].astype(np.float64)
+
+class TestStacking(unittest.TestCase):
+    def setUp(self):
+        y, x = np.indices((48, 48))
+        r = np.hypot(x - 24, y - 24)
+        self.donut = np.where((r <= 12) & (r >= 4), 1000.0, 0.0) + 100.0
+        self.shifts = [(0, 0), (2, -1), (-3, 1), (1, 3), (0, -2), (-1, -1)]
+        self.frames = np.stack([np.roll(self.donut, shift, axis=(0, 1)) for shift in self.shifts])
+
+    def test_registration_and_mean(self):
+        """Shifted frames are registered onto the first one and averaged in fixed-size chunks"""
+        source = ArrayFrames(self.frames)
+        result = stack_frames(source, chunk_frames=4)
+        self.assertEqual(source.largest_read, 4)
+        self.assertEqual(result.n_frames, 6)
+        np.testing.assert_array_equal(result.shifts, -np.array(self.shifts))
+        np.testing.assert_allclose(result.image, self.donut)
+
+        np.testing.assert_allclose(frame_centroids(self.frames[:2]), [[24, 24], [23, 26]], atol=1e-9)
+
+    def test_sigma_clip_rejects_outliers(self):
+        """A cosmic ray in one frame is rejected by the sigma-clipped stack but not by the mean"""
+        frames = np.repeat(self.donut[np.newaxis], 20, axis=0)
+        frames += np.random.default_rng(0).normal(0, 5, frames.shape)
+        frames[7, 30, 5] += 5000.0
+        mean = stack_frames(ArrayFrames(frames), register=False, chunk_frames=6)
+        clipped = stack_frames(ArrayFrames(frames), method='sigma_clip', register=False, chunk_frames=6)
+
+        self.assertGreater(mean.image[30, 5], 300)
+        self.assertLess(abs(clipped.image[30, 5] - 100), 10)
+        self.assertGreaterEqual(clipped.rejected, 1)
+        # Los bloques no cambian el resultado
+        whole = stack_frames(ArrayFrames(frames), method='sigma_clip', register=False, chunk_frames=20)
+        np.testing.assert_allclose(clipped.image, whole.image)
+
+    def test_stack_files(self):
+        """SER videos and FITS cubes stack to the same image"""
+        frames = self.frames.astype(np.uint16)
+        with tempfile.TemporaryDirectory() as tmp:
+            ser_path = os.path.join(tmp, 'intra.ser')
+            write_ser(ser_path, frames)
+            cube_path = os.path.join(tmp, 'intra.fits')
+            fits.PrimaryHDU(frames).writeto(cube_path)
+
+            from_ser = stack_file(ser_path, chunk_frames=2)
+            from_cube = stack_file(cube_path, method='sigma_clip')
+        np.testing.assert_allclose(from_ser.image, self.donut)
+        np.testing.assert_allclose(from_cube.image, self.donut)
+
+    def test_chunk_size(self):
+        """Chunks are sized from the memory budget"""
+        self.assertEqual(chunk_frames_for((1024, 1024), 64 * 1024 * 1024), 8)
+        self.assertEqual(chunk_frames_for((8192, 8192), 1024), 1)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,90 @@
+# Copyright (c) 2025 Adrián Hernández Padrón
+# Licensed under the MIT License. See LICENSE file in the project root for full license information.
+
+import numpy as np
+import pickle
+import unittest
+from types import SimpleNamespace
+
+# Add the src directory to the Python path
+import sys
+import os
+sys.path.append(os.path.join(os.path.dirname(__file__), '../..'))
+
+from src.core.statistics import ResultStatistics, RunningStats
+from src.core.wavefront import LazyWavefront
+
+class TestRunningStats(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.samples = rng.normal(size=(400, 6)) @ rng.normal(size=(6, 6)) + np.arange(6)
+
+    def test_matches_numpy(self):
+        """Single updates and blocks give the mean, variance and covariance of all samples"""
+        stats = RunningStats(6, covariance=True)
+        for sample in self.samples[:50]:
+            stats.update(sample)
+        stats.update_batch(self.samples[50:170])
+        stats.update_batch(self.samples[170:])
+
+        self.assertEqual(stats.n, 400)
+        np.testing.assert_allclose(stats.mean, self.samples.mean(axis=0))
+        np.testing.assert_allclose(stats.variance(), self.samples.var(axis=0, ddof=1))
+        np.testing.assert_allclose(stats.covariance(), np.cov(self.samples.T))
+
+    def test_merge_across_processes(self):
+        """Accumulators filled separately and pickled combine into the statistics of the union"""
+        parts = [RunningStats(6, covariance=True).update_batch(chunk)
+                 for chunk in np.array_split(self.samples, 3)]
+        merged = pickle.loads(pickle.dumps(parts[0]))
+        for part in parts[1:]:
+            merged.merge(pickle.loads(pickle.dumps(part)))
+        np.testing.assert_allclose(merged.mean, self.samples.mean(axis=0))
+        np.testing.assert_allclose(merged.covariance(), np.cov(self.samples.T))
+        with self.assertRaises(ValueError):
+            merged.merge(RunningStats(5))
+
+    def test_confidence_interval(self):
+        """About 95% of the intervals from independent series contain the true mean"""
+        rng = np.random.default_rng(1)
+        stats = RunningStats(2000)
+        stats.update_batch(rng.normal(3.0, 2.0, size=(10, 2000)))
+        low, high = stats.confidence_interval(0.95)
+        coverage = np.mean((low <= 3.0) & (3.0 <= high))
+        self.assertAlmostEqual(coverage, 0.95, delta=0.02)
+
+    def test_nan_elements_are_skipped(self):
+        """Masked map pixels only count the samples where they are defined"""
+        stats = RunningStats((2,))
+        stats.update([1.0, np.nan])
+        stats.update_batch([[3.0, 2.0], [5.0, 4.0]])
+        np.testing.assert_array_equal(stats.count, [3, 2])
+        np.testing.assert_allclose(stats.mean, [3.0, 3.0])
+        np.testing.assert_allclose(stats.variance(), [4.0, 2.0])
+        with self.assertRaises(ValueError):
+            RunningStats(2, covariance=True).update([1.0, np.nan])
+
+class TestResultStatistics(unittest.TestCase):
+    def test_coefficients_maps_and_metrics(self):
+        """Results from several pairs are summarised without keeping them"""
+        rng = np.random.default_rng(2)
+        coeffs = np.zeros((20, 8))
+        coeffs[:, 4] = 0.1 + rng.normal(0, 0.01, 20)
+        results = [SimpleNamespace(zernike_coeffs=c, wavefront=LazyWavefront(c, 50.0, 15.0)) for c in coeffs]
+
+        stats = ResultStatistics(map_size=64).extend(results[:12])
+        stats.merge(ResultStatistics(map_size=64).extend(results[12:]))
+        self.assertEqual(stats.n, 20)
+        np.testing.assert_allclose(stats.coeffs.mean, coeffs.mean(axis=0))
+        mean_map = LazyWavefront(coeffs.mean(axis=0), 50.0, 15.0).render(64)
+        np.testing.assert_allclose(stats.wavefront.mean[~mean_map.mask], mean_map.compressed())
+        self.assertTrue(np.all(stats.wavefront.count[mean_map.mask] == 0))
+        self.assertGreater(stats.rms.mean, 0)
+        low, high = stats.coeffs.confidence_interval()
+        self.assertTrue(low[4] < 0.1 < high[4])
+
+        with self.assertRaises(ValueError):
+            stats.update(SimpleNamespace(zernike_coeffs=np.zeros(4), wavefront=LazyWavefront(np.zeros(4), 50.0)))
+
+if __name__ == '__main__':
+    unittest.main()
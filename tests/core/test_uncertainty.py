@@ -0,0 +1,100 @@
+# Copyright (c) 2025 Adrián Hernández Padrón
+# Licensed under the MIT License. See LICENSE file in the project root for full license information.
+
+import numpy as np
+import time
+import unittest
+
+# Add the src directory to the Python path
+import sys
+import os
+sys.path.append(os.path.join(os.path.dirname(__file__), '../..'))
+
+from src.core.fft_plan import plan_fft
+from src.core.optical_preprocessing import preprocess_roddier
+from src.core.pipeline import RoddierSettings, run_roddier
+from src.core.roddier import reconstruct_zernike
+from src.core.simulation import simulate_donuts
+from src.core.telescope import TelescopeParams
+from src.core.uncertainty import build_batch_solver, coefficient_uncertainty, delta_noise
+
+class TestUncertainty(unittest.TestCase):
+    def setUp(self):
+        self.telescope = TelescopeParams(apertura=200.0, focal=1000.0, pixel_scale=5.0)
+        self.coeffs = np.zeros(11)
+        self.coeffs[[4, 6]] = [2e-4, -1e-4]
+        batch = simulate_donuts(self.telescope, 3.0, self.coeffs, flux=1e7, rng=0)
+        self.fft_shape = plan_fft(batch.R_out).fft_shape
+        self.intra, self.extra = batch.intra[0].astype(float), batch.extra[0].astype(float)
+        self.delta, self.mask, self.center, self.R_out, self.dz = preprocess_roddier(
+            self.intra, self.extra, 200.0, 1000.0, 5.0, 0.5)
+
+    def test_batch_solver_matches_reconstruction(self):
+        """Solving a stack of ΔI/I₀ images gives the coefficients of the single-image solvers"""
+        for solver in ('zonal', 'modal'):
+            for orthonormal in (False, True):
+                batch_solver = build_batch_solver(self.mask, self.R_out, self.center, self.dz, 11, solver,
+                                                  fft_shape=self.fft_shape, orthonormal=orthonormal)
+                expected, _ = reconstruct_zernike(self.delta, self.mask, self.R_out, self.center, self.dz, 11,
+                                                  solver, fft_shape=self.fft_shape, orthonormal=orthonormal)
+                solved = batch_solver.solve(np.stack([self.delta, 2 * self.delta]))
+                np.testing.assert_allclose(solved[0], expected, atol=1e-12 * np.abs(expected).max())
+                np.testing.assert_allclose(solved[1], 2 * expected, atol=1e-12 * np.abs(expected).max())
+
+    def test_errors_match_repeated_exposures(self):
+        """Monte-Carlo errors agree with the spread of coefficients over independent noisy pairs"""
+        batch_solver = build_batch_solver(self.mask, self.R_out, self.center, self.dz, 11,
+                                          fft_shape=self.fft_shape)
+        noise = delta_noise(self.intra, self.extra, self.mask)
+        errors = coefficient_uncertainty(noise, batch_solver, 200, rng=1).std()
+
+        repeats = simulate_donuts(self.telescope, 3.0, np.tile(self.coeffs, (40, 1)), flux=1e7, rng=5)
+        coeffs = []
+        for intra, extra in zip(repeats.intra, repeats.extra):
+            delta, *_ = preprocess_roddier(intra.astype(float), extra.astype(float), 200.0, 1000.0, 5.0, 0.5)
+            coeffs.append(reconstruct_zernike(delta, self.mask, self.R_out, self.center, self.dz, 11,
+                                              fft_shape=self.fft_shape)[0])
+        spread = np.std(coeffs, axis=0, ddof=1)
+        np.testing.assert_allclose(errors[1:], spread[1:], rtol=0.35)
+
+    def test_iterative_errors_match_repeated_exposures(self):
+        """Errors for the iterative solver follow its own spread, not the zonal one"""
+        telescope = TelescopeParams(apertura=200.0, focal=1000.0, pixel_scale=5.0)
+        coeffs = np.zeros(11)
+        coeffs[[4, 6, 10]] = [4e-5, -2e-5, 2e-5]
+        batch = simulate_donuts(telescope, 1.5, coeffs, flux=1e8, rng=0)
+        fft_shape = plan_fft(batch.R_out).fft_shape
+        intra, extra = batch.intra[0].astype(float), batch.extra[0].astype(float)
+        delta, mask, center, R_out, dz = preprocess_roddier(intra, extra, 200.0, 1000.0, 5.0, 0.5)
+        batch_solver = build_batch_solver(mask, R_out, center, dz, 11, 'iterative', fft_shape=fft_shape,
+                                          delta_I_norm=delta)
+        self.assertGreater(batch_solver.n_iter, 0)
+        np.testing.assert_allclose(batch_solver.solve(np.zeros_like(delta)), 0.0, atol=1e-15)
+        errors = coefficient_uncertainty(delta_noise(intra, extra, mask), batch_solver, 100, rng=1).std()
+
+        repeats = simulate_donuts(telescope, 1.5, np.tile(coeffs, (24, 1)), flux=1e8, rng=5)
+        repeated = []
+        for intra, extra in zip(repeats.intra, repeats.extra):
+            delta, *_ = preprocess_roddier(intra.astype(float), extra.astype(float), 200.0, 1000.0, 5.0, 0.5)
+            repeated.append(reconstruct_zernike(delta, mask, R_out, center, dz, 11, 'iterative',
+                                                fft_shape=fft_shape)[0])
+        spread = np.std(repeated, axis=0, ddof=1)
+        np.testing.assert_allclose(errors[1:], spread[1:], rtol=0.5)
+
+    def test_pipeline_errors_in_seconds(self):
+        """run_roddier reports per-mode errors when replicas are requested"""
+        settings = RoddierSettings(
+            telescope_params={'apertura': 200.0, 'focal': 1000.0, 'tamano_pixel': 5.0},
+            roddier_params={'max_order': 11, 'threshold': 0.5, 'solver': 'zonal', 'uncertainty_replicas': 200},
+            fft_shape=self.fft_shape)
+        start = time.perf_counter()
+        result = run_roddier(self.intra, self.extra, settings)
+        self.assertLess(time.perf_counter() - start, 10.0)
+        self.assertEqual(result.coeff_errors.shape, (11,))
+        self.assertTrue(np.all(result.coeff_errors[1:] > 0))
+        # Sin réplicas no se estiman errores
+        settings.roddier_params['uncertainty_replicas'] = 0
+        self.assertIsNone(run_roddier(self.intra, self.extra, settings).coeff_errors)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,63 @@
+# Copyright (c) 2025 Adrián Hernández Padrón
+# Licensed under the MIT License. See LICENSE file in the project root for full license information.
+
+import numpy as np
+import unittest
+
+# Add the src directory to the Python path
+import sys
+import os
+sys.path.append(os.path.join(os.path.dirname(__file__), '../..'))
+
+from src.core.wavefront import LazyWavefront
+from src.core.zernike import annular_zernike_basis, fit_zernike, zernike_polynomials
+
+class TestLazyWavefront(unittest.TestCase):
+    def setUp(self):
+        self.coeffs = np.zeros(15)
+        self.coeffs[[3, 4, 7, 10]] = [0.5, 0.2, -0.3, 0.1]
+
+    def test_render_matches_basis(self):
+        """Rendering at N pixels matches the dense basis on the same grid"""
+        size = 64
+        c = (size - 1) / 2
+        y, x = np.indices((size, size))
+        r = np.hypot(x - c, y - c)
+        mask = (r >= 8) & (r <= size / 2)
+        expected = np.tensordot(self.coeffs, zernike_polynomials(mask.shape, mask, size / 2, (c, c), 15), axes=1)
+
+        wavefront = LazyWavefront(self.coeffs, R_out=size / 2, R_in=8)
+        rendered = wavefront.render(size)
+        np.testing.assert_array_equal(~rendered.mask, mask)
+        np.testing.assert_allclose(rendered.filled(0), expected, atol=1e-12)
+
+    def test_resolution_cache_and_weights(self):
+        """Recent resolutions are cached and weights select modes"""
+        wavefront = LazyWavefront(self.coeffs, R_out=30, R_in=6)
+        wavefront.render(128)
+        wavefront.render((100, 200))
+        self.assertEqual(len(wavefront._bases), 2)
+
+        weights = np.zeros(15)
+        weights[3] = self.coeffs[3]
+        defocus = wavefront.render(128, weights)
+        full = wavefront.render(128)
+        self.assertEqual(len(wavefront._bases), 2)
+        self.assertFalse(np.allclose(defocus.filled(0), full.filled(0)))
+
+    def test_from_mask_with_annular_coefficients(self):
+        """Annular coefficients are converted back to circular ones"""
+        y, x = np.indices((81, 81))
+        r = np.hypot(x - 40, y - 40)
+        mask = (r >= 10) & (r <= 40)
+        dense = zernike_polynomials(mask.shape, mask, 40, (40, 40), 15)
+        wavefront_map = np.tensordot(self.coeffs, dense, axes=1)
+
+        coeffs, _ = fit_zernike(wavefront_map, mask, 40, (40, 40), 15, orthonormal=True)
+        _, transform = annular_zernike_basis(mask.shape, mask, 40, (40, 40), 15)
+        wavefront = LazyWavefront.from_mask(coeffs, mask, 40, (40, 40), transform=transform)
+        np.testing.assert_allclose(wavefront.coeffs, self.coeffs, atol=1e-8)
+        self.assertAlmostEqual(wavefront.obstruction, 0.25)
+
+if __name__ == '__main__':
+    unittest.main()
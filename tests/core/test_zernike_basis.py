@@ -0,0 +1,87 @@
+# Copyright (c) 2025 Adrián Hernández Padrón
+# Licensed under the MIT License. See LICENSE file in the project root for full license information.
+
+import numpy as np
+import unittest
+
+# Add the src directory to the Python path
+import sys
+import os
+sys.path.append(os.path.join(os.path.dirname(__file__), '../..'))
+
+from src.core.zernike import (NOLL_INDICES, PackedBasis, annular_zernike_basis, fit_zernike, noll_indices,
+                              wavefront_rms, zernike_polynomials, zernike_polynomials_packed)
+
+class TestAnnularZernikeBasis(unittest.TestCase):
+    def setUp(self):
+        size = 80
+        y, x = np.indices((size, size))
+        r = np.hypot(x - 40, y - 40)
+        self.mask = (r >= 12) & (r <= 32)
+        self.R_out = 32
+        self.center = (40, 40)
+
+    def test_basis_is_orthonormal_on_pupil(self):
+        """Modes are orthonormal (unit RMS) over the annular pupil"""
+        base, _ = annular_zernike_basis(self.mask.shape, self.mask, self.R_out, self.center, 15)
+        gram = base.values @ base.values.T / np.count_nonzero(self.mask)
+        np.testing.assert_allclose(gram, np.eye(15), atol=1e-10)
+        self.assertTrue(np.all(base.to_dense()[:, ~self.mask] == 0))
+
+    def test_transform_maps_to_circular_zernikes(self):
+        """The triangular transform recovers the circular polynomials"""
+        base, transform = annular_zernike_basis(self.mask.shape, self.mask, self.R_out, self.center, 15)
+        circular = zernike_polynomials(self.mask.shape, self.mask, self.R_out, self.center, 15)
+        np.testing.assert_allclose(np.tensordot(transform.T, base.to_dense(), axes=1)[:, self.mask],
+                                   circular[:, self.mask], atol=1e-10)
+        np.testing.assert_allclose(np.tril(transform, -1), 0, atol=1e-12)
+
+    def test_projection_matches_least_squares(self):
+        """Projection on the orthonormal basis gives the same wavefront as the least-squares fit"""
+        rng = np.random.default_rng(1)
+        circular = zernike_polynomials(self.mask.shape, self.mask, self.R_out, self.center, 15)
+        wavefront = np.tensordot(rng.normal(size=15), circular, axes=1) * self.mask
+
+        coeffs_ls, base_ls = fit_zernike(wavefront, self.mask, self.R_out, self.center, 15)
+        coeffs_on, base_on = fit_zernike(wavefront, self.mask, self.R_out, self.center, 15,
+                                         orthonormal=True)
+        np.testing.assert_allclose(base_on.synthesize(coeffs_on)[self.mask],
+                                   base_ls.synthesize(coeffs_ls)[self.mask], atol=1e-8)
+
+        # El RMS (sin pistón) se obtiene directamente de los coeficientes
+        values = wavefront[self.mask]
+        self.assertAlmostEqual(wavefront_rms(coeffs_on), np.std(values), places=8)
+
+class TestPackedBasis(unittest.TestCase):
+    def setUp(self):
+        y, x = np.indices((50, 60))
+        r = np.hypot(x - 30, y - 25)
+        self.mask = (r >= 6) & (r <= 20)
+        self.args = (self.mask.shape, self.mask, 20, (30, 25))
+
+    def test_packed_matches_dense(self):
+        """The packed basis scatters back to the dense polynomials"""
+        packed = zernike_polynomials_packed(*self.args, max_terms=23)
+        dense = zernike_polynomials(*self.args, max_terms=23)
+        self.assertEqual(packed.shape, dense.shape)
+        self.assertEqual(packed.values.shape, (23, np.count_nonzero(self.mask)))
+        np.testing.assert_array_equal(packed.to_dense(), dense)
+        np.testing.assert_array_equal(packed[4], dense[4])
+        np.testing.assert_array_equal(packed.mask, self.mask)
+
+        coeffs = np.linspace(-1, 1, 23)
+        np.testing.assert_allclose(packed.synthesize(coeffs), np.tensordot(coeffs, dense, axes=1), atol=1e-12)
+
+        repacked = PackedBasis.from_dense(dense, self.mask)
+        np.testing.assert_array_equal(repacked.values, packed.values)
+
+    def test_many_modes(self):
+        """Mode ordering extends the legacy list without repeating modes"""
+        indices = noll_indices(200)
+        self.assertEqual(indices[:23], NOLL_INDICES)
+        self.assertEqual(len(set(indices)), 200)
+        packed = zernike_polynomials_packed(*self.args, max_terms=60)
+        self.assertEqual(packed.n_modes, 60)
+
+if __name__ == '__main__':
+    unittest.main()
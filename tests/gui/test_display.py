@@ -0,0 +1,70 @@
+# Copyright (c) 2025 Adrián Hernández Padrón
+# Licensed under the MIT License. See LICENSE file in the project root for full license information.
+
+import numpy as np
+from PyQt5.QtWidgets import QApplication
+import unittest
+import sys
+import os
+
+# Add the src directory to the Python path
+sys.path.append(os.path.join(os.path.dirname(__file__), '../..'))
+
+from src.gui.display import DisplayStretch, compute_stretch_limits, build_lut
+
+class TestDisplayStretch(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.app = QApplication.instance()
+        if cls.app is None:
+            cls.app = QApplication(sys.argv)
+
+    def setUp(self):
+        rng = np.random.default_rng(1)
+        self.raw = rng.integers(100, 4000, size=(120, 160)).astype(np.uint16)
+
+    def test_linear_limits_uint16_are_exact(self):
+        """Linear limits from the histogram match min/max"""
+        vmin, vmax = compute_stretch_limits(self.raw, 'linear')
+        self.assertEqual(vmin, self.raw.min())
+        self.assertEqual(vmax, self.raw.max())
+
+    def test_linear_matches_normalize(self):
+        """uint16 LUT path matches the old float normalization"""
+        stretch = DisplayStretch('linear')
+        out = stretch.to_uint8(self.raw)
+        data = self.raw.astype(np.float64)
+        expected = np.round((data - data.min()) / (data.max() - data.min()) * 255)
+        self.assertEqual(out.dtype, np.uint8)
+        self.assertLessEqual(np.max(np.abs(out.astype(int) - expected)), 1)
+
+    def test_float_input(self):
+        """Float images go through the quantized path"""
+        stretch = DisplayStretch('asinh')
+        out = stretch.to_uint8(self.raw.astype(np.float64))
+        self.assertEqual(out.shape, self.raw.shape)
+        self.assertEqual(out.min(), 0)
+        self.assertEqual(out.max(), 255)
+
+    def test_buffer_is_reused(self):
+        """The output buffer is reused for images of the same shape"""
+        stretch = DisplayStretch('percentile')
+        first = stretch.to_uint8(self.raw)
+        second = stretch.to_uint8(self.raw[::-1, ::-1])
+        self.assertIs(first, second)
+
+    def test_qimage(self):
+        """QImage has the image size"""
+        q_image = DisplayStretch('log').to_qimage(self.raw)
+        self.assertEqual((q_image.height(), q_image.width()), self.raw.shape)
+
+    def test_lut_monotonic(self):
+        """Stretch tables are monotonic"""
+        for mode in ('linear', 'asinh', 'log'):
+            lut = build_lut(10, 1000, mode, levels=2048)
+            self.assertTrue(np.all(np.diff(lut.astype(int)) >= 0))
+            self.assertEqual(lut[0], 0)
+            self.assertEqual(lut[-1], 255)
+
+if __name__ == '__main__':
+    unittest.main()
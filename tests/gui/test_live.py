@@ -0,0 +1,130 @@
+# Copyright (c) 2025 Adrián Hernández Padrón
+# Licensed under the MIT License. See LICENSE file in the project root for full license information.
+
+import numpy as np
+from PyQt5.QtWidgets import QApplication
+import tempfile
+import time
+import unittest
+import sys
+import os
+
+# Add the src directory to the Python path
+sys.path.append(os.path.join(os.path.dirname(__file__), '../..'))
+
+from src.core.fft_plan import plan_fft
+from src.core.pipeline import RoddierSettings
+from src.core.simulation import simulate_donuts, write_fits_pairs
+from src.core.telescope import TelescopeParams
+from src.gui.live import DirectoryScanner, FramePairer, LiveSession
+
+def wait_until(app, condition, timeout=10.0):
+    deadline = time.perf_counter() + timeout
+    while not condition() and time.perf_counter() < deadline:
+        app.processEvents()
+        time.sleep(0.01)
+    app.processEvents()
+    return condition()
+
+class TestLiveMode(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.app = QApplication.instance()
+        if cls.app is None:
+            cls.app = QApplication(sys.argv)
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.directory = self.temp_dir.name
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def _touch(self, name, content=b'data'):
+        path = os.path.join(self.directory, name)
+        with open(path, 'wb') as f:
+            f.write(content)
+        return path
+
+    def test_scanner_waits_for_complete_files(self):
+        """Existing files are ignored and new ones are reported once their size is stable"""
+        self._touch('old_intra.fits')
+        scanner = DirectoryScanner(self.directory)
+        scanner.prime()
+
+        path = self._touch('intra_001.fits')
+        self._touch('notes.txt')
+        self.assertEqual(scanner.scan(), [])
+        self.assertTrue(scanner.has_pending)
+        self.assertEqual(scanner.scan(), [path])
+        self.assertEqual(scanner.scan(), [])
+
+        # A rewritten file is reported again
+        self._touch('intra_001.fits', b'new frame data')
+        scanner.scan()
+        self.assertEqual(scanner.scan(), [path])
+
+    def test_pairer(self):
+        """Frames are paired by name and each pair is delivered once"""
+        pairer = FramePairer()
+        self.assertIsNone(pairer.add('/d/intra_001.fits'))
+        self.assertIsNone(pairer.add('/d/intra_002.fits'))
+        self.assertEqual(pairer.add('/d/Extra_001.fit'), ('/d/intra_001.fits', '/d/Extra_001.fit'))
+        self.assertIsNone(pairer.add('/d/extra_001.fits'))
+        self.assertIsNone(pairer.add('/d/frame.fits'))
+
+    def test_stale_pairs_are_dropped(self):
+        """While a pair is analysed only the newest waiting pair is kept"""
+        processed = []
+
+        def slow_process(intra_path, extra_path, settings):
+            time.sleep(0.2)
+            processed.append(intra_path)
+            return intra_path
+
+        session = LiveSession(self.directory, None, process=slow_process, polling=True)
+        frames = []
+        session.result_ready.connect(frames.append)
+        session.start()
+        for i in range(4):
+            session.submit(f"intra_{i}", f"extra_{i}")
+
+        self.assertTrue(wait_until(self.app, lambda: len(frames) == 2))
+        session.stop()
+        session.wait()
+        self.assertEqual(processed, ['intra_0', 'intra_3'])
+        self.assertEqual(session.dropped, 2)
+        self.assertEqual([frame.index for frame in frames], [1, 2])
+
+    def test_live_session_analyzes_new_pairs(self):
+        """A pair written into the watched directory is analysed with the last test parameters"""
+        telescope = TelescopeParams(apertura=200.0, focal=1000.0, pixel_scale=5.0)
+        coeffs = np.zeros(11)
+        coeffs[[4, 6]] = [2e-5, -1e-5]
+        batch = simulate_donuts(telescope, 1.0, coeffs, rng=0)
+        fft_plan = plan_fft(batch.R_out)
+        settings = RoddierSettings(
+            telescope_params={'apertura': 200.0, 'focal': 1000.0, 'tamano_pixel': 5.0},
+            roddier_params={'max_order': 11, 'threshold': 0.5, 'solver': 'zonal'},
+            crop_size=fft_plan.crop_size, fft_shape=fft_plan.fft_shape)
+
+        session = LiveSession(self.directory, settings, polling=True, poll_interval_ms=20)
+        frames, errors = [], []
+        session.result_ready.connect(frames.append)
+        session.error.connect(errors.append)
+        session.start()
+        write_fits_pairs(batch, self.directory)
+
+        self.assertTrue(wait_until(self.app, lambda: frames or errors))
+        session.stop()
+        session.wait()
+        self.assertEqual(errors, [])
+        frame = frames[0]
+        self.assertEqual(os.path.basename(frame.intra_path), 'intra_0000.fits')
+        self.assertEqual(len(frame.result.zernike_coeffs), 11)
+        self.assertGreater(frame.latency, 0)
+        self.assertEqual(frame.statistics.n, 1)
+        np.testing.assert_allclose(frame.statistics.coeffs.mean, frame.result.zernike_coeffs)
+
+if __name__ == '__main__':
+    unittest.main()
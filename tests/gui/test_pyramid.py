@@ -0,0 +1,55 @@
+# Copyright (c) 2025 Adrián Hernández Padrón
+# Licensed under the MIT License. See LICENSE file in the project root for full license information.
+
+import numpy as np
+from PyQt5.QtWidgets import QApplication
+from PyQt5.QtCore import QThreadPool
+import unittest
+import sys
+import os
+
+# Add the src directory to the Python path
+sys.path.append(os.path.join(os.path.dirname(__file__), '../..'))
+
+from src.gui.pyramid import PyramidImageView, build_pyramid_levels, downsample_2x
+
+class TestImagePyramid(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.app = QApplication.instance()
+        if cls.app is None:
+            cls.app = QApplication(sys.argv)
+
+    def test_downsample(self):
+        """2x2 block averaging halves the size"""
+        image = np.arange(35, dtype=np.uint8).reshape(5, 7)
+        reduced = downsample_2x(image)
+        self.assertEqual(reduced.shape, (2, 3))
+        self.assertEqual(reduced[0, 0], (0 + 1 + 7 + 8) // 4)
+
+    def test_levels(self):
+        """Levels shrink until the minimum size"""
+        levels = build_pyramid_levels(np.zeros((1000, 1500), dtype=np.uint8), min_size=256)
+        self.assertEqual(levels[0].shape, (1000, 1500))
+        self.assertEqual(levels[1].shape, (500, 750))
+        self.assertLessEqual(max(levels[-1].shape), 256)
+
+    def test_view_zoom(self):
+        """The view resizes with zoom and picks coarser levels when zooming out"""
+        view = PyramidImageView()
+        self.assertFalse(view.has_image())
+        view.set_image(np.zeros((1024, 2048), dtype=np.uint8))
+        QThreadPool.globalInstance().waitForDone()
+        self.app.processEvents()
+        self.assertGreater(view.level_count(), 1)
+
+        view.set_zoom(0.25)
+        self.assertEqual((view.width(), view.height()), (512, 256))
+        self.assertEqual(view.level_for_zoom(0.25), 2)
+        self.assertEqual(view.level_for_zoom(2.0), 0)
+
+        view.clear()
+        self.assertFalse(view.has_image())
+
+if __name__ == '__main__':
+    unittest.main()
@@ -84,6 +84,26 @@ class TestRoddierTestDialog(unittest.TestCase):
         self.assertEqual(intra_crop.shape, (self.dialog.crop_size, self.dialog.crop_size))
         self.assertEqual(extra_crop.shape, (self.dialog.crop_size, self.dialog.crop_size))
 
+    def test_crop_size_and_preview(self):
+        """Editing the crop size re-crops the images and the preview follows the threshold"""
+        self.dialog.crop_size_spin.setValue(64)
+        self.assertEqual(self.dialog.crop_size, 64)
+        self.assertEqual(self.dialog.cropped_intra.shape, (64, 64))
+        self.assertEqual(self.dialog.get_roddier_params()['crop_size'], 64)
+
+        self.dialog.update_preview()
+        self.assertIsNotNone(self.dialog.preview)
+        self.assertEqual(self.dialog.preview.factor, 2)
+        self.assertFalse(self.dialog.preview_mask_label.pixmap().isNull())
+
+        # Un umbral inválido o que deja la máscara vacía no cierra el diálogo
+        self.dialog.threshold_edit.setText("abc")
+        self.dialog.update_preview()
+        self.assertEqual(self.dialog.preview_info.text(), "Threshold no válido")
+        self.dialog.threshold_edit.setText("5")
+        self.dialog.update_preview()
+        self.assertIsNone(self.dialog.preview)
+
     def tearDown(self):
         self.dialog.close()
 
@@ -13,6 +13,10 @@ import os
 sys.path.append(os.path.join(os.path.dirname(__file__), '../..'))
 
 from src.gui.dialogs.roddiertestresults import RoddierTestResultsWindow
+from src.core.wavefront import LazyWavefront
+from src.core.zernike import annular_zernike_basis, zernike_polynomials
+from astropy.io import fits
+import tempfile
 
 class TestRoddierResultsWindow(unittest.TestCase):
     @classmethod
@@ -165,6 +169,126 @@ class TestRoddierResultsWindow(unittest.TestCase):
         self.assertEqual(labels[2], "Tilt Y")
         self.assertEqual(labels[3], "Defocus")
 
+    def test_lazy_wavefront_display_and_export(self):
+        """Display and export use the lazily evaluated wavefront"""
+        y, x = np.indices((41, 41))
+        r = np.hypot(x - 20, y - 20)
+        annular_mask = (r >= 5) & (r <= 20)
+        coeffs = np.array([0.0, 0.1, 0.0, 0.3, 0.05])
+        base = zernike_polynomials(annular_mask.shape, annular_mask, 20, (20, 20), 5)
+
+        self.window.update_plots(
+            zernike_coeffs=coeffs,
+            zernike_base=base,
+            annular_mask=annular_mask,
+            interferogram_params={'fringes': 4, 'reference_frequency': 1.0, 'reference_intensity': 0.5},
+            telescope_params={'apertura': 200.0, 'focal': 1000.0, 'tamano_pixel': 5.5},
+            wavefront=LazyWavefront.from_mask(coeffs, annular_mask, 20, (20, 20))
+        )
+        shown = self.window.wavefront_ax.images[0].get_array()
+        self.assertEqual(shown.shape[0], self.window._display_size())
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'wavefront.fits')
+            self.window.export_wavefront_map(path, size=256)
+            data = fits.getdata(path)
+        self.assertEqual(data.shape, (256, 256))
+        self.assertTrue(np.isnan(data[0, 0]))
+        self.assertTrue(np.isfinite(data[128, 200]))
+
+    def test_toggle_mode_checkbox(self):
+        """Toggling a mode checkbox redraws the wavefront without that mode"""
+        y, x = np.indices((41, 41))
+        r = np.hypot(x - 20, y - 20)
+        annular_mask = (r >= 5) & (r <= 20)
+        coeffs = np.array([0.0, 0.1, 0.0, 0.3, 0.05])
+        base = zernike_polynomials(annular_mask.shape, annular_mask, 20, (20, 20), 5)
+        self.window.update_plots(
+            zernike_coeffs=coeffs,
+            zernike_base=base,
+            annular_mask=annular_mask,
+            interferogram_params={'fringes': 4, 'reference_frequency': 1.0, 'reference_intensity': 0.5},
+            telescope_params={'apertura': 200.0, 'focal': 1000.0, 'tamano_pixel': 5.5}
+        )
+
+        self.window.zernike_checks[3].setChecked(False)
+        shown = np.flipud(self.window.wavefront_ax.images[0].get_array())
+        expected = np.tensordot([0.0, 0.1, 0.0, 0.0, 0.05], base, axes=1)
+        np.testing.assert_allclose(shown[annular_mask], expected[annular_mask], atol=1e-12)
+
+    def test_incremental_update_keeps_selection(self):
+        """A new result with the same modes updates the plots in place and keeps the selection"""
+        y, x = np.indices((41, 41))
+        r = np.hypot(x - 20, y - 20)
+        annular_mask = (r >= 5) & (r <= 20)
+        base = zernike_polynomials(annular_mask.shape, annular_mask, 20, (20, 20), 5)
+        params = dict(zernike_base=base, annular_mask=annular_mask,
+                      interferogram_params={'fringes': 4, 'reference_frequency': 1.0, 'reference_intensity': 0.5},
+                      telescope_params={'apertura': 200.0, 'focal': 1000.0, 'tamano_pixel': 5.5})
+
+        self.window.update_plots(zernike_coeffs=np.array([0.0, 0.1, 0.0, 0.3, 0.05]), **params)
+        checks = list(self.window.zernike_checks)
+        image = self.window.wavefront_ax.images[0]
+        checks[3].setChecked(False)
+
+        coeffs = np.array([0.0, 0.2, 0.0, 0.6, 0.1])
+        self.window.update_plots(zernike_coeffs=coeffs, **params)
+        self.assertEqual(self.window.zernike_checks, checks)
+        self.assertFalse(checks[3].isChecked())
+        self.assertIn("0.600", checks[3].text())
+        self.assertIs(self.window.wavefront_ax.images[0], image)
+        self.assertAlmostEqual(self.window.histogram_ax.patches[1].get_height(), 0.2)
+
+    def test_error_bars(self):
+        """Coefficient errors are drawn as error bars and replaced when a new result arrives"""
+        y, x = np.indices((41, 41))
+        r = np.hypot(x - 20, y - 20)
+        annular_mask = (r >= 5) & (r <= 20)
+        base = zernike_polynomials(annular_mask.shape, annular_mask, 20, (20, 20), 5)
+        params = dict(zernike_base=base, annular_mask=annular_mask,
+                      interferogram_params={'fringes': 4, 'reference_frequency': 1.0, 'reference_intensity': 0.5},
+                      telescope_params={'apertura': 200.0, 'focal': 1000.0, 'tamano_pixel': 5.5})
+
+        errors = np.array([0.0, 0.01, 0.01, 0.02, 0.03])
+        self.window.update_plots(zernike_coeffs=np.array([0.0, 0.1, 0.0, 0.3, 0.05]), coeff_errors=errors,
+                                 **params)
+        self.assertIn("0.300 ± 0.020", self.window.zernike_checks[3].text())
+        self.assertEqual(len(self.window.histogram_ax.containers), 2)
+
+        self.window.update_plots(zernike_coeffs=np.array([0.0, 0.2, 0.0, 0.6, 0.1]), coeff_errors=errors,
+                                 **params)
+        self.assertEqual(len(self.window.histogram_ax.containers), 2)
+        self.window.update_plots(zernike_coeffs=np.array([0.0, 0.2, 0.0, 0.6, 0.1]), **params)
+        self.assertEqual(len(self.window.histogram_ax.containers), 1)
+
+    def test_annular_basis_selection(self):
+        """With annular coefficients the selected modes are rendered in the annular basis"""
+        y, x = np.indices((40, 40))
+        r = np.hypot(x - 19.5, y - 19.5)
+        annular_mask = (r >= 8) & (r <= 20)
+        base, transform = annular_zernike_basis(annular_mask.shape, annular_mask, 20, (19.5, 19.5), 8)
+        coeffs = np.array([0.1, 0.05, -0.08, 0.3, 0.12, -0.1, 0.07, 0.04])
+        self.window.update_plots(
+            zernike_coeffs=coeffs,
+            zernike_base=base,
+            annular_mask=annular_mask,
+            interferogram_params={'fringes': 4, 'reference_frequency': 1.0, 'reference_intensity': 0.5},
+            telescope_params={'apertura': 200.0, 'focal': 1000.0, 'tamano_pixel': 5.5},
+            wavefront=LazyWavefront.from_mask(coeffs, annular_mask, 20, (19.5, 19.5), transform=transform)
+        )
+        self.window.zernike_checks[3].setChecked(False)
+
+        weights = coeffs.copy()
+        weights[[0, 3]] = 0.0  # el pistón está desmarcado por defecto
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'wavefront.fits')
+            self.window.export_wavefront_map(path, size=40)
+            data = fits.getdata(path)
+        expected = base.synthesize(weights)
+        inside = annular_mask & np.isfinite(data)
+        self.assertGreater(inside.sum(), 0.9 * annular_mask.sum())
+        np.testing.assert_allclose(data[inside], expected[inside], atol=1e-6)
+
     def tearDown(self):
         self.window.close()
 
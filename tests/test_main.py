@@ -6,9 +6,11 @@ import os
 import unittest
 from PyQt5.QtWidgets import QApplication
 from PyQt5.QtTest import QTest
-from PyQt5.QtCore import Qt, QPoint
+from PyQt5.QtCore import Qt, QPoint, QThreadPool
 from PyQt5.QtGui import QWheelEvent
 import numpy as np
+import tempfile
+import shutil
 from astropy.io import fits
 
 # Add the project root directory to the Python path
@@ -105,6 +107,35 @@ class TestFitsViewer(unittest.TestCase):
         self.viewer.handle_wheel_event(event, self.viewer.intra_label)
         self.assertEqual(self.viewer.zoom_factor, initial_zoom)
 
+    def test_async_load_with_prefetch(self):
+        """Test background loading and prefetch of the matching extra image"""
+        temp_dir = tempfile.mkdtemp()
+        try:
+            data = np.zeros((64, 64), dtype=np.uint16)
+            data[20:30, 40:50] = 1000
+            intra_path = os.path.join(temp_dir, 'intra_1.fits')
+            extra_path = os.path.join(temp_dir, 'extra_1.fits')
+            fits.PrimaryHDU(data).writeto(intra_path)
+            fits.PrimaryHDU(data).writeto(extra_path)
+
+            self.viewer.process_and_display_image(intra_path, is_intrafocal=True)
+            self.viewer.prefetch_image(extra_path, is_intrafocal=False)
+            self.viewer.thread_pool.waitForDone()
+            self.app.processEvents()
+
+            self.assertEqual(self.viewer.intra_image_path, intra_path)
+            self.assertEqual(self.viewer.intra_image_data.dtype, np.float64)
+            self.assertIsNone(self.viewer.extra_image_data)
+            self.assertIn((extra_path, False), self.viewer._prefetched)
+
+            # The prefetched image is shown without a new load
+            self.viewer.process_and_display_image(extra_path, is_intrafocal=False)
+            self.assertEqual(self.viewer.extra_image_path, extra_path)
+            np.testing.assert_array_equal(self.viewer.extra_image_data, np.rot90(data, k=2))
+        finally:
+            QThreadPool.globalInstance().waitForDone()
+            shutil.rmtree(temp_dir)
+
     def tearDown(self):
         """Clean up after each test"""
         self.viewer.close()
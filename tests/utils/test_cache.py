@@ -0,0 +1,104 @@
+# Copyright (c) 2025 Adrián Hernández Padrón
+# Licensed under the MIT License. See LICENSE file in the project root for full license information.
+
+import numpy as np
+import os
+import tempfile
+import time
+import unittest
+
+# Add the src directory to the Python path
+import sys
+sys.path.append(os.path.join(os.path.dirname(__file__), '../..'))
+
+from src.common.cache import ResultCache, cache_key
+from src.core.fft_plan import plan_fft
+from src.core.pipeline import RoddierSettings, run_roddier
+from src.core.simulation import simulate_donuts
+from src.core.telescope import TelescopeParams
+
+class TestResultCache(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.cache = ResultCache(self.temp_dir.name)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_keys(self):
+        """Keys depend on pixel data, dtype and parameters but not on how numbers are written"""
+        image = np.arange(12.0).reshape(3, 4)
+        key = cache_key(image, {'threshold': 0.5, 'max_order': 23})
+        self.assertEqual(key, cache_key(image.copy(), {'max_order': 23.0, 'threshold': 0.5}))
+        self.assertNotEqual(key, cache_key(image.astype(np.float32), {'threshold': 0.5, 'max_order': 23}))
+        self.assertNotEqual(key, cache_key(image.T, {'threshold': 0.5, 'max_order': 23}))
+        self.assertNotEqual(key, cache_key(image, {'threshold': 0.6, 'max_order': 23}))
+
+    def test_round_trip_and_corrupt_entries(self):
+        """Stored arrays come back unchanged; unreadable entries are dropped"""
+        arrays = {'mask': np.eye(4, dtype=bool), 'coeffs': np.linspace(0, 1, 5), 'R_out': 12.5}
+        self.cache.put('stage', 'abc', arrays)
+        loaded = self.cache.get('stage', 'abc')
+        np.testing.assert_array_equal(loaded['mask'], arrays['mask'])
+        self.assertEqual(loaded['mask'].dtype, bool)
+        np.testing.assert_array_equal(loaded['coeffs'], arrays['coeffs'])
+        self.assertEqual(float(loaded['R_out']), 12.5)
+        self.assertIsNone(self.cache.get('stage', 'missing'))
+
+        with open(self.cache._path('stage', 'broken'), 'wb') as f:
+            f.write(b'not a zip file')
+        self.assertIsNone(self.cache.get('stage', 'broken'))
+        self.assertFalse(os.path.exists(self.cache._path('stage', 'broken')))
+
+    def test_least_recently_used_entries_are_evicted(self):
+        """Past the size limit the entries read longest ago are removed first"""
+        noise = np.random.default_rng(0).random((64, 64))
+        for name in ('a', 'b', 'c'):
+            self.cache.put('stage', name, {'data': noise})
+        entry_size = self.cache.size_bytes // 3
+        for age, name in enumerate(('a', 'b', 'c')):
+            stamp = time.time() - 100 + age
+            os.utime(self.cache._path('stage', name), (stamp, stamp))
+        self.cache.get('stage', 'a')
+
+        self.cache.max_bytes = 2 * entry_size + entry_size // 2
+        self.cache.put('stage', 'd', {'data': noise})
+        self.assertIsNotNone(self.cache.get('stage', 'a'))
+        self.assertIsNone(self.cache.get('stage', 'b'))
+        self.assertIsNone(self.cache.get('stage', 'c'))
+        self.assertIsNotNone(self.cache.get('stage', 'd'))
+
+    def test_rerun_only_recomputes_changed_stages(self):
+        """A second test on the same pair reuses every stage whose inputs did not change"""
+        coeffs = np.zeros(11)
+        coeffs[[4, 6]] = [2e-4, -1e-4]
+        batch = simulate_donuts(TelescopeParams(apertura=200.0, focal=1000.0, pixel_scale=5.0), 3.0, coeffs,
+                                flux=1e7, rng=0)
+        intra, extra = batch.intra[0].astype(float), batch.extra[0].astype(float)
+        settings = RoddierSettings(
+            telescope_params={'apertura': 200.0, 'focal': 1000.0, 'tamano_pixel': 5.0},
+            roddier_params={'max_order': 11, 'threshold': 0.5, 'solver': 'zonal'},
+            fft_shape=plan_fft(batch.R_out).fft_shape)
+
+        reference = run_roddier(intra, extra, settings)
+        first = run_roddier(intra, extra, settings, cache=self.cache)
+        self.assertEqual((self.cache.hits, self.cache.misses), (0, 3))
+        # Con el preprocesado y los coeficientes en la caché no hace falta alinear
+        again = run_roddier(intra, extra, settings, cache=self.cache)
+        self.assertEqual((self.cache.hits, self.cache.misses), (2, 3))
+        for result in (first, again):
+            np.testing.assert_array_equal(result.zernike_coeffs, reference.zernike_coeffs)
+            np.testing.assert_array_equal(result.zernike_base.values, reference.zernike_base.values)
+            self.assertEqual(result.center, reference.center)
+
+        # Otro número de modos: sólo se repite la reconstrucción
+        settings.roddier_params['max_order'] = 8
+        run_roddier(intra, extra, settings, cache=self.cache)
+        self.assertEqual((self.cache.hits, self.cache.misses), (3, 4))
+        # Otro umbral: se reutiliza sólo el alineado
+        settings.roddier_params['threshold'] = 0.4
+        run_roddier(intra, extra, settings, cache=self.cache)
+        self.assertEqual((self.cache.hits, self.cache.misses), (4, 6))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,54 @@
+# Copyright (c) 2025 Adrián Hernández Padrón
+# Licensed under the MIT License. See LICENSE file in the project root for full license information.
+
+import numpy as np
+import unittest
+
+# Add the src directory to the Python path
+import sys
+import os
+sys.path.append(os.path.join(os.path.dirname(__file__), '../..'))
+
+from src.common import centroid
+from src.common.centroid import compute_center_of_mass, cached_center_of_mass, clear_centroid_cache
+
+class TestCentroidService(unittest.TestCase):
+    def setUp(self):
+        clear_centroid_cache()
+        rng = np.random.default_rng(0)
+        self.image = rng.normal(100, 2, (1500, 2000))
+        y, x = np.indices(self.image.shape)
+        r = np.hypot(y - 700.4, x - 1300.6)
+        self.image += 1000 * ((r > 40) & (r < 90))
+
+    def test_coarse_to_fine_matches_full_frame(self):
+        """The windowed result equals the full-frame center of mass"""
+        normalized = (self.image - self.image.min()) / (self.image.max() - self.image.min())
+        mask = normalized > 0.1
+        y, x = np.nonzero(mask)
+        w = normalized[mask]
+        expected = (int(np.sum(y * w) / w.sum()), int(np.sum(x * w) / w.sum()))
+        self.assertEqual(compute_center_of_mass(self.image), expected)
+
+    def test_cache_by_identity(self):
+        """Repeated calls on the same array are served from the cache"""
+        first = cached_center_of_mass(self.image)
+        self.assertIn(id(self.image), centroid._cache)
+        self.assertEqual(cached_center_of_mass(self.image), first)
+
+        # A copy is a different image and is computed again
+        copy = self.image.copy()
+        self.assertEqual(cached_center_of_mass(copy), first)
+        self.assertIn(id(copy), centroid._cache)
+
+    def test_cache_entry_released(self):
+        """Entries disappear when the image is garbage collected"""
+        image = np.zeros((50, 50))
+        image[10, 10] = 1.0
+        cached_center_of_mass(image)
+        key = id(image)
+        del image
+        self.assertNotIn(key, centroid._cache)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,96 @@
+# Copyright (c) 2025 Adrián Hernández Padrón
+# Licensed under the MIT License. See LICENSE file in the project root for full license information.
+
+import numpy as np
+import os
+import tempfile
+import unittest
+from astropy.io import fits
+
+# Add the src directory to the Python path
+import sys
+sys.path.append(os.path.join(os.path.dirname(__file__), '../..'))
+
+from src.common.frames import FitsCubeReader, is_frame_sequence, open_frames
+from src.common.ser import SER_HEADER_SIZE, SER_RGB, SerReader, read_ser_header, write_ser
+
+class TestFrameSources(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        rng = np.random.default_rng(0)
+        self.frames = rng.integers(0, 4096, size=(5, 12, 16), dtype=np.uint16)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def _path(self, name):
+        return os.path.join(self.temp_dir.name, name)
+
+    def test_ser_round_trip(self):
+        """SER frames are memory-mapped with the header geometry"""
+        path = self._path('capture.ser')
+        write_ser(path, self.frames, pixel_depth=12)
+        header = read_ser_header(path)
+        self.assertEqual((header.width, header.height, header.frame_count, header.pixel_depth), (16, 12, 5, 12))
+
+        with SerReader(path) as reader:
+            self.assertEqual(len(reader), 5)
+            self.assertEqual(reader.frame_shape, (12, 16))
+            np.testing.assert_array_equal(reader[3], self.frames[3])
+            block = reader.read(1, 4)
+            self.assertEqual(block.dtype, np.float64)
+            np.testing.assert_array_equal(block, self.frames[1:4])
+
+    def test_ser_byte_order_and_truncation(self):
+        """Big-endian data is read when flagged and frames cut off by an interrupted capture are ignored"""
+        path = self._path('big.ser')
+        write_ser(path, self.frames, little_endian=False)
+        with open(path, 'r+b') as f:
+            f.truncate(SER_HEADER_SIZE + 3 * self.frames[0].nbytes + 10)
+        with SerReader(path) as reader:
+            self.assertEqual(len(reader), 3)
+            np.testing.assert_array_equal(reader.read(0, 3), self.frames[:3])
+
+    def test_ser_color_is_converted_to_luminance(self):
+        """RGB frames are averaged over their planes"""
+        path = self._path('color.ser')
+        rgb = np.stack([self.frames, 2 * self.frames, 3 * self.frames], axis=-1).astype(np.uint16)
+        write_ser(path, rgb.reshape(5, 12, 48))
+        with open(path, 'r+b') as f:
+            # Reescribir la cabecera como RGB de 16 x 12
+            f.seek(18)
+            f.write(np.int32(SER_RGB).tobytes())
+            f.seek(26)
+            f.write(np.int32(16).tobytes())
+        with SerReader(path) as reader:
+            np.testing.assert_allclose(reader.read(0, 1)[0], 2.0 * self.frames[0])
+
+    def test_invalid_ser(self):
+        """Files without the SER signature are rejected"""
+        path = self._path('fake.ser')
+        with open(path, 'wb') as f:
+            f.write(b'x' * 200)
+        with self.assertRaises(ValueError):
+            SerReader(path)
+
+    def test_fits_cube(self):
+        """FITS cubes are read in blocks with BZERO applied; single images are one-frame sources"""
+        cube_path = self._path('cube.fits')
+        fits.PrimaryHDU(self.frames).writeto(cube_path)
+        image_path = self._path('image.fits')
+        fits.PrimaryHDU(self.frames[0]).writeto(image_path)
+
+        self.assertTrue(is_frame_sequence(cube_path))
+        self.assertFalse(is_frame_sequence(image_path))
+        self.assertTrue(is_frame_sequence(self._path('missing.ser')))
+
+        with open_frames(cube_path) as reader:
+            self.assertIsInstance(reader, FitsCubeReader)
+            self.assertEqual(len(reader), 5)
+            np.testing.assert_array_equal(reader.read(2, 5), self.frames[2:])
+        with open_frames(image_path) as reader:
+            self.assertEqual(len(reader), 1)
+            np.testing.assert_array_equal(reader.read(0, 1)[0], self.frames[0])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,110 @@
+# Copyright (c) 2025 Adrián Hernández Padrón
+# Licensed under the MIT License. See LICENSE file in the project root for full license information.
+
+import numpy as np
+import os
+import tempfile
+import unittest
+
+# Add the src directory to the Python path
+import sys
+sys.path.append(os.path.join(os.path.dirname(__file__), '../..'))
+
+from src.common.cache import ResultCache
+from src.common.graph import Stage, StageGraph
+from src.core.fft_plan import plan_fft
+from src.core.pipeline import RoddierGraph, RoddierSettings, run_roddier
+from src.core.simulation import simulate_donuts
+from src.core.telescope import TelescopeParams
+
+def chain(cache=None):
+    stages = [
+        Stage('scaled', lambda image, scale: {'image': image * scale}, params=('image', 'scale'),
+              persist=('image',)),
+        Stage('offset', lambda scaled, offset: {'image': scaled['image'] + offset}, ('scaled',), ('offset',)),
+        Stage('total', lambda offset: {'value': float(offset['image'].sum())}, ('offset',)),
+    ]
+    return StageGraph(stages, cache, image=np.ones(4), scale=2.0, offset=1.0)
+
+class TestStageGraph(unittest.TestCase):
+    def test_only_downstream_stages_are_recomputed(self):
+        """Changing a parameter invalidates the stages that read it and everything after them"""
+        graph = chain()
+        self.assertEqual(graph.get('total')['value'], 12.0)
+        self.assertEqual(graph.set(offset=0.0), {'offset', 'total'})
+        self.assertEqual(graph.get('total')['value'], 8.0)
+        self.assertEqual(graph.runs, {'scaled': 1, 'offset': 2, 'total': 2})
+
+        # Mismo contenido: no se invalida nada
+        self.assertEqual(graph.set(image=np.ones(4), scale=2.0), set())
+        self.assertTrue(graph.is_valid('total'))
+        graph.set(image=np.zeros(4))
+        self.assertEqual(graph.get('total')['value'], 0.0)
+        self.assertEqual(graph.runs['scaled'], 2)
+
+    def test_persisted_stages_skip_their_inputs(self):
+        """A stage found in the disk cache is not computed, nor are the stages before it"""
+        with tempfile.TemporaryDirectory() as directory:
+            chain(ResultCache(directory)).get('total')
+            graph = chain(ResultCache(directory))
+            self.assertEqual(graph.get('total')['value'], 12.0)
+            self.assertEqual(graph.runs, {'scaled': 0, 'offset': 1, 'total': 1})
+
+    def test_stages_must_be_ordered(self):
+        with self.assertRaises(ValueError):
+            StageGraph([Stage('b', dict, ('a',)), Stage('a', dict)])
+
+class TestRoddierGraph(unittest.TestCase):
+    def setUp(self):
+        coeffs = np.zeros(11)
+        coeffs[[4, 6]] = [2e-4, -1e-4]
+        batch = simulate_donuts(TelescopeParams(apertura=200.0, focal=1000.0, pixel_scale=5.0), 3.0, coeffs,
+                                flux=1e7, rng=0)
+        self.intra, self.extra = batch.intra[0].astype(float), batch.extra[0].astype(float)
+        self.settings = RoddierSettings(
+            telescope_params={'apertura': 200.0, 'focal': 1000.0, 'tamano_pixel': 5.0},
+            roddier_params={'max_order': 11, 'threshold': 0.5, 'solver': 'zonal'},
+            interferogram_params={'fringes': 4, 'reference_frequency': 1.0, 'reference_intensity': 0.5},
+            fft_shape=plan_fft(batch.R_out).fft_shape)
+
+    def test_parameter_changes_rerun_only_affected_stages(self):
+        """max_order reuses the Poisson solution and threshold reuses the alignment"""
+        graph = RoddierGraph()
+        graph.configure(self.settings)
+        graph.set_cropped(self.intra, self.extra)
+        graph.result()
+        self.assertEqual(graph.set(max_order=8), {'reconstruct', 'uncertainty', 'basis'})
+        result = graph.result()
+        self.assertEqual(len(result.zernike_coeffs), 8)
+        self.assertEqual((graph.runs['align'], graph.runs['wavefront'], graph.runs['reconstruct']), (1, 1, 2))
+
+        self.settings.roddier_params.update(max_order=8, threshold=0.4)
+        self.assertNotIn('align', graph.configure(self.settings))
+        result = graph.result()
+        self.assertEqual((graph.runs['align'], graph.runs['preprocess'], graph.runs['wavefront']), (1, 2, 2))
+        np.testing.assert_array_equal(result.zernike_coeffs,
+                                      run_roddier(self.intra, self.extra, self.settings).zernike_coeffs)
+
+        # Los parámetros del interferograma sólo afectan a la ventana de resultados
+        self.settings.interferogram_params = {'fringes': 4, 'reference_frequency': 2.0, 'reference_intensity': 0.5}
+        self.assertEqual(graph.configure(self.settings), set())
+
+    def test_main_window_rerun_keeps_crop(self):
+        """Re-running with the crop size in the settings on a cropped pair keeps the alignment"""
+        self.settings.crop_size = 200
+        graph = RoddierGraph()
+        for max_order in (11, 8):
+            self.settings.roddier_params['max_order'] = max_order
+            # Misma secuencia que la ventana principal
+            graph.configure(self.settings)
+            graph.set_cropped(self.intra.copy(), self.extra.copy())
+            graph.result()
+        self.assertEqual((graph.runs['crop'], graph.runs['align'], graph.runs['preprocess'],
+                          graph.runs['wavefront'], graph.runs['reconstruct']), (1, 1, 1, 1, 2))
+
+        # Con imágenes completas se vuelve a aplicar el recorte de los parámetros
+        graph.configure(self.settings, self.intra, self.extra)
+        self.assertEqual(graph.result().annular_mask.shape, (200, 200))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -82,6 +82,80 @@ class TestImagePreprocessing(unittest.TestCase):
         self.assertTrue(com_y > 50)
         self.assertTrue(com_x > 50)
 
+    def test_bin_image(self):
+        """Test NxN block binning with edge trimming"""
+        from src.common.utils import bin_image
+
+        image = np.arange(7 * 9, dtype=np.float64).reshape(7, 9)
+        binned = bin_image(image, 2)
+        self.assertEqual(binned.shape, (3, 4))
+        self.assertEqual(binned[0, 0], image[:2, :2].sum())
+        self.assertEqual(bin_image(image, 3, method='mean')[1, 2], image[3:6, 6:9].mean())
+
+    def test_parse_binning(self):
+        """Test parsing the binning field"""
+        from src.common.utils import parse_binning
+
+        self.assertEqual(parse_binning("1x1"), 1)
+        self.assertEqual(parse_binning("3X3"), 3)
+        self.assertEqual(parse_binning(2), 2)
+        with self.assertRaises(ValueError):
+            parse_binning("2x3")
+        with self.assertRaises(ValueError):
+            parse_binning("0")
+
+    def test_load_fits_image_binned(self):
+        """Test binning while reading a scaled 16-bit FITS file"""
+        from src.common.utils import bin_image
+
+        data = np.random.default_rng(0).integers(0, 60000, size=(1030, 70)).astype(np.uint16)
+        path = os.path.join(self.temp_dir, 'uint16.fits')
+        fits.PrimaryHDU(data).writeto(path)
+
+        binned = load_fits_image(path, binning=4)
+        np.testing.assert_allclose(binned, bin_image(data.astype(np.float64), 4))
+
+    def test_guess_pair_path(self):
+        """Test finding the matching intra/extra file by name"""
+        from src.common.utils import guess_pair_path
+
+        for name in ('Intra_003.fits', 'Extra_003.fit', 'star-in-1.fits', 'star-out-1.fits'):
+            open(os.path.join(self.temp_dir, name), 'w').close()
+
+        self.assertEqual(guess_pair_path(os.path.join(self.temp_dir, 'Intra_003.fits')),
+                         os.path.join(self.temp_dir, 'Extra_003.fit'))
+        self.assertEqual(guess_pair_path(os.path.join(self.temp_dir, 'star-out-1.fits')),
+                         os.path.join(self.temp_dir, 'star-in-1.fits'))
+        # 'intra' dentro de otra palabra no cuenta como marca
+        self.assertIsNone(guess_pair_path(os.path.join(self.temp_dir, 'test.fits')))
+
+    def test_pair_key(self):
+        """Both frames of a pair share a key regardless of case and extension"""
+        from src.common.utils import pair_key
+
+        intra_key, is_intra = pair_key('/captures/Intra_003.fits')
+        extra_key, is_extra_intra = pair_key('/captures/extra_003.FIT')
+        self.assertEqual(intra_key, extra_key)
+        self.assertTrue(is_intra)
+        self.assertFalse(is_extra_intra)
+        self.assertEqual(pair_key('/captures/star-in-1.fits')[0], pair_key('/captures/star-out-1.fits')[0])
+        self.assertIsNone(pair_key('/captures/test.fits'))
+
+    def test_border_background(self):
+        """The border median and MAD ignore the centre and agree between single images and stacks"""
+        from src.common.utils import border_background
+
+        rng = np.random.default_rng(0)
+        images = rng.normal(100.0, 5.0, (3, 64, 64))
+        images[:, 16:48, 16:48] += 1000.0
+        medians, spreads = border_background(images)
+        self.assertEqual(medians.shape, (3,))
+        np.testing.assert_allclose(medians, 100.0, atol=1.0)
+        np.testing.assert_allclose(spreads, 5.0, rtol=0.2)
+        median, spread = border_background(images[1])
+        self.assertAlmostEqual(median, medians[1])
+        self.assertAlmostEqual(spread, spreads[1])
+
     def tearDown(self):
         # Clean up temporary files
         shutil.rmtree(self.temp_dir)
@@ -0,0 +1,108 @@
+# Copyright (c) 2025 Adrián Hernández Padrón
+# Licensed under the MIT License. See LICENSE file in the project root for full license information.
+
+import json
+import numpy as np
+import tempfile
+import unittest
+
+# Add the src directory to the Python path
+import sys
+import os
+sys.path.append(os.path.join(os.path.dirname(__file__), '../..'))
+
+from src.common.tracing import (ChromeTraceExporter, MemoryBudgetWarning, StageSummary, add_hook, clear_hooks,
+                                clear_memory_budgets, collecting, enable_memory_tracking, is_enabled,
+                                set_memory_budget, span, traced)
+import warnings
+from src.core.roddier import calculate_wavefront
+
+@traced('double', category='test')
+def double(image):
+    return image * 2
+
+class TestTracing(unittest.TestCase):
+    def tearDown(self):
+        clear_hooks()
+        enable_memory_tracking(False)
+        clear_memory_budgets()
+
+    def test_disabled_by_default(self):
+        """Without hooks nothing is recorded and results are unchanged"""
+        self.assertFalse(is_enabled())
+        with span('nothing') as record:
+            self.assertIsNone(record)
+        np.testing.assert_array_equal(double(np.ones(3)), 2 * np.ones(3))
+
+    def test_spans_are_nested_and_describe_arrays(self):
+        """Spans carry nesting, array shapes and output size"""
+        records = []
+        with collecting(records.append):
+            with span('outer', category='test'):
+                double(np.zeros((4, 5), dtype=np.float32))
+        self.assertFalse(is_enabled())
+
+        inner, outer = records
+        self.assertEqual((inner.name, inner.parent, inner.depth), ('double', 'outer', 1))
+        self.assertEqual(outer.depth, 0)
+        self.assertEqual(inner.args['arg0'], 'float32[4, 5]')
+        self.assertEqual(inner.args['output_bytes'], 80)
+        self.assertGreaterEqual(outer.duration, inner.duration)
+
+    def test_exporters(self):
+        """Core functions feed the Chrome trace and the stage summary"""
+        exporter = ChromeTraceExporter()
+        summary = StageSummary(max_depth=0)
+        add_hook(exporter)
+        add_hook(summary)
+        mask = np.ones((32, 32), dtype=bool)
+        with span('run'):
+            calculate_wavefront(np.random.default_rng(0).normal(size=(32, 32)), mask, dz_mm=1.0)
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'trace.json')
+            exporter.save(path)
+            with open(path) as f:
+                events = json.load(f)['traceEvents']
+        self.assertEqual([e['name'] for e in events], ['calculate_wavefront', 'run'])
+        self.assertTrue(all(e['ph'] == 'X' and e['dur'] >= 0 for e in events))
+        self.assertEqual(events[0]['args']['arg0'], 'float64[32, 32]')
+        self.assertEqual(list(summary.totals), ['run'])
+        self.assertTrue(summary.text().startswith('run '))
+
+    def test_nested_memory_peaks(self):
+        """Each span reports its own peak, and the parent includes the child's"""
+        records = []
+        enable_memory_tracking()
+        with collecting(records.append):
+            with span('outer'):
+                small = np.ones(2**17)  # 1 MB que sigue vivo
+                with span('inner'):
+                    temporary = np.ones(2**20)  # 8 MB temporales
+                    del temporary
+                after = np.ones(2**18)  # 2 MB después del hijo
+                del small, after
+
+        inner, outer = records
+        self.assertAlmostEqual(inner.peak_memory / 2**20, 8, delta=0.5)
+        self.assertAlmostEqual(outer.peak_memory / 2**20, 9, delta=0.5)
+        self.assertIn('peak_memory_mb', outer.args)
+
+    def test_memory_budget_warning(self):
+        """Stages close to their budget warn and are flagged in the summary"""
+        summary = StageSummary()
+        enable_memory_tracking()
+        set_memory_budget('double', 1)
+        with collecting(summary):
+            with warnings.catch_warnings(record=True) as caught:
+                warnings.simplefilter('always')
+                double(np.ones(2**17))  # 1 MB de salida
+                with span('other'):
+                    np.ones(2**17)
+        self.assertEqual([type(w.message) for w in caught], [MemoryBudgetWarning])
+        self.assertEqual(summary.over_budget, ['double'])
+        self.assertIn('MB', summary.text())
+        self.assertIn('memoria: double', summary.text())
+
+if __name__ == '__main__':
+    unittest.main()